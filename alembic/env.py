@@ -9,6 +9,7 @@ from alembic import context
 
 from app.models import Base
 from app.core.config import settings
+from app.core.database import normalize_database_url
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -20,18 +21,33 @@ if config.config_file_name is not None:
     fileConfig(config.config_file_name)
 
 # Set SQLAlchemy URL in config
-config.set_main_option("sqlalchemy.url", settings.DATABASE_URL)
+config.set_main_option(
+    "sqlalchemy.url",
+    normalize_database_url(settings.DATABASE_URL).render_as_string(
+        hide_password=False)
+)
 
 # add your model's MetaData object here
 # for 'autogenerate' support
 target_metadata = Base.metadata
 
 
+def include_object(object, name, type_, reflected, compare_to):
+    # Full-text search objects live outside the models; see
+    # app/models/receipt.py
+    if type_ == 'table' and name.startswith('receipts_fts'):
+        return False
+    if name in ('search_vector', 'ix_receipts_search_vector'):
+        return False
+    return True
+
+
 def do_run_migrations(connection: Connection) -> None:
     context.configure(
         connection=connection,
         target_metadata=target_metadata,
-        compare_type=True
+        compare_type=True,
+        include_object=include_object
     )
 
     with context.begin_transaction():
@@ -0,0 +1,37 @@
+"""Add telegram_files index
+
+Revision ID: 3f1c9a7d2b64
+Revises: ad43149a2977
+Create Date: 2026-10-18 10:12:41.208113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c9a7d2b64'
+down_revision: Union[str, None] = 'ad43149a2977'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('telegram_files',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('file_unique_id', sa.String(), nullable=False),
+    sa.Column('file_path', sa.String(), nullable=False),
+    sa.Column('parsed_data', sa.Text(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_telegram_files_file_unique_id'),
+                    'telegram_files', ['file_unique_id'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_telegram_files_file_unique_id'),
+                  table_name='telegram_files')
+    op.drop_table('telegram_files')
@@ -0,0 +1,26 @@
+"""Add receipts (team_id, date, id) index
+
+Revision ID: 4e7a2c9b5d18
+Revises: c5d81e3f9a27
+Create Date: 2026-10-18 13:17:26.584402
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4e7a2c9b5d18'
+down_revision: Union[str, None] = 'c5d81e3f9a27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_receipts_team_date_id', 'receipts',
+                    ['team_id', 'date', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_receipts_team_date_id', table_name='receipts')
@@ -0,0 +1,95 @@
+"""Add receipts.raw_text and full-text search
+
+Revision ID: 6a1f0c8e2d57
+Revises: 9d3b6f1e7c40
+Create Date: 2026-10-18 16:02:37.481926
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6a1f0c8e2d57'
+down_revision: Union[str, None] = '9d3b6f1e7c40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_FTS_COLUMNS = ('raw_text, sender, receiver, organization, '
+                'operation_number')
+_NEW_VALUES = ('new.id, new.raw_text, new.sender, new.receiver, '
+               'new.organization, new.operation_number')
+_OLD_VALUES = ("'delete', old.id, old.raw_text, old.sender, old.receiver, "
+               "old.organization, old.operation_number")
+
+
+def upgrade() -> None:
+    op.add_column('receipts', sa.Column('raw_text', sa.Text(), nullable=True))
+
+    dialect = op.get_bind().dialect.name
+    # Text of receipts that came through Telegram is kept with the file
+    if dialect == 'sqlite':
+        raw_text = "json_extract(telegram_files.parsed_data, '$.raw_text')"
+    else:
+        raw_text = "telegram_files.parsed_data::json ->> 'raw_text'"
+    op.execute(
+        f"UPDATE receipts SET raw_text = (SELECT {raw_text} "
+        "FROM telegram_files "
+        "WHERE telegram_files.file_path = receipts.file_path LIMIT 1)"
+    )
+
+    if dialect == 'sqlite':
+        op.execute(
+            f"CREATE VIRTUAL TABLE receipts_fts USING fts5({_FTS_COLUMNS}, "
+            "content='receipts', content_rowid='id', "
+            "tokenize='unicode61 remove_diacritics 2')"
+        )
+        op.execute(
+            "CREATE TRIGGER receipts_fts_insert AFTER INSERT ON receipts "
+            f"BEGIN INSERT INTO receipts_fts(rowid, {_FTS_COLUMNS}) "
+            f"VALUES ({_NEW_VALUES}); END"
+        )
+        op.execute(
+            "CREATE TRIGGER receipts_fts_delete AFTER DELETE ON receipts "
+            f"BEGIN INSERT INTO receipts_fts(receipts_fts, rowid, "
+            f"{_FTS_COLUMNS}) VALUES ({_OLD_VALUES}); END"
+        )
+        op.execute(
+            "CREATE TRIGGER receipts_fts_update AFTER UPDATE OF "
+            f"{_FTS_COLUMNS} ON receipts BEGIN "
+            f"INSERT INTO receipts_fts(receipts_fts, rowid, {_FTS_COLUMNS}) "
+            f"VALUES ({_OLD_VALUES}); "
+            f"INSERT INTO receipts_fts(rowid, {_FTS_COLUMNS}) "
+            f"VALUES ({_NEW_VALUES}); END"
+        )
+        # Index the receipts already stored
+        op.execute("INSERT INTO receipts_fts(receipts_fts) VALUES('rebuild')")
+    elif dialect == 'postgresql':
+        op.execute(
+            "ALTER TABLE receipts ADD COLUMN search_vector tsvector "
+            "GENERATED ALWAYS AS ("
+            "setweight(to_tsvector('simple', "
+            "coalesce(operation_number, '')), 'A')"
+            " || setweight(to_tsvector('simple', coalesce(sender, '') || ' ' "
+            "|| coalesce(receiver, '') || ' ' || coalesce(organization, '')), "
+            "'B')"
+            " || setweight(to_tsvector('simple', coalesce(raw_text, '')), "
+            "'D')"
+            ") STORED"
+        )
+        op.create_index('ix_receipts_search_vector', 'receipts',
+                        ['search_vector'], postgresql_using='gin')
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        for trigger in ('insert', 'delete', 'update'):
+            op.execute(f"DROP TRIGGER receipts_fts_{trigger}")
+        op.execute("DROP TABLE receipts_fts")
+    elif dialect == 'postgresql':
+        op.drop_index('ix_receipts_search_vector', table_name='receipts')
+        op.drop_column('receipts', 'search_vector')
+    op.drop_column('receipts', 'raw_text')
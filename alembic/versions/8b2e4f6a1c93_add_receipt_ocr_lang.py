@@ -0,0 +1,27 @@
+"""Add receipts.ocr_lang
+
+Revision ID: 8b2e4f6a1c93
+Revises: 3f1c9a7d2b64
+Create Date: 2026-10-18 11:40:05.771260
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b2e4f6a1c93'
+down_revision: Union[str, None] = '3f1c9a7d2b64'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('receipts',
+                  sa.Column('ocr_lang', sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('receipts', 'ocr_lang')
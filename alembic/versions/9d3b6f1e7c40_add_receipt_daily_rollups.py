@@ -0,0 +1,49 @@
+"""Add receipt_daily_rollups
+
+Revision ID: 9d3b6f1e7c40
+Revises: 4e7a2c9b5d18
+Create Date: 2026-10-18 13:20:03.117845
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d3b6f1e7c40'
+down_revision: Union[str, None] = '4e7a2c9b5d18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('receipt_daily_rollups',
+    sa.Column('team_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.Column('amount', sa.Numeric(precision=14, scale=2), nullable=False),
+    sa.ForeignKeyConstraint(['team_id'], ['teams.id'], ),
+    sa.PrimaryKeyConstraint('team_id', 'day', 'status')
+    )
+
+    # Backfill from the receipts already stored
+    if op.get_bind().dialect.name == 'sqlite':
+        day = 'date(date)'
+    else:
+        day = 'CAST(date AS DATE)'
+    op.execute(
+        "INSERT INTO receipt_daily_rollups "
+        "(team_id, day, status, count, amount) "
+        f"SELECT team_id, {day}, status, COUNT(*), COALESCE(SUM(amount), 0) "
+        "FROM receipts "
+        "WHERE team_id IS NOT NULL AND date IS NOT NULL "
+        "AND status IS NOT NULL "
+        f"GROUP BY team_id, {day}, status"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('receipt_daily_rollups')
@@ -0,0 +1,66 @@
+# app/bot/albums.py
+import asyncio
+import contextvars
+from typing import Awaitable, Callable, Dict, List, Set, Tuple
+
+from aiogram.types import Message
+
+from app.core.logging import logger
+
+# How long to wait for more messages of an album after the last one
+ALBUM_COLLECT_DELAY = 1.0
+
+AlbumKey = Tuple[int, str]
+
+
+class AlbumCollector:
+    """Groups the messages of a Telegram album (media group).
+
+    Telegram delivers every file of an album as a separate update with the
+    same ``media_group_id``. Messages are buffered until no new one has
+    arrived for ``delay`` seconds, then ``on_album`` receives them all at
+    once, in the order they were sent.
+    """
+
+    def __init__(
+            self,
+            on_album: Callable[[List[Message]], Awaitable[None]],
+            delay: float = ALBUM_COLLECT_DELAY
+    ):
+        self.on_album = on_album
+        self.delay = delay
+        self._albums: Dict[AlbumKey, List[Message]] = {}
+        self._timers: Dict[AlbumKey, asyncio.TimerHandle] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+    def add(self, message: Message) -> None:
+        key = (message.chat.id, message.media_group_id)
+        self._albums.setdefault(key, []).append(message)
+
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        # The flush outlives this handler, so it must not see the
+        # handler's context (unit of work, request-scoped caches)
+        self._timers[key] = asyncio.get_running_loop().call_later(
+            self.delay, self._flush, key, context=contextvars.Context()
+        )
+
+    def _flush(self, key: AlbumKey) -> None:
+        self._timers.pop(key, None)
+        messages = sorted(self._albums.pop(key),
+                          key=lambda message: message.message_id)
+        task = asyncio.create_task(self._deliver(messages),
+                                   context=contextvars.Context())
+        # Keep a reference until done so the task isn't garbage collected
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _deliver(self, messages: List[Message]) -> None:
+        try:
+            await self.on_album(messages)
+        except Exception as e:
+            logger.error(f"Error processing album: {e}", exc_info=True)
+            await messages[0].reply(
+                "An error occurred while processing the receipts. "
+                "Please try again later.")
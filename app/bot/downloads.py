@@ -0,0 +1,71 @@
+# app/bot/downloads.py
+from typing import AsyncIterator, Tuple
+
+import aiofiles
+import aiohttp
+from aiogram import Bot
+from aiogram.exceptions import (
+    TelegramNetworkError, TelegramRetryAfter, TelegramServerError
+)
+
+DOWNLOAD_CHUNK_SIZE = 256 * 1024
+
+
+async def _read_local_file(
+        path: str,
+        chunk_size: int
+) -> AsyncIterator[bytes]:
+    async with aiofiles.open(path, 'rb') as f:
+        while chunk := await f.read(chunk_size):
+            yield chunk
+
+
+async def _translate_errors(
+        chunks: AsyncIterator[bytes]
+) -> AsyncIterator[bytes]:
+    try:
+        async for chunk in chunks:
+            yield chunk
+    except (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError) as e:
+        raise ConnectionError(f"Telegram file download failed: {e}") from e
+    except aiohttp.ClientResponseError as e:
+        if e.status >= 500:
+            raise ConnectionError(
+                f"Telegram file download failed: {e}") from e
+        raise
+
+
+async def open_telegram_file(
+        bot: Bot,
+        file_id: str,
+        chunk_size: int = DOWNLOAD_CHUNK_SIZE,
+        timeout: int = 60
+) -> Tuple[AsyncIterator[bytes], str]:
+    """Resolve a Telegram file and return a chunk stream plus its filename.
+
+    Unlike ``Bot.download_file`` nothing is buffered: chunks are yielded
+    as they arrive so callers can write them straight to storage.
+    Network and server-side failures are raised as ``ConnectionError`` so
+    that services can retry them without knowing about aiogram.
+    """
+    try:
+        file_obj = await bot.get_file(file_id)
+    except (TelegramNetworkError, TelegramRetryAfter,
+            TelegramServerError) as e:
+        raise ConnectionError(f"Telegram getFile failed: {e}") from e
+    filename = file_obj.file_path.split('/')[-1]
+
+    api = bot.session.api
+    if api.is_local:
+        chunks = _read_local_file(
+            api.wrap_local_file.to_local(file_obj.file_path),
+            chunk_size
+        )
+    else:
+        chunks = bot.session.stream_content(
+            url=api.file_url(bot.token, file_obj.file_path),
+            timeout=timeout,
+            chunk_size=chunk_size,
+            raise_for_status=True
+        )
+    return _translate_errors(chunks), filename
@@ -1,5 +1,8 @@
 # app/bot/handlers/__init__.py
 from app.bot.handlers import base
+from app.bot.handlers.export import setup_export_handlers
 from app.bot.handlers.receipt import setup_receipt_handlers
+from app.bot.handlers.stats import setup_stats_handlers
 
-__all__ = ['base', 'setup_receipt_handlers']
\ No newline at end of file
+__all__ = ['base', 'setup_export_handlers', 'setup_receipt_handlers',
+           'setup_stats_handlers']
\ No newline at end of file
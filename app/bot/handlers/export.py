@@ -0,0 +1,147 @@
+# app/bot/handlers/export.py
+from datetime import datetime, time
+
+from aiogram import Router
+from aiogram.filters import Command, CommandObject
+from aiogram.types import FSInputFile, Message
+
+from app.bot.handlers.receipt import parse_period
+from app.core.config import Settings
+from app.core.logging import logger
+from app.services.archive_service import ArchiveService
+from app.services.export_service import EXPORT_WRITERS, ExportService
+
+
+def setup_export_handlers(
+        export_service: ExportService,
+        archive_service: ArchiveService,
+        settings: Settings
+) -> Router:
+    router = Router()
+    handlers = ExportHandlers(export_service, archive_service, settings)
+
+    router.message.register(handlers.cmd_export, Command("export"))
+    router.message.register(handlers.cmd_archive, Command("archive"))
+
+    return router
+
+
+class ExportHandlers:
+    def __init__(
+            self,
+            export_service: ExportService,
+            archive_service: ArchiveService,
+            settings: Settings
+    ):
+        self.export_service = export_service
+        self.archive_service = archive_service
+        self.settings = settings
+
+    async def cmd_export(self, message: Message, command: CommandObject):
+        """Send the team's receipts of a month or year as a spreadsheet."""
+        fmt, period = 'csv', None
+        for arg in (command.args or '').split():
+            if arg.lower() in EXPORT_WRITERS:
+                fmt = arg.lower()
+            else:
+                period = arg
+        try:
+            start_day, end_day, label = parse_period(period)
+        except ValueError:
+            await message.reply(
+                "Please provide a month or a year and optionally a format: "
+                "/export YYYY-MM xlsx or /export YYYY csv")
+            return
+
+        result = None
+        try:
+            result = await self.export_service.export_team_receipts(
+                telegram_id=message.from_user.id,
+                start_date=datetime.combine(start_day, time.min),
+                end_date=datetime.combine(end_day, time.max),
+                fmt=fmt
+            )
+            if result is None:
+                await message.reply("You are not a member of any team.")
+                return
+            if result.rows == 0:
+                await message.reply(f"No receipts found for {label}")
+                return
+            if result.size > self.settings.TELEGRAM_UPLOAD_LIMIT:
+                await message.reply(
+                    f"The export for {label} is too large to send "
+                    f"({result.size / 1024 / 1024:.0f}MB). "
+                    f"Please export a shorter period.")
+                return
+
+            await message.reply_document(
+                FSInputFile(result.path, filename=f"receipts_{label}.{fmt}"),
+                caption=f"{result.rows} receipts for {label}"
+            )
+
+        except Exception as e:
+            logger.error(f"Error exporting receipts: {e}", exc_info=True)
+            await message.reply(
+                "An error occurred while exporting receipts. "
+                "Please try again later.")
+        finally:
+            if result is not None:
+                result.path.unlink(missing_ok=True)
+
+    async def cmd_archive(self, message: Message, command: CommandObject):
+        """Send the original receipt files of a month or year as ZIPs."""
+        try:
+            start_day, end_day, label = parse_period(command.args)
+        except ValueError:
+            await message.reply(
+                "Please provide a month or a year: "
+                "/archive YYYY-MM or /archive YYYY")
+            return
+
+        result = None
+        try:
+            await message.reply(f"Collecting receipt files for {label}...")
+            result = await self.archive_service.archive_team_files(
+                telegram_id=message.from_user.id,
+                start_date=datetime.combine(start_day, time.min),
+                end_date=datetime.combine(end_day, time.max)
+            )
+            if result is None:
+                await message.reply("You are not a member of any team.")
+                return
+            if result.receipts == 0:
+                await message.reply(f"No receipts found for {label}")
+                return
+
+            total = len(result.parts)
+            for number, (part, size) in enumerate(
+                    zip(result.parts, result.sizes), start=1):
+                name = (f"receipts_{label}.zip" if total == 1
+                        else f"receipts_{label}_part{number}.zip")
+                if size > self.settings.TELEGRAM_UPLOAD_LIMIT:
+                    # A single stored file over the limit
+                    await message.reply(
+                        f"{name} is too large to send "
+                        f"({size / 1024 / 1024:.0f}MB).")
+                    continue
+                caption = f"Receipt files for {label}"
+                if total > 1:
+                    caption += f", part {number} of {total}"
+                await message.reply_document(FSInputFile(part, filename=name),
+                                             caption=caption)
+
+            if result.missing:
+                await message.reply(
+                    f"{result.missing} of {result.receipts} receipts have no "
+                    f"stored file; they are marked as missing in "
+                    f"manifest.csv.")
+
+        except Exception as e:
+            logger.error(f"Error archiving receipts: {e}", exc_info=True)
+            await message.reply(
+                "An error occurred while archiving receipts. "
+                "Please try again later.")
+        finally:
+            if result is not None:
+                for part in result.parts:
+                    part.unlink(missing_ok=True)
@@ -1,12 +1,20 @@
 # app/bot/handlers/receipt.py
-from datetime import datetime
-from typing import Union
+import re
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple, Union
 
 from aiogram import Router, F
-from aiogram.filters import Command
-from aiogram.types import Message, Document, PhotoSize
+from aiogram.filters import Command, CommandObject
+from aiogram.filters.callback_data import CallbackData
+from aiogram.types import (
+    CallbackQuery, Document, InlineKeyboardMarkup, Message, PhotoSize
+)
+from aiogram.utils.keyboard import InlineKeyboardBuilder
 
-from app.services.receipt_service import ReceiptService
+from app.bot.albums import AlbumCollector
+from app.services.ingestion_service import IngestionService
+from app.services.receipt_service import ReceiptPage, ReceiptService
 from app.services.team_service import TeamService
 from app.core.config import Settings
 
@@ -16,10 +24,12 @@ from app.core.logging import logger
 def setup_receipt_handlers(
         receipt_service: ReceiptService,
         team_service: TeamService,
+        ingestion_service: IngestionService,
         settings: Settings
 ) -> Router:
     router = Router()
-    handlers = ReceiptHandlers(receipt_service, team_service, settings)
+    handlers = ReceiptHandlers(receipt_service, team_service,
+                               ingestion_service, settings)
 
     # Handle initial upload command
     router.message.register(
@@ -37,42 +47,97 @@ def setup_receipt_handlers(
         handlers.cmd_list_receipts,
         Command("list_receipts")
     )
+    router.message.register(
+        handlers.cmd_summary,
+        Command("summary")
+    )
+    router.message.register(
+        handlers.cmd_search,
+        Command("search")
+    )
+    router.callback_query.register(
+        handlers.cb_receipts_page,
+        ReceiptPageCallback.filter()
+    )
+    router.callback_query.register(
+        handlers.cb_search_page,
+        SearchPageCallback.filter()
+    )
 
     return router
 
-async def handle_file(self, message: Message):
-    """Handle file upload."""
-    try:
-        file = message.document or message.photo[-1]
-        if not await self._validate_file(message, file):
-            return
 
-        # Download file
-        file_obj = await message.bot.get_file(file.file_id)
-        file_content = await message.bot.download_file(file_obj.file_path)
+_EPOCH = datetime(1970, 1, 1)
 
-        # Process receipt
-        receipt, status_message = await self.receipt_service.process_receipt(
-            telegram_id=message.from_user.id,
-            file_data=file_content,
-            filename=file_obj.file_path.split('/')[-1]
+
+def _end_of_day(day: Union[date, datetime]) -> datetime:
+    if isinstance(day, datetime):
+        day = day.date()
+    return datetime.combine(day, time.max)
+
+
+def parse_period(arg: Optional[str]) -> Tuple[date, date, str]:
+    """Parse ``YYYY-MM`` or ``YYYY`` (default: this month) into days."""
+    if not arg:
+        arg = date.today().strftime('%Y-%m')
+    if len(arg) == 4:
+        year = int(arg)
+        return date(year, 1, 1), date(year, 12, 31), arg
+    start = datetime.strptime(arg, '%Y-%m').date()
+    next_month = (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return start, next_month - timedelta(days=1), arg
+
+
+class ReceiptPageCallback(CallbackData, prefix="receipts"):
+    """Cursor of a /list_receipts page button.
+
+    Dates are packed as YYYYMMDD and the cursor date as microseconds since
+    the epoch so the payload fits Telegram's 64-byte limit.
+    """
+    start: int
+    end: int
+    date: int
+    id: int
+    backward: bool
+
+    @classmethod
+    def from_cursor(
+            cls,
+            start_date: datetime,
+            end_date: datetime,
+            receipt,
+            backward: bool
+    ) -> "ReceiptPageCallback":
+        return cls(
+            start=int(start_date.strftime('%Y%m%d')),
+            end=int(end_date.strftime('%Y%m%d')),
+            date=(receipt.date - _EPOCH) // timedelta(microseconds=1),
+            id=receipt.id,
+            backward=backward
         )
 
-        if receipt:
-            await message.reply(
-                f"Receipt processed successfully!\n"
-                f"Amount: {receipt.amount}\n"
-                f"Date: {receipt.date.strftime('%Y-%m-%d')}\n"
-                f"Status: {receipt.status}"
-            )
-        else:
-            await message.reply(f"Failed to process receipt: {status_message}")
+    def period(self) -> Tuple[datetime, datetime]:
+        return (datetime.strptime(str(self.start), '%Y%m%d'),
+                _end_of_day(datetime.strptime(str(self.end), '%Y%m%d')))
+
+    def cursor(self) -> Tuple[datetime, int]:
+        return _EPOCH + timedelta(microseconds=self.date), self.id
+
+
+class SearchPageCallback(CallbackData, prefix="search"):
+    """Query, optional period and offset of a /search page button."""
+    q: str
+    period: str
+    offset: int
 
-    except Exception as e:
-        logger.error(f"Error processing receipt: {e}", exc_info=True)
-        await message.reply(
-            "An error occurred while processing the receipt. "
-            "Please try again later.")
+
+def _split_search_args(args: str) -> Tuple[str, str]:
+    """Split ``words [YYYY-MM|YYYY]`` into the query and the period."""
+    # ':' separates callback data fields; it never matters to the search
+    words = args.replace(':', ' ').split()
+    if len(words) > 1 and re.fullmatch(r'\d{4}(-\d{2})?', words[-1]):
+        return ' '.join(words[:-1]), words[-1]
+    return ' '.join(words), ''
 
 
 class ReceiptHandlers:
@@ -80,28 +145,94 @@ class ReceiptHandlers:
             self,
             receipt_service: ReceiptService,
             team_service: TeamService,
+            ingestion_service: IngestionService,
             settings: Settings
     ):
         self.receipt_service = receipt_service
         self.team_service = team_service
+        self.ingestion_service = ingestion_service
         self.settings = settings
         self.allowed_mime_types = {'image/jpeg', 'image/png',
                                    'application/pdf'}
+        self.albums = AlbumCollector(self._process_album)
+
+    def _file_error(self, file: Union[Document, PhotoSize]) -> Optional[str]:
+        """Return why the file can't be accepted, or None if it can."""
+        if isinstance(file, Document):
+            if file.mime_type not in self.allowed_mime_types:
+                return "Invalid file type. Please send a PDF or image file."
+            if file.file_size > 20_000_000:  # 20MB limit
+                return "File is too large. Maximum size is 20MB."
+        return None
 
     async def _validate_file(
             self, message: Message, file: Union[Document, PhotoSize]
     ) -> bool:
         """Validate file type and size."""
-        if isinstance(file, Document):
-            if file.mime_type not in self.allowed_mime_types:
-                await message.reply(
-                    "Invalid file type. Please send a PDF or image file.")
-                return False
-            if file.file_size > 20_000_000:  # 20MB limit
-                await message.reply("File is too large. Maximum size is 20MB.")
-                return False
+        error = self._file_error(file)
+        if error:
+            await message.reply(error)
+            return False
         return True
 
+    async def _process_upload(self, message: Message):
+        """Queue the receipt attached to the message for processing.
+
+        The reply is sent right away and edited with the result once a
+        background worker has processed the file. Files sent as an album
+        are collected first and queued together.
+        """
+        if message.media_group_id:
+            self.albums.add(message)
+            return
+
+        file = message.document or message.photo[-1]
+        if not await self._validate_file(message, file):
+            return
+
+        status = await message.reply("Receipt received, processing...")
+        await self.ingestion_service.submit(
+            telegram_id=message.from_user.id,
+            chat_id=message.chat.id,
+            files=[{
+                'file_id': file.file_id,
+                'file_unique_id': file.file_unique_id,
+            }],
+            status_message_id=status.message_id
+        )
+
+    async def _process_album(self, messages: List[Message]):
+        """Queue all receipts of an album as one job with one reply."""
+        files = []
+        skipped = 0
+        for message in messages:
+            file = message.document or (message.photo and message.photo[-1])
+            if file is None or self._file_error(file):
+                skipped += 1
+                continue
+            files.append({
+                'file_id': file.file_id,
+                'file_unique_id': file.file_unique_id,
+            })
+
+        first = messages[0]
+        if not files:
+            await first.reply(
+                "None of the files are receipts. "
+                "Please send PDF or image files.")
+            return
+
+        text = f"{len(files)} receipts received, processing..."
+        if skipped:
+            text += f"\nSkipped {skipped} unsupported files."
+        status = await first.reply(text)
+        await self.ingestion_service.submit(
+            telegram_id=first.from_user.id,
+            chat_id=first.chat.id,
+            files=files,
+            status_message_id=status.message_id
+        )
+
     async def cmd_upload_receipt(self, message: Message):
         """Handle receipt upload command."""
         try:
@@ -111,31 +242,18 @@ class ReceiptHandlers:
                     "with the /upload_receipt command")
                 return
 
-            file = message.document or message.photo[-1]
-            if not await self._validate_file(message, file):
-                return
-
-            # Download file
-            file_obj = await message.bot.get_file(file.file_id)
-            file_content = await message.bot.download_file(file_obj.file_path)
+            await self._process_upload(message)
 
-            # Process receipt
-            receipt, status_message = await self.receipt_service.process_receipt(
-                telegram_id=message.from_user.id,
-                file_data=file_content,
-                filename=file_obj.file_path.split('/')[-1]
-            )
+        except Exception as e:
+            logger.error(f"Error processing receipt: {e}", exc_info=True)
+            await message.reply(
+                "An error occurred while processing the receipt. "
+                "Please try again later.")
 
-            if receipt:
-                await message.reply(
-                    f"Receipt processed successfully!\n"
-                    f"Amount: {receipt.amount}\n"
-                    f"Date: {receipt.date.strftime('%Y-%m-%d')}\n"
-                    f"Status: {receipt.status}"
-                )
-            else:
-                await message.reply(
-                    f"Failed to process receipt: {status_message}")
+    async def handle_file(self, message: Message):
+        """Handle file upload."""
+        try:
+            await self._process_upload(message)
 
         except Exception as e:
             logger.error(f"Error processing receipt: {e}", exc_info=True)
@@ -143,10 +261,14 @@ class ReceiptHandlers:
                 "An error occurred while processing the receipt. "
                 "Please try again later.")
 
-    async def cmd_list_receipts(self, message: Message):
+    async def cmd_list_receipts(
+            self,
+            message: Message,
+            command: CommandObject
+    ):
         """Handle listing receipts command."""
         try:
-            args = message.get_args().split()
+            args = (command.args or '').split()
             if len(args) != 2:
                 await message.reply(
                     "Please provide start and end dates: "
@@ -155,42 +277,272 @@ class ReceiptHandlers:
 
             try:
                 start_date = datetime.strptime(args[0], '%Y-%m-%d')
-                end_date = datetime.strptime(args[1], '%Y-%m-%d')
+                end_date = _end_of_day(
+                    datetime.strptime(args[1], '%Y-%m-%d'))
             except ValueError:
                 await message.reply(
                     "Invalid date format. Please use YYYY-MM-DD")
                 return
 
-            receipts = await self.receipt_service.get_user_receipts(
+            page = await self.receipt_service.get_user_receipts_page(
                 telegram_id=message.from_user.id,
                 start_date=start_date,
-                end_date=end_date
+                end_date=end_date,
+                limit=self.settings.MAX_RECEIPTS_PER_PAGE
             )
 
-            if not receipts:
+            if not page.receipts:
                 await message.reply(
                     f"No receipts found between {args[0]} and {args[1]}")
                 return
 
-            # Format receipts summary
-            total_amount = sum(float(r.amount) for r in receipts)
-            receipt_list = [
-                f"Receipt {r.id}: {r.date.strftime('%Y-%m-%d')} - "
-                f"Amount: {r.amount} - Status: {r.status}"
-                for r in receipts
-            ]
-
-            response = (
-                    f"Receipts for period: {args[0]} to {args[1]}\n"
-                    f"Total receipts: {len(receipts)}\n"
-                    f"Total amount: {total_amount:.2f}\n\n"
-                    + "\n".join(receipt_list)
+            summary = await self.receipt_service.get_period_summary(
+                message.from_user.id, start_date.date(), end_date.date())
+            await message.reply(
+                self._format_page(start_date, end_date, page, summary),
+                reply_markup=self._page_keyboard(start_date, end_date, page)
             )
 
-            await message.reply(response)
-
         except Exception as e:
             logger.error(f"Error listing receipts: {e}", exc_info=True)
             await message.reply(
                 "An error occurred while retrieving receipts. "
-                "Please try again later.")
\ No newline at end of file
+                "Please try again later.")
+
+    async def cb_receipts_page(
+            self,
+            callback: CallbackQuery,
+            callback_data: ReceiptPageCallback
+    ):
+        """Show the page before or after the cursor in the button."""
+        try:
+            start_date, end_date = callback_data.period()
+            page = await self.receipt_service.get_user_receipts_page(
+                telegram_id=callback.from_user.id,
+                start_date=start_date,
+                end_date=end_date,
+                limit=self.settings.MAX_RECEIPTS_PER_PAGE,
+                cursor=callback_data.cursor(),
+                backward=callback_data.backward
+            )
+
+            if not page.receipts:
+                await callback.answer("No more receipts")
+                return
+
+            summary = await self.receipt_service.get_period_summary(
+                callback.from_user.id, start_date.date(), end_date.date())
+            await callback.message.edit_text(
+                self._format_page(start_date, end_date, page, summary),
+                reply_markup=self._page_keyboard(start_date, end_date, page)
+            )
+            await callback.answer()
+
+        except Exception as e:
+            logger.error(f"Error paging receipts: {e}", exc_info=True)
+            await callback.answer(
+                "An error occurred while retrieving receipts.")
+
+    async def cmd_summary(
+            self,
+            message: Message,
+            command: CommandObject
+    ):
+        """Summarise receipts of a month or year by status."""
+        try:
+            try:
+                start_day, end_day, label = parse_period(command.args)
+            except ValueError:
+                await message.reply(
+                    "Please provide a month or a year: "
+                    "/summary YYYY-MM or /summary YYYY")
+                return
+
+            summary = await self.receipt_service.get_period_summary(
+                telegram_id=message.from_user.id,
+                start_day=start_day,
+                end_day=end_day
+            )
+            if not summary:
+                await message.reply(f"No receipts found for {label}")
+                return
+
+            count, total = self._totals(summary)
+            lines = [
+                f"Summary for {label}",
+                f"Total receipts: {count}",
+                f"Total amount: {total:.2f}",
+                f"Average amount: {total / count:.2f}",
+                "",
+            ]
+            lines.extend(
+                f"{status}: {status_count} - {status_total:.2f}"
+                for status, (status_count, status_total)
+                in sorted(summary.items())
+            )
+            await message.reply("\n".join(lines))
+
+        except Exception as e:
+            logger.error(f"Error summarising receipts: {e}", exc_info=True)
+            await message.reply(
+                "An error occurred while summarising receipts. "
+                "Please try again later.")
+
+    async def cmd_search(
+            self,
+            message: Message,
+            command: CommandObject
+    ):
+        """Full-text search over the team's receipts."""
+        query, period = _split_search_args(command.args or '')
+        if not query:
+            await message.reply(
+                "Please provide words to search for, optionally followed "
+                "by a month or a year: /search Alisher 2024-05")
+            return
+        if period:
+            try:
+                parse_period(period)
+            except ValueError:
+                await message.reply(
+                    "Invalid period. Please use YYYY-MM or YYYY")
+                return
+
+        try:
+            text, keyboard = await self._search_page(
+                message.from_user.id, query, period, offset=0)
+            await message.reply(text, reply_markup=keyboard)
+        except Exception as e:
+            logger.error(f"Error searching receipts: {e}", exc_info=True)
+            await message.reply(
+                "An error occurred while searching receipts. "
+                "Please try again later.")
+
+    async def cb_search_page(
+            self,
+            callback: CallbackQuery,
+            callback_data: SearchPageCallback
+    ):
+        """Show another page of search results."""
+        try:
+            text, keyboard = await self._search_page(
+                callback.from_user.id, callback_data.q,
+                callback_data.period, callback_data.offset)
+            await callback.message.edit_text(text, reply_markup=keyboard)
+            await callback.answer()
+        except Exception as e:
+            logger.error(f"Error paging search results: {e}", exc_info=True)
+            await callback.answer(
+                "An error occurred while searching receipts.")
+
+    async def _search_page(
+            self,
+            telegram_id: int,
+            query: str,
+            period: str,
+            offset: int
+    ) -> Tuple[str, Optional[InlineKeyboardMarkup]]:
+        start_date = end_date = None
+        if period:
+            start_day, end_day, _ = parse_period(period)
+            start_date = datetime.combine(start_day, time.min)
+            end_date = _end_of_day(end_day)
+
+        limit = self.settings.MAX_RECEIPTS_PER_PAGE
+        page = await self.receipt_service.search_receipts(
+            telegram_id=telegram_id,
+            query=query,
+            limit=limit,
+            offset=offset,
+            start_date=start_date,
+            end_date=end_date
+        )
+        scope = f'"{query}"' + (f" in {period}" if period else "")
+        if not page.receipts:
+            return f"No receipts found for {scope}", None
+
+        lines = [f"Receipts matching {scope}, best first:", ""]
+        for r in page.receipts:
+            lines.append(
+                f"Receipt {r.id}: {r.date.strftime('%Y-%m-%d')} - "
+                f"Amount: {r.amount} - Status: {r.status}")
+            parties = " → ".join(p for p in (r.sender, r.receiver) if p)
+            if parties or r.organization:
+                lines.append("  " + " | ".join(
+                    p for p in (parties, r.organization) if p))
+
+        builder = InlineKeyboardBuilder()
+        try:
+            if page.has_prev:
+                builder.button(
+                    text="« Prev",
+                    callback_data=SearchPageCallback(
+                        q=query, period=period,
+                        offset=max(offset - limit, 0)).pack()
+                )
+            if page.has_next:
+                builder.button(
+                    text="Next »",
+                    callback_data=SearchPageCallback(
+                        q=query, period=period, offset=offset + limit).pack()
+                )
+        except ValueError:
+            # Query too long for Telegram's 64-byte callback data
+            lines.append("\nShowing the best matches; use fewer words to "
+                         "page through all of them.")
+            return "\n".join(lines), None
+        if not (page.has_prev or page.has_next):
+            return "\n".join(lines), None
+        return "\n".join(lines), builder.as_markup()
+
+    @staticmethod
+    def _totals(
+            summary: Dict[str, Tuple[int, Decimal]]
+    ) -> Tuple[int, Decimal]:
+        return (sum(count for count, _ in summary.values()),
+                sum((amount for _, amount in summary.values()), Decimal(0)))
+
+    @classmethod
+    def _format_page(
+            cls,
+            start_date: datetime,
+            end_date: datetime,
+            page: ReceiptPage,
+            summary: Dict[str, Tuple[int, Decimal]]
+    ) -> str:
+        count, total = cls._totals(summary)
+        receipt_list = [
+            f"Receipt {r.id}: {r.date.strftime('%Y-%m-%d')} - "
+            f"Amount: {r.amount} - Status: {r.status}"
+            for r in page.receipts
+        ]
+        return (
+                f"Receipts for period: {start_date:%Y-%m-%d} to "
+                f"{end_date:%Y-%m-%d}\n"
+                f"Total receipts: {count}\n"
+                f"Total amount: {total:.2f}\n\n"
+                + "\n".join(receipt_list)
+        )
+
+    @staticmethod
+    def _page_keyboard(
+            start_date: datetime,
+            end_date: datetime,
+            page: ReceiptPage
+    ) -> Optional[InlineKeyboardMarkup]:
+        builder = InlineKeyboardBuilder()
+        if page.has_prev:
+            builder.button(
+                text="« Prev",
+                callback_data=ReceiptPageCallback.from_cursor(
+                    start_date, end_date, page.receipts[0], backward=True)
+            )
+        if page.has_next:
+            builder.button(
+                text="Next »",
+                callback_data=ReceiptPageCallback.from_cursor(
+                    start_date, end_date, page.receipts[-1], backward=False)
+            )
+        if not (page.has_prev or page.has_next):
+            return None
+        return builder.as_markup()
@@ -0,0 +1,118 @@
+# app/bot/handlers/stats.py
+from typing import List, Optional
+
+from aiogram import Router
+from aiogram.filters import Command
+from aiogram.types import Message
+
+from app.core.config import Settings
+from app.core.logging import logger
+from app.core.metrics import (
+    DB_QUERY_SECONDS, HANDLER_SECONDS, Histogram, OCR_WORKER_STAGE_SECONDS,
+    RECEIPT_STAGE_SECONDS, RECEIPTS_PROCESSED
+)
+from app.services.ocr import OCRService
+from app.services.ocr.cache import OCRResultCache
+
+# Rows shown per section so the reply stays readable
+MAX_ROWS = 8
+
+
+def setup_stats_handlers(
+        settings: Settings,
+        ocr_service: OCRService,
+        ocr_cache: Optional[OCRResultCache] = None
+) -> Router:
+    router = Router()
+    handlers = StatsHandlers(settings, ocr_service, ocr_cache)
+
+    router.message.register(handlers.cmd_stats, Command("stats"))
+
+    return router
+
+
+def _latency_lines(title: str, histogram: Histogram) -> List[str]:
+    summary = histogram.summary()
+    if not summary:
+        return []
+    # Slowest first by total time spent
+    rows = sorted(summary.items(),
+                  key=lambda item: item[1]['mean'] * item[1]['count'],
+                  reverse=True)[:MAX_ROWS]
+    lines = [f"{title} (n / p50 / p95):"]
+    for labels, stats in rows:
+        lines.append(
+            f"  {'/'.join(labels)}: {stats['count']} / "
+            f"{stats['p50'] * 1000:.0f}ms / {stats['p95'] * 1000:.0f}ms"
+        )
+    return lines
+
+
+class StatsHandlers:
+    def __init__(
+            self,
+            settings: Settings,
+            ocr_service: OCRService,
+            ocr_cache: Optional[OCRResultCache] = None
+    ):
+        self.settings = settings
+        self.ocr_service = ocr_service
+        self.ocr_cache = ocr_cache
+
+    async def cmd_stats(self, message: Message):
+        """Show processing statistics to bot administrators."""
+        if message.from_user.id not in self.settings.ADMIN_TELEGRAM_IDS:
+            await message.reply(
+                "This command is only available to bot administrators.")
+            return
+
+        try:
+            await message.reply(self._render())
+        except Exception as e:
+            logger.error(f"Error rendering stats: {e}", exc_info=True)
+            await message.reply("An error occurred while collecting stats")
+
+    def _render(self) -> str:
+        outcomes = RECEIPTS_PROCESSED.values()
+        lines = ["Receipts: " + (", ".join(
+            f"{outcome}={int(count)}"
+            for (outcome,), count in sorted(outcomes.items())
+        ) or "none yet")]
+
+        pool = self.ocr_service.pool
+        lines.append(f"OCR jobs: {pool.running} running, "
+                     f"{pool.queued} queued")
+
+        if self.ocr_cache is not None:
+            cache = self.ocr_cache.stats()
+            lines.append(
+                f"OCR cache: {cache['hit_rate']:.0%} hit rate "
+                f"({cache['memory_hits']} memory, {cache['disk_hits']} disk, "
+                f"{cache['misses']} misses)"
+            )
+
+        language = self.ocr_service.language_stats.stats()
+        if language['detected']:
+            lines.append("OCR languages: " + ", ".join(
+                f"{lang}={count}"
+                for lang, count in sorted(language['detected'].items())
+            ))
+            line = (f"  {language['single_language_rate']:.0%} with a "
+                    f"single model")
+            if language['verified']:
+                line += (f", {language['match_rate']:.0%} of "
+                         f"{language['verified']} verified matched rus+eng")
+            lines.append(line)
+
+        for title, histogram in (
+                ("Receipt stages", RECEIPT_STAGE_SECONDS),
+                ("OCR worker stages", OCR_WORKER_STAGE_SECONDS),
+                ("Handlers", HANDLER_SECONDS),
+                ("Queries", DB_QUERY_SECONDS),
+        ):
+            section = _latency_lines(title, histogram)
+            if section:
+                lines.append("")
+                lines.extend(section)
+
+        return "\n".join(lines)
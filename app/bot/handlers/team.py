@@ -1,7 +1,7 @@
 # app/bot/handlers/team.py
 import logging
 from aiogram import Router, types
-from aiogram.filters import Command
+from aiogram.filters import Command, CommandObject
 
 from app.services.team_service import TeamService
 
@@ -12,9 +12,13 @@ class TeamHandlers:
     def __init__(self, team_service: TeamService):
         self.team_service = team_service
 
-    async def cmd_create_team(self, message: types.Message):
+    async def cmd_create_team(
+            self,
+            message: types.Message,
+            command: CommandObject
+    ):
         try:
-            args = message.get_args()
+            args = command.args
             if not args:
                 await message.reply(
                     "Please provide a team name: /create_team team_name")
@@ -31,16 +35,20 @@ class TeamHandlers:
             logger.error(f"Error creating team: {e}", exc_info=True)
             await message.reply("An error occurred while creating the team")
 
-    async def cmd_invite(self, message: types.Message):
+    async def cmd_invite(
+            self,
+            message: types.Message,
+            command: CommandObject
+    ):
         try:
-            args = message.get_args()
+            args = command.args
             if not args:
                 await message.reply(
                     "Please provide a username: /invite @username")
                 return
 
             username = args.lstrip('@')
-            success, result_message = await self.team_service.invite_user(
+            success, result_message = await self.team_service.invite_member(
                 admin_telegram_id=message.from_user.id,
                 username=username
             )
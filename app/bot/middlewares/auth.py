@@ -1,8 +1,7 @@
 # app/bot/middlewares/auth.py
 from typing import Dict, Any, Awaitable, Callable
 from aiogram import BaseMiddleware
-from aiogram.types import Message, CallbackQuery
-from sqlalchemy.ext.asyncio import AsyncSession
+from aiogram.types import TelegramObject, User
 from app.services.user_service import UserService
 from app.core.logging import logger
 
@@ -10,40 +9,28 @@ from app.core.logging import logger
 class AuthMiddleware(BaseMiddleware):
     async def __call__(
             self,
-            handler: Callable[[Message, Dict[str, Any]], Awaitable[Any]],
-            event: Message | CallbackQuery,
+            handler: Callable[
+                [TelegramObject, Dict[str, Any]], Awaitable[Any]
+            ],
+            event: TelegramObject,
             data: Dict[str, Any]
     ) -> Any:
+        # Set by aiogram's user context middleware for every update type
+        user: User | None = data.get('event_from_user')
+        if user is None:
+            return await handler(event, data)
+
         try:
-            # Get session and user service from data
             user_service: UserService = data['user_service']
 
-            # Get user info from the event
-            if isinstance(event, Message):
-                user = event.from_user
-            elif isinstance(event, CallbackQuery):
-                user = event.from_user
-            else:
-                return await handler(event, data)
-
-            # Check and register user if needed
-            telegram_user = await user_service.get_or_create_user(
+            # Register the user if needed; cached after the first update
+            data['identity'] = await user_service.get_or_create_identity(
                 user_id=user.id,
-                username=user.username,
-                first_name=user.first_name,
-                last_name=user.last_name
+                username=user.username
             )
 
-            # Add user to data dict for handlers
-            data['user'] = telegram_user
-
-            return await handler(event, data)
-
         except Exception as e:
             logger.error(f"Error in auth middleware: {e}")
-            raise  e
+            raise e
 
-            if isinstance(event, Message):
-                await event.answer(
-                    "Sorry, something went wrong. Please try again later.")
-            return None
+        return await handler(event, data)
@@ -0,0 +1,33 @@
+# app/bot/middlewares/metrics.py
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+
+from app.core.metrics import HANDLER_ERRORS, HANDLER_SECONDS
+
+
+class HandlerMetricsMiddleware(BaseMiddleware):
+    """Times every handler call, labelled by the handler's name.
+
+    Register it as an inner middleware so it only runs once a handler has
+    been selected by its filters.
+    """
+
+    async def __call__(
+            self,
+            handler: Callable[
+                [TelegramObject, Dict[str, Any]], Awaitable[Any]
+            ],
+            event: TelegramObject,
+            data: Dict[str, Any]
+    ) -> Any:
+        handler_object = data.get('handler')
+        name = getattr(getattr(handler_object, 'callback', None),
+                       '__name__', 'unknown')
+        with HANDLER_SECONDS.time(handler=name):
+            try:
+                return await handler(event, data)
+            except Exception:
+                HANDLER_ERRORS.inc(handler=name)
+                raise
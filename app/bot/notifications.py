@@ -0,0 +1,30 @@
+# app/bot/notifications.py
+from typing import Awaitable, Callable
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest
+
+from app.core.logging import logger
+from app.models.ingestion_job import IngestionJob
+
+
+def make_job_notifier(
+        bot: Bot
+) -> Callable[[IngestionJob, str], Awaitable[None]]:
+    """Report job results by editing the job's "processing" reply."""
+
+    async def notify(job: IngestionJob, text: str) -> None:
+        if job.status_message_id:
+            try:
+                await bot.edit_message_text(
+                    text=text,
+                    chat_id=job.chat_id,
+                    message_id=job.status_message_id
+                )
+                return
+            except TelegramBadRequest as e:
+                # Deleted or no longer editable; send a new message instead
+                logger.info(f"Could not edit status of job {job.id}: {e}")
+        await bot.send_message(job.chat_id, text)
+
+    return notify
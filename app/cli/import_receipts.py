@@ -0,0 +1,365 @@
+# app/cli/import_receipts.py
+"""Bulk import of historical receipts from a directory or a zip file.
+
+Files are stored and OCR'd in parallel, then written in batches through
+``ReceiptRepository.bulk_create`` under the given user's team. Progress
+is appended to a checkpoint file after every batch, so running the same
+command again after an interruption skips what was already imported.
+
+    python -m app.cli.import_receipts archive.zip --telegram-id 123456789
+    python -m app.cli.import_receipts receipts/ --telegram-id 123456789 \\
+        --workers 8 --batch-size 200
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import zipfile
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Tuple
+
+from app.core.config import settings
+from app.core.database import create_database_engine, create_session_factory
+from app.db.unit_of_work import unit_of_work
+from app.repositories.receipt import ReceiptRepository
+from app.services.file_storage import (
+    CHUNK_SIZE, ContentAddressedStorage, FileSource
+)
+from app.services.identity_cache import identity_cache
+from app.services.ocr import OCRBusyError, OCRService, OCRWorkerPool
+from app.services.ocr.cache import OCRResultCache
+from app.services.ocr.preprocessing import PreprocessingConfig
+from app.services.ocr.receipt_processor import ReceiptProcessor
+
+# Same file types the bot accepts
+SUPPORTED_SUFFIXES = {'.jpg', '.jpeg', '.png', '.pdf'}
+
+
+@dataclass
+class ImportFile:
+    # Path relative to the directory or zip root; the checkpoint key
+    name: str
+    size: int
+    open: Callable[[], FileSource]
+
+
+def iter_directory(root: Path) -> Iterator[ImportFile]:
+    for path in sorted(root.rglob('*')):
+        if path.is_file() and path.suffix.lower() in SUPPORTED_SUFFIXES:
+            yield ImportFile(path.relative_to(root).as_posix(),
+                             path.stat().st_size,
+                             lambda path=path: path)
+
+
+async def _iter_zip_member(archive: zipfile.ZipFile,
+                           info: zipfile.ZipInfo) -> AsyncIterator[bytes]:
+    # Decompression happens in a thread so OCR scheduling is not blocked
+    member = await asyncio.to_thread(archive.open, info)
+    try:
+        while chunk := await asyncio.to_thread(member.read, CHUNK_SIZE):
+            yield chunk
+    finally:
+        member.close()
+
+
+def iter_zip(archive: zipfile.ZipFile) -> Iterator[ImportFile]:
+    for info in sorted(archive.infolist(), key=lambda i: i.filename):
+        suffix = Path(info.filename).suffix.lower()
+        if info.is_dir() or suffix not in SUPPORTED_SUFFIXES:
+            continue
+        yield ImportFile(info.filename, info.file_size,
+                         lambda info=info: _iter_zip_member(archive, info))
+
+
+class Checkpoint:
+    """Append-only JSON lines log of files that are finished.
+
+    Files are recorded once their receipt is committed, or once they
+    failed for good (unreadable, no amount or date). Transient failures
+    are not recorded and are tried again on the next run.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.done: Dict[str, Dict[str, Any]] = {}
+        if path.exists():
+            with path.open(encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # Torn last line of an interrupted run
+                        continue
+                    self.done[entry['name']] = entry
+
+    def is_done(self, file: ImportFile, retry_failed: bool) -> bool:
+        entry = self.done.get(file.name)
+        if entry is None or entry.get('size') != file.size:
+            return False
+        return not (retry_failed and 'error' in entry)
+
+    def record(self, entries: List[Dict[str, Any]]) -> None:
+        if not entries:
+            return
+        with self.path.open('a', encoding='utf-8') as f:
+            for entry in entries:
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+                self.done[entry['name']] = entry
+            f.flush()
+            os.fsync(f.fileno())
+
+
+class ReceiptImporter:
+    def __init__(
+            self,
+            session_factory,
+            processor: ReceiptProcessor,
+            checkpoint: Checkpoint,
+            team_id: int,
+            user_id: int,
+            concurrency: int = 4,
+            batch_size: int = 100,
+            progress_every: int = 50,
+            persist_paths: bool = False
+    ):
+        self.session_factory = session_factory
+        self.processor = processor
+        self.checkpoint = checkpoint
+        self.team_id = team_id
+        self.user_id = user_id
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.progress_every = progress_every
+        # Save full paths rather than storage keys, for deployments that
+        # read files back through flat storage
+        self.persist_paths = persist_paths
+        self.repository = ReceiptRepository()
+
+        # (file, storage key, receipt row) waiting for the next batch
+        self._rows: List[Tuple[ImportFile, str, Dict[str, Any]]] = []
+        # Permanent failures waiting to be checkpointed with the batch
+        self._failed: List[Dict[str, Any]] = []
+        self._flush_lock = asyncio.Lock()
+        self.stats: Counter = Counter()
+        self.errors: Counter = Counter()
+        self._started = 0.0
+
+    async def run(self, files: List[ImportFile]) -> None:
+        self._started = time.perf_counter()
+        pending = iter(files)
+
+        async def worker():
+            for file in pending:
+                await self._import(file)
+
+        await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+        await self._flush()
+
+    async def _import(self, file: ImportFile) -> None:
+        try:
+            file_path, receipt_data = await self.processor.extract(
+                file.open(), Path(file.name).name)
+            if self.persist_paths:
+                file_path = str(
+                    self.processor.file_storage.resolve(file_path))
+            row = self.processor.validated_row(
+                self.team_id, self.user_id, file_path, receipt_data)
+        except OCRBusyError:
+            self._fail(file, "OCR workers busy", transient=True)
+        except ValueError as e:
+            self._fail(file, str(e))
+        except Exception as e:
+            # Storage or I/O trouble; worth another try on the next run
+            self._fail(file, f"{type(e).__name__}: {e}", transient=True)
+        else:
+            self._rows.append((file, file_path, row))
+
+        self.stats['processed'] += 1
+        if self.stats['processed'] % self.progress_every == 0:
+            self._report_progress()
+        if len(self._rows) >= self.batch_size:
+            await self._flush()
+
+    def _fail(self, file: ImportFile, error: str,
+              transient: bool = False) -> None:
+        self.errors[error] += 1
+        self.stats['failed'] += 1
+        if not transient:
+            self._failed.append(
+                {'name': file.name, 'size': file.size, 'error': error})
+
+    async def _flush(self) -> None:
+        async with self._flush_lock:
+            batch, self._rows = self._rows, []
+            failed, self._failed = self._failed, []
+            if batch:
+                async with unit_of_work(self.session_factory, join=False):
+                    # Rows committed just before an interruption are in the
+                    # database but not in the checkpoint yet
+                    existing = await self.repository.get_existing_file_paths(
+                        self.team_id, {key for _, key, _ in batch})
+                    rows = []
+                    for _, key, row in batch:
+                        if key not in existing:
+                            rows.append(row)
+                            existing.add(key)
+                    await self.repository.bulk_create(rows)
+                self.stats['imported'] += len(rows)
+                self.stats['duplicates'] += len(batch) - len(rows)
+
+            self.checkpoint.record(
+                [{'name': file.name, 'size': file.size, 'file_path': key}
+                 for file, key, _ in batch] + failed
+            )
+
+    def _report_progress(self) -> None:
+        elapsed = time.perf_counter() - self._started
+        print(f"{self.stats['processed']} files, "
+              f"{self.stats['processed'] / elapsed:.2f} files/s, "
+              f"{self.stats['failed']} failed", file=sys.stderr)
+
+    def summary(self, skipped: int) -> str:
+        elapsed = time.perf_counter() - self._started
+        lines = [
+            f"Processed {self.stats['processed']} files "
+            f"in {elapsed:.1f}s "
+            f"({self.stats['processed'] / elapsed if elapsed else 0:.2f}"
+            f" files/s)",
+            f"  imported:   {self.stats['imported']}",
+            f"  duplicates: {self.stats['duplicates']}",
+            f"  failed:     {self.stats['failed']}",
+            f"  skipped (checkpoint): {skipped}",
+        ]
+        if self.errors:
+            lines.append("Errors:")
+            lines.extend(f"  {count:>5} x {error}"
+                         for error, count in self.errors.most_common(10))
+        return "\n".join(lines)
+
+
+def _create_ocr_service(workers: int, concurrency: int) -> OCRService:
+    pool = OCRWorkerPool(
+        max_workers=workers,
+        # Room for every file in flight, so nothing is rejected as busy
+        max_queue=max(concurrency, workers),
+        tesseract_cmd=settings.TESSERACT_CMD
+    )
+    return OCRService(
+        pool,
+        lang=settings.OCR_LANG,
+        lang_verify_rate=settings.OCR_LANG_VERIFY_RATE,
+        pdf_dpi=settings.OCR_PDF_DPI,
+        preprocessing=PreprocessingConfig(
+            fix_orientation=settings.OCR_FIX_ORIENTATION,
+            downscale=settings.OCR_DOWNSCALE,
+            target_text_height=settings.OCR_TARGET_TEXT_HEIGHT,
+            grayscale=settings.OCR_GRAYSCALE,
+            binarize=settings.OCR_BINARIZE,
+            deskew=settings.OCR_DESKEW,
+            crop=settings.OCR_CROP
+        )
+    )
+
+
+async def main_async(args: argparse.Namespace) -> int:
+    engine = create_database_engine(args.database_url)
+    session_factory = create_session_factory(engine)
+    concurrency = args.concurrency or args.workers * 2
+    ocr_service = _create_ocr_service(args.workers, concurrency)
+    archive = None
+    try:
+        async with unit_of_work(session_factory):
+            identity = await identity_cache.resolve(None, args.telegram_id)
+        if identity is None or identity.team_id is None:
+            print(f"User {args.telegram_id} not found or not in a team",
+                  file=sys.stderr)
+            return 1
+
+        if args.source.is_dir():
+            files = list(iter_directory(args.source))
+        else:
+            archive = zipfile.ZipFile(args.source)
+            files = list(iter_zip(archive))
+
+        checkpoint = Checkpoint(
+            args.checkpoint
+            or args.source.with_name(args.source.name + '.checkpoint')
+        )
+        pending = [file for file in files
+                   if not checkpoint.is_done(file, args.retry_failed)]
+        print(f"{len(files)} receipt files, {len(pending)} to import "
+              f"(checkpoint {checkpoint.path})", file=sys.stderr)
+
+        ocr_cache = None
+        if settings.OCR_CACHE_ENABLED:
+            ocr_cache = OCRResultCache(
+                cache_dir=settings.OCR_CACHE_DIR,
+                max_memory_items=settings.OCR_CACHE_MEMORY_ITEMS,
+                max_disk_bytes=settings.OCR_CACHE_MAX_BYTES
+            )
+        # Always content addressed: flat storage names files by basename,
+        # so same-named files from different folders would overwrite each
+        # other and the second would pass as a duplicate
+        processor = ReceiptProcessor(
+            file_storage=ContentAddressedStorage(settings.UPLOAD_DIR),
+            ocr_service=ocr_service,
+            ocr_cache=ocr_cache
+        )
+        importer = ReceiptImporter(
+            session_factory,
+            processor,
+            checkpoint,
+            team_id=identity.team_id,
+            user_id=identity.user_id,
+            concurrency=concurrency,
+            batch_size=args.batch_size,
+            persist_paths=settings.FILE_STORAGE_BACKEND == 'flat'
+        )
+        try:
+            await importer.run(pending)
+        finally:
+            print(importer.summary(skipped=len(files) - len(pending)))
+        return 0
+    finally:
+        if archive is not None:
+            archive.close()
+        ocr_service.pool.shutdown()
+        await engine.dispose()
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    arg_parser.add_argument('source', type=Path,
+                            help='directory or zip file with receipts')
+    arg_parser.add_argument('--telegram-id', type=int, required=True,
+                            help='uploader; receipts go to their team')
+    arg_parser.add_argument('--workers', type=int,
+                            default=os.cpu_count() or 2,
+                            help='OCR worker processes')
+    arg_parser.add_argument('--concurrency', type=int,
+                            help='files in flight; twice the workers by '
+                                 'default')
+    arg_parser.add_argument('--batch-size', type=int, default=100,
+                            help='receipts per bulk insert')
+    arg_parser.add_argument('--checkpoint', type=Path,
+                            help='defaults to <source>.checkpoint')
+    arg_parser.add_argument('--retry-failed', action='store_true',
+                            help='try files that failed before again')
+    arg_parser.add_argument('--database-url',
+                            help='defaults to DATABASE_URL')
+    args = arg_parser.parse_args()
+
+    if not args.source.exists():
+        sys.exit(f"{args.source} does not exist")
+    try:
+        sys.exit(asyncio.run(main_async(args)))
+    except KeyboardInterrupt:
+        sys.exit("Interrupted; run the same command again to resume")
+
+
+if __name__ == '__main__':
+    main()
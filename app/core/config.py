@@ -1,6 +1,6 @@
 # app/core/config.py
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional
 
 from pydantic_settings import BaseSettings
 
@@ -12,14 +12,84 @@ class Settings(BaseSettings):
     # Database settings
     DATABASE_URL: str = "sqlite+aiosqlite:///./app.db"
     DB_ECHO: bool = False
+    # sqlite-dev, postgres-small or postgres-large; empty picks by database
+    DB_POOL_PROFILE: str = ""
+    # Override single fields of the pool profile
+    DB_POOL_SIZE: Optional[int] = None
+    DB_MAX_OVERFLOW: Optional[int] = None
+    DB_POOL_TIMEOUT: Optional[float] = None  # seconds
+    DB_POOL_RECYCLE: Optional[int] = None  # seconds
+    # asyncpg prepared statements cached per connection; 0 behind pgbouncer
+    # in transaction pooling mode
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    # SQLite files: WAL with the pragmas below, and one writer at a time
+    SQLITE_WAL: bool = True
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_MMAP_SIZE: int = 256 * 1024 * 1024  # 256MB
+    SQLITE_BUSY_TIMEOUT: int = 5000  # ms
+    SQLITE_SINGLE_WRITER: bool = True
 
     # File upload settings
     UPLOAD_DIR: Path = Path("uploads")
     MAX_FILE_SIZE: int = 20 * 1024 * 1024  # 20MB
+    # "content_addressed" (deduplicated, sharded by hash) or "flat"
+    FILE_STORAGE_BACKEND: str = "content_addressed"
 
     # OCR settings
     OCR_ENABLED: bool = True
     TESSERACT_CMD: Optional[str] = None
+    # "auto" picks rus, eng or rus+eng per document
+    OCR_LANG: str = "auto"
+    # Share of auto-detected documents also OCR'd with rus+eng to verify
+    OCR_LANG_VERIFY_RATE: float = 0.05
+    OCR_PDF_DPI: int = 300  # rendering DPI for scanned PDF pages
+    OCR_WORKERS: int = 2
+    # Image preprocessing stages run before Tesseract
+    OCR_FIX_ORIENTATION: bool = True
+    OCR_DOWNSCALE: bool = True
+    OCR_TARGET_TEXT_HEIGHT: int = 32  # px
+    OCR_GRAYSCALE: bool = True
+    OCR_BINARIZE: bool = True
+    OCR_DESKEW: bool = True
+    OCR_CROP: bool = True
+    OCR_MAX_QUEUE: int = 8
+    OCR_CACHE_ENABLED: bool = True
+    OCR_CACHE_DIR: Path = Path("cache/ocr")
+    OCR_CACHE_MEMORY_ITEMS: int = 256
+    OCR_CACHE_MAX_BYTES: int = 100 * 1024 * 1024  # 100MB
+
+    # Telegram id -> user/team/admin cache
+    IDENTITY_CACHE_SIZE: int = 10_000
+    IDENTITY_CACHE_TTL: float = 300.0  # seconds
+
+    # Group commit: receipts of ingestion jobs finishing within the window
+    # share a transaction; inserts inside a unit of work are not batched
+    RECEIPT_BATCH_ENABLED: bool = True
+    RECEIPT_BATCH_WINDOW: float = 0.02  # seconds
+    RECEIPT_BATCH_MAX: int = 100
+
+    # Spreadsheet exports are written here, sent and then removed
+    EXPORT_DIR: Path = Path("exports")
+    EXPORT_BATCH_SIZE: int = 1000  # rows fetched per round trip
+    # Largest document a bot may send through the Bot API
+    TELEGRAM_UPLOAD_LIMIT: int = 50 * 1024 * 1024  # 50MB
+
+    # Background ingestion settings
+    INGESTION_WORKERS: int = 2
+    # Files of one user (e.g. an album) downloaded and OCR'd at once
+    INGESTION_USER_CONCURRENCY: int = 3
+    INGESTION_MAX_ATTEMPTS: int = 5
+    # Retry delays double per attempt, starting at the base (seconds)
+    INGESTION_RETRY_BASE_DELAY: float = 5.0
+    INGESTION_RETRY_MAX_DELAY: float = 300.0
+
+    # Metrics settings
+    METRICS_ENABLED: bool = True
+    # Keep the endpoint local; put a proxy in front to expose it
+    METRICS_HOST: str = "127.0.0.1"
+    METRICS_PORT: int = 9100
+    # Telegram ids allowed to use /stats, e.g. [123456789]
+    ADMIN_TELEGRAM_IDS: List[int] = []
 
     # Receipt settings
     MAX_RECEIPTS_PER_PAGE: int = 5
@@ -1,26 +1,217 @@
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.orm import sessionmaker
-from contextlib import asynccontextmanager
-from app.core.config import Settings as settings
-
-engine = create_async_engine(
-    settings.DATABASE_URL,
-    echo=settings.DB_ECHO,
-    future=True
+# app/core/database.py
+"""The one place engines and session factories are built.
+
+``create_database_engine`` picks a connection pool profile for the
+database, normalises the URL to an async driver and wires the pool into
+the metrics registry. SQLite files are switched to WAL and get a single
+writer that serialises write transactions (see ``app.db.writer``).
+"""
+from collections import Counter
+from dataclasses import dataclass, replace
+from typing import Optional, Type
+from weakref import WeakKeyDictionary, WeakSet
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.engine.url import URL
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine, async_sessionmaker, create_async_engine
 )
+from sqlalchemy.pool import AsyncAdaptedQueuePool, StaticPool
 
-async_session = sessionmaker(
-    engine, class_=AsyncSession,
-    expire_on_commit=False
+from app.core.config import settings
+from app.core.metrics import (
+    DB_POOL_CHECKOUTS, DB_POOL_CONNECTIONS, DB_POOL_TIMEOUTS,
+    DB_POOL_WAIT_SECONDS
 )
+from app.db.writer import SingleWriter
+
+
+@dataclass(frozen=True)
+class PoolProfile:
+    pool_size: int
+    max_overflow: int
+    pool_timeout: float  # seconds to wait for a free connection
+    pool_recycle: int  # seconds; -1 keeps connections forever
+    pool_pre_ping: bool
+
+
+POOL_PROFILES = {
+    # One local file: few connections, nothing to go stale
+    'sqlite-dev': PoolProfile(
+        pool_size=5, max_overflow=0, pool_timeout=30,
+        pool_recycle=-1, pool_pre_ping=False
+    ),
+    # A single bot process against a small managed Postgres
+    'postgres-small': PoolProfile(
+        pool_size=5, max_overflow=5, pool_timeout=10,
+        pool_recycle=1800, pool_pre_ping=True
+    ),
+    # Busy deployments; keep size + overflow under max_connections
+    'postgres-large': PoolProfile(
+        pool_size=20, max_overflow=20, pool_timeout=10,
+        pool_recycle=1800, pool_pre_ping=True
+    ),
+}
+
+_ASYNC_DRIVERS = {
+    'postgres': 'postgresql+asyncpg',
+    'postgresql': 'postgresql+asyncpg',
+    'postgresql+psycopg2': 'postgresql+asyncpg',
+    'sqlite': 'sqlite+aiosqlite',
+    'sqlite+pysqlite': 'sqlite+aiosqlite',
+}
+
+# Live engines, summed per profile by the connections gauge
+_engines: 'WeakSet[Engine]' = WeakSet()
+# Engines whose write transactions go through a single writer
+_writers: 'WeakKeyDictionary[Engine, SingleWriter]' = WeakKeyDictionary()
+
 
+class MeteredPool(AsyncAdaptedQueuePool):
+    """Queue pool that records checkouts, waits and timeouts."""
+    profile = 'custom'
+    # Log as the pool it extends, under the sqlalchemy logger, rather
+    # than as app.core.database.MeteredPool
+    _sqla_logger_namespace = 'sqlalchemy.pool.impl.AsyncAdaptedQueuePool'
 
-@asynccontextmanager
-async def get_session():
-    async with async_session() as session:
+    def connect(self):
+        DB_POOL_CHECKOUTS.inc(profile=self.profile)
         try:
-            yield session
-            await session.commit()
-        except Exception:
-            await session.rollback()
-            raise
\ No newline at end of file
+            with DB_POOL_WAIT_SECONDS.time(profile=self.profile):
+                return super().connect()
+        except exc.TimeoutError:
+            DB_POOL_TIMEOUTS.inc(profile=self.profile)
+            raise
+
+
+def _metered_pool(profile: str) -> Type[MeteredPool]:
+    # A subclass per profile, so the label survives pool.recreate()
+    return type('MeteredPool', (MeteredPool,), {'profile': profile})
+
+
+def _pool_connections():
+    values = Counter()
+    for engine in list(_engines):
+        pool = engine.pool
+        if isinstance(pool, MeteredPool):
+            values[(pool.profile, 'checked_out')] += pool.checkedout()
+            values[(pool.profile, 'idle')] += pool.checkedin()
+    return dict(values)
+
+
+DB_POOL_CONNECTIONS.set_function(_pool_connections)
+
+
+def normalize_database_url(database_url: str) -> URL:
+    """Switch sync drivers to their async counterparts.
+
+    ``postgres://`` and ``postgresql://`` (as handed out by most hosting
+    providers) become ``postgresql+asyncpg://``.
+    """
+    url = make_url(database_url)
+    drivername = _ASYNC_DRIVERS.get(url.drivername, url.drivername)
+    return url.set(drivername=drivername)
+
+
+def default_pool_profile(url: URL) -> str:
+    if url.get_backend_name() == 'sqlite':
+        return 'sqlite-dev'
+    return 'postgres-small'
+
+
+def _is_memory_sqlite(url: URL) -> bool:
+    return url.get_backend_name() == 'sqlite' and url.database in (
+        None, '', ':memory:')
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    cursor = dbapi_connection.cursor()
+    try:
+        # Readers no longer block the writer nor the other way round
+        cursor.execute("PRAGMA journal_mode=WAL")
+        # Safe with WAL; only a power loss can drop the last commits
+        cursor.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}")
+        cursor.execute(
+            f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT)}")
+    finally:
+        cursor.close()
+
+
+def create_database_engine(
+        database_url: Optional[str] = None,
+        profile: Optional[str] = None,
+        echo: Optional[bool] = None,
+        sqlite_wal: Optional[bool] = None,
+        single_writer: Optional[bool] = None,
+        **overrides
+) -> AsyncEngine:
+    """Create an async engine with a pooling profile.
+
+    Arguments default to the settings; ``overrides`` replace single
+    ``PoolProfile`` fields. For asyncpg the prepared statement cache size
+    comes from ``DB_STATEMENT_CACHE_SIZE`` unless the URL sets it. For
+    SQLite files ``sqlite_wal`` sets the WAL pragmas on every connection
+    and ``single_writer`` queues write transactions in units of work.
+    """
+    url = normalize_database_url(database_url or settings.DATABASE_URL)
+    profile = (profile or settings.DB_POOL_PROFILE
+               or default_pool_profile(url))
+    if profile not in POOL_PROFILES:
+        raise ValueError(
+            f"Unknown pool profile {profile!r}, "
+            f"expected one of {', '.join(POOL_PROFILES)}"
+        )
+    echo = settings.DB_ECHO if echo is None else echo
+
+    if (url.get_dialect().driver == 'asyncpg'
+            and 'prepared_statement_cache_size' not in url.query):
+        url = url.update_query_dict({
+            'prepared_statement_cache_size':
+                str(settings.DB_STATEMENT_CACHE_SIZE)
+        })
+
+    if _is_memory_sqlite(url):
+        # Every connection would get its own empty database
+        return create_async_engine(url, echo=echo, poolclass=StaticPool)
+
+    setting_overrides = {
+        field: value for field, value in (
+            ('pool_size', settings.DB_POOL_SIZE),
+            ('max_overflow', settings.DB_MAX_OVERFLOW),
+            ('pool_timeout', settings.DB_POOL_TIMEOUT),
+            ('pool_recycle', settings.DB_POOL_RECYCLE),
+        ) if value is not None
+    }
+    pool = replace(POOL_PROFILES[profile],
+                   **{**setting_overrides, **overrides})
+    engine = create_async_engine(
+        url,
+        echo=echo,
+        poolclass=_metered_pool(profile),
+        pool_size=pool.pool_size,
+        max_overflow=pool.max_overflow,
+        pool_timeout=pool.pool_timeout,
+        pool_recycle=pool.pool_recycle,
+        pool_pre_ping=pool.pool_pre_ping
+    )
+    _engines.add(engine.sync_engine)
+
+    if url.get_backend_name() == 'sqlite':
+        if settings.SQLITE_WAL if sqlite_wal is None else sqlite_wal:
+            event.listen(engine.sync_engine, 'connect', _set_sqlite_pragmas)
+        if (settings.SQLITE_SINGLE_WRITER if single_writer is None
+                else single_writer):
+            _writers[engine.sync_engine] = SingleWriter()
+    return engine
+
+
+def create_session_factory(engine: AsyncEngine) -> async_sessionmaker:
+    writer = _writers.get(engine.sync_engine)
+    # Objects stay usable after the unit of work has committed
+    return async_sessionmaker(
+        engine,
+        expire_on_commit=False,
+        info={'writer': writer} if writer is not None else None
+    )
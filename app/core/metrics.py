@@ -0,0 +1,380 @@
+# app/core/metrics.py
+"""In-process metrics rendered in the Prometheus text format.
+
+Counters, gauges and latency histograms live in a single registry and are
+served by a small aiohttp endpoint (see ``start_metrics_server``) and
+summarised by the admin ``/stats`` command.
+"""
+import bisect
+import math
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from aiohttp import web
+
+from app.core.logging import logger
+
+LabelValues = Tuple[str, ...]
+
+# Seconds; covers everything from a repository query to a slow OCR job
+DEFAULT_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 30.0, 60.0
+)
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return (value.replace('\\', '\\\\')
+            .replace('\n', '\\n')
+            .replace('"', '\\"'))
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ''
+    pairs = ','.join(
+        f'{name}="{_escape(str(value))}"'
+        for name, value in zip(names, values)
+    )
+    return '{' + pairs + '}'
+
+
+class _Metric:
+    type = ''
+
+    def __init__(self, name: str, documentation: str,
+                 labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(
+                f"{self.name} expects labels {self.labelnames}, "
+                f"got {tuple(labels)}"
+            )
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> Iterator[Tuple[str, str, float]]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type}",
+        ]
+        lines.extend(
+            f"{name}{labels} {_format_value(value)}"
+            for name, labels, value in self.samples()
+        )
+        return lines
+
+
+class Counter(_Metric):
+    type = 'counter'
+
+    def __init__(self, name: str, documentation: str,
+                 labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def values(self) -> Dict[LabelValues, float]:
+        return dict(self._values)
+
+    def samples(self) -> Iterator[Tuple[str, str, float]]:
+        for key, value in sorted(self._values.items()):
+            yield self.name, _format_labels(self.labelnames, key), value
+
+
+class Gauge(_Metric):
+    """A value that goes up and down.
+
+    Either set explicitly or read on every scrape from ``set_function``,
+    which returns a single value or a mapping of label values to values.
+    """
+    type = 'gauge'
+
+    def __init__(self, name: str, documentation: str,
+                 labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._function: Optional[Callable[[], object]] = None
+
+    def set(self, value: float, **labels: str) -> None:
+        self._values[self._key(labels)] = value
+
+    def set_function(self, function: Callable[[], object]) -> None:
+        self._function = function
+
+    def values(self) -> Dict[LabelValues, float]:
+        if self._function is None:
+            return dict(self._values)
+        value = self._function()
+        if isinstance(value, dict):
+            return {
+                key if isinstance(key, tuple) else (str(key),): float(v)
+                for key, v in value.items()
+            }
+        return {(): float(value)}
+
+    def samples(self) -> Iterator[Tuple[str, str, float]]:
+        for key, value in sorted(self.values().items()):
+            yield self.name, _format_labels(self.labelnames, key), value
+
+
+class _HistogramSeries:
+    __slots__ = ('buckets', 'count', 'sum')
+
+    def __init__(self, size: int):
+        self.buckets = [0] * size
+        self.count = 0
+        self.sum = 0.0
+
+
+class Histogram(_Metric):
+    type = 'histogram'
+
+    def __init__(self, name: str, documentation: str,
+                 labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.bounds = tuple(sorted(buckets)) + (math.inf,)
+        self._series: Dict[LabelValues, _HistogramSeries] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = _HistogramSeries(len(self.bounds))
+        series.buckets[bisect.bisect_left(self.bounds, value)] += 1
+        series.count += 1
+        series.sum += value
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        """Observe the duration of the ``with`` block, even if it raises."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def quantile(self, q: float, **labels: str) -> float:
+        """Estimate a quantile by interpolating inside its bucket."""
+        series = self._series.get(self._key(labels))
+        if series is None or not series.count:
+            return math.nan
+        rank = q * series.count
+        seen = 0
+        lower = 0.0
+        for bound, count in zip(self.bounds, series.buckets):
+            if count and seen + count >= rank:
+                if math.isinf(bound):
+                    return lower
+                return lower + (bound - lower) * (rank - seen) / count
+            seen += count
+            lower = bound
+        return lower
+
+    def summary(self) -> Dict[LabelValues, Dict[str, float]]:
+        """Count, mean and estimated p50/p95 per label set."""
+        result = {}
+        for key, series in sorted(self._series.items()):
+            labels = dict(zip(self.labelnames, key))
+            result[key] = {
+                'count': series.count,
+                'mean': series.sum / series.count if series.count else 0.0,
+                'p50': self.quantile(0.5, **labels),
+                'p95': self.quantile(0.95, **labels),
+            }
+        return result
+
+    def samples(self) -> Iterator[Tuple[str, str, float]]:
+        names = self.labelnames + ('le',)
+        for key, series in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.bounds, series.buckets):
+                cumulative += count
+                yield (f"{self.name}_bucket",
+                       _format_labels(names, key + (_format_value(bound),)),
+                       cumulative)
+            labels = _format_labels(self.labelnames, key)
+            yield f"{self.name}_sum", labels, series.sum
+            yield f"{self.name}_count", labels, series.count
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str,
+                labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str,
+              labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str,
+                  labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(
+            Histogram(name, documentation, labelnames, buckets))
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            try:
+                lines.extend(metric.render())
+            except Exception as e:
+                # A failing gauge callback must not break the whole scrape
+                logger.error(f"Failed to collect metric {metric.name}: {e}")
+        return '\n'.join(lines) + '\n'
+
+
+metrics = MetricsRegistry()
+
+RECEIPT_STAGE_SECONDS = metrics.histogram(
+    'receipt_stage_seconds',
+    'Time spent in each stage of receipt processing',
+    ['stage']
+)
+RECEIPTS_PROCESSED = metrics.counter(
+    'receipts_processed_total',
+    'Processed receipt uploads by outcome',
+    ['outcome']
+)
+OCR_WORKER_STAGE_SECONDS = metrics.histogram(
+    'ocr_worker_stage_seconds',
+    'Time spent in preprocessing and Tesseract stages inside OCR workers',
+    ['stage']
+)
+HANDLER_SECONDS = metrics.histogram(
+    'bot_handler_seconds',
+    'Bot handler execution time',
+    ['handler']
+)
+HANDLER_ERRORS = metrics.counter(
+    'bot_handler_errors_total',
+    'Bot handlers that raised an exception',
+    ['handler']
+)
+DB_QUERY_SECONDS = metrics.histogram(
+    'db_query_seconds',
+    'Repository query time',
+    ['repository', 'statement']
+)
+DB_POOL_WAIT_SECONDS = metrics.histogram(
+    'db_pool_wait_seconds',
+    'Time to get a connection from the pool, including connecting',
+    ['profile']
+)
+DB_POOL_CHECKOUTS = metrics.counter(
+    'db_pool_checkouts_total',
+    'Connections requested from the pool',
+    ['profile']
+)
+DB_POOL_TIMEOUTS = metrics.counter(
+    'db_pool_timeouts_total',
+    'Connection requests that timed out waiting for the pool',
+    ['profile']
+)
+DB_POOL_CONNECTIONS = metrics.gauge(
+    'db_pool_connections',
+    'Pooled connections by state',
+    ['profile', 'state']
+)
+DB_WRITER_WAIT_SECONDS = metrics.histogram(
+    'db_writer_wait_seconds',
+    'Time units of work waited for the single SQLite writer turn'
+)
+DB_WRITER_HELD_SECONDS = metrics.histogram(
+    'db_writer_held_seconds',
+    'Time units of work held the single SQLite writer turn'
+)
+RECEIPT_INSERT_BATCH_SIZE = metrics.histogram(
+    'receipt_insert_batch_size',
+    'Receipts written per group commit',
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500)
+)
+EXPORT_SECONDS = metrics.histogram(
+    'export_seconds',
+    'Time to write a receipt export file',
+    ['format']
+)
+OCR_QUEUE = metrics.gauge(
+    'ocr_jobs',
+    'OCR jobs running in workers or waiting for one',
+    ['state']
+)
+OCR_CACHE_LOOKUPS = metrics.counter(
+    'ocr_cache_lookups_total',
+    'OCR result cache lookups by result',
+    ['result']
+)
+OCR_LANGUAGE = metrics.counter(
+    'ocr_language_total',
+    'Documents by detected Tesseract language model',
+    ['lang']
+)
+OCR_LANGUAGE_SINGLE_RATE = metrics.gauge(
+    'ocr_language_single_rate',
+    'Share of auto-detected documents OCR\'d with a single language model'
+)
+OCR_LANGUAGE_MATCH_RATE = metrics.gauge(
+    'ocr_language_match_rate',
+    'Share of verified documents whose fields matched the rus+eng result'
+)
+IDENTITY_CACHE_LOOKUPS = metrics.counter(
+    'identity_cache_lookups_total',
+    'Telegram id to user/team cache lookups by result',
+    ['result']
+)
+INGESTION_JOBS = metrics.counter(
+    'ingestion_jobs_total',
+    'Background ingestion job events',
+    ['event']
+)
+INGESTION_QUEUE = metrics.gauge(
+    'ingestion_jobs_queued',
+    'Ingestion jobs waiting for a background worker'
+)
+
+
+async def _handle_metrics(request: web.Request) -> web.Response:
+    return web.Response(
+        body=metrics.render().encode('utf-8'),
+        headers={'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+    )
+
+
+async def start_metrics_server(host: str, port: int) -> web.AppRunner:
+    """Serve ``/metrics`` in the background; clean up the returned runner."""
+    app = web.Application()
+    app.router.add_get('/metrics', _handle_metrics)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    logger.info(f"Metrics available at http://{host}:{port}/metrics")
+    return runner
@@ -0,0 +1,174 @@
+# app/db/unit_of_work.py
+"""One database transaction per unit of work (a bot update, a job step).
+
+Repositories created without an explicit session use the session of the
+unit of work active in the current task, so services can be built once at
+startup and shared. The session is only opened when a repository first
+needs it and is committed once when the unit of work ends.
+
+On databases with a single writer (SQLite) the unit of work also holds
+the writer turn from its first write until it commits or rolls back.
+"""
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, Callable, List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.metrics import DB_QUERY_SECONDS
+from app.db.writer import WriterTurn
+
+_current: ContextVar[Optional['UnitOfWork']] = ContextVar(
+    'unit_of_work', default=None
+)
+
+
+class UnitOfWork:
+    def __init__(self, session_factory: async_sessionmaker):
+        self.session_factory = session_factory
+        self._session: Optional[AsyncSession] = None
+        self._turn: Optional[WriterTurn] = None
+        # Whether a repository has written since the last commit
+        self._writing = False
+        self._on_commit: List[Callable[[], None]] = []
+
+    @property
+    def started(self) -> bool:
+        """Whether anything has used the session yet."""
+        return self._session is not None
+
+    @property
+    def has_writes(self) -> bool:
+        """Whether there are writes the next commit would persist."""
+        session = self._session
+        return self._writing or (session is not None and bool(
+            session.new or session.dirty or session.deleted))
+
+    @property
+    def session(self) -> AsyncSession:
+        if self._session is None:
+            self._session = self.session_factory()
+        return self._session
+
+    async def begin_write(self) -> None:
+        """Wait for the writer turn, if the database has one.
+
+        Repositories call this before their first write; it returns at
+        once when the turn is already held.
+        """
+        self._writing = True
+        if self._turn is not None:
+            return
+        writer = self.session.info.get('writer')
+        if writer is not None:
+            self._turn = await writer.acquire()
+
+    def on_commit(self, callback: Callable[[], None]) -> None:
+        """Call ``callback`` once the next commit has succeeded.
+
+        For in-process state that must not run ahead of the database,
+        e.g. caches. Dropped if the unit of work rolls back instead.
+        """
+        self._on_commit.append(callback)
+
+    def _release_turn(self) -> None:
+        if self._turn is not None:
+            self._turn.release()
+            self._turn = None
+
+    async def commit(self) -> None:
+        session = self._session
+        if session is not None:
+            if session.new or session.dirty or session.deleted:
+                # Changed objects are flushed by the commit itself
+                await self.begin_write()
+            try:
+                with DB_QUERY_SECONDS.time(repository='UnitOfWork',
+                                           statement='commit'):
+                    await session.commit()
+            finally:
+                self._release_turn()
+        self._writing = False
+        callbacks, self._on_commit = self._on_commit, []
+        for callback in callbacks:
+            callback()
+
+    async def rollback(self) -> None:
+        self._writing = False
+        self._on_commit.clear()
+        try:
+            if self._session is not None:
+                await self._session.rollback()
+        finally:
+            self._release_turn()
+
+    async def close(self) -> None:
+        self._release_turn()
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+@asynccontextmanager
+async def unit_of_work(
+        session_factory: async_sessionmaker,
+        join: bool = True
+) -> AsyncIterator[UnitOfWork]:
+    """Run the block in a unit of work, committing once at the end.
+
+    Rolls back if the block raises. With ``join`` a unit of work that is
+    already active is reused and left for its owner to commit; pass
+    ``join=False`` for work that must commit on its own, e.g. before
+    handing a row over to another task. An enclosing unit of work must
+    not have uncommitted writes then, or the two could wait on each
+    other's locks: its owner has to commit it first.
+    """
+    outer = _current.get()
+    if join and outer is not None:
+        yield outer
+        return
+    if outer is not None and outer.has_writes:
+        raise RuntimeError(
+            "The enclosing unit of work has uncommitted writes; commit "
+            "it before starting an independent one"
+        )
+
+    uow = UnitOfWork(session_factory)
+    token = _current.set(uow)
+    try:
+        yield uow
+        await uow.commit()
+    except BaseException:
+        await uow.rollback()
+        raise
+    finally:
+        _current.reset(token)
+        await uow.close()
+
+
+def current_unit_of_work() -> Optional[UnitOfWork]:
+    return _current.get()
+
+
+def on_commit(callback: Callable[[], None]) -> None:
+    """Run ``callback`` after the active unit of work commits.
+
+    Without a unit of work the caller owns the transaction, and the
+    callback runs at once.
+    """
+    uow = _current.get()
+    if uow is None:
+        callback()
+    else:
+        uow.on_commit(callback)
+
+
+def current_session() -> AsyncSession:
+    """Session of the active unit of work."""
+    uow = _current.get()
+    if uow is None:
+        raise RuntimeError(
+            "No unit of work is active; wrap the call in unit_of_work() "
+            "or give the repository a session"
+        )
+    return uow.session
@@ -0,0 +1,76 @@
+# app/db/writer.py
+import asyncio
+import time
+from typing import Optional
+
+from app.core.metrics import DB_WRITER_HELD_SECONDS, DB_WRITER_WAIT_SECONDS
+
+
+class WriterTurn:
+    """The right to write, held until ``release`` is called."""
+
+    def __init__(self, done: asyncio.Future):
+        self._done = done
+        self._granted_at = time.perf_counter()
+
+    def release(self) -> None:
+        if not self._done.done():
+            self._done.set_result(None)
+            DB_WRITER_HELD_SECONDS.observe(
+                time.perf_counter() - self._granted_at)
+
+
+class SingleWriter:
+    """Serialises write transactions on a database with one writer.
+
+    SQLite allows a single write transaction at a time; letting
+    connections race for it ends in "database is locked". Units of work
+    ask for a turn before their first write instead. A dedicated task
+    hands turns out in FIFO order and waits for each holder to commit or
+    roll back before granting the next one. Reads never queue.
+    """
+
+    def __init__(self):
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def waiting(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def acquire(self) -> WriterTurn:
+        self._ensure_started()
+        granted = asyncio.get_running_loop().create_future()
+        done = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((granted, done))
+        with DB_WRITER_WAIT_SECONDS.time():
+            try:
+                await granted
+            except asyncio.CancelledError:
+                # Give the turn back if it was granted meanwhile
+                done.cancel()
+                raise
+        return WriterTurn(done)
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+            self._queue = None
+
+    def _ensure_started(self) -> None:
+        loop = asyncio.get_running_loop()
+        if (self._task is not None and not self._task.done()
+                and self._task.get_loop() is loop):
+            return
+        self._queue = asyncio.Queue()
+        self._task = loop.create_task(self._run())
+
+    async def _run(self) -> None:
+        while True:
+            granted, done = await self._queue.get()
+            if granted.cancelled():
+                continue
+            granted.set_result(None)
+            await asyncio.wait([done])
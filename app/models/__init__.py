@@ -2,5 +2,9 @@ from app.models.base import Base
 from app.models.user import User
 from app.models.team import Team, TeamMember
 from app.models.receipt import Receipt
+from app.models.telegram_file import TelegramFile
+from app.models.ingestion_job import IngestionJob
+from app.models.receipt_rollup import ReceiptDailyRollup
 
-__all__ = ['Base', 'User', 'Team', 'Receipt', 'TeamMember']
+__all__ = ['Base', 'User', 'Team', 'Receipt', 'TeamMember',
+           'TelegramFile', 'IngestionJob', 'ReceiptDailyRollup']
@@ -0,0 +1,48 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, BigInteger, String, Text, DateTime
+from app.models.base import Base
+
+
+class IngestionJob(Base):
+    """An accepted upload waiting to be (or being) processed.
+
+    ``files`` is a JSON list of ``{"file_id", "file_unique_id"}`` entries and
+    ``result`` a JSON list, aligned with it, of per-file outcomes so that a
+    retried job skips files that are already done.
+    """
+    __tablename__ = 'ingestion_jobs'
+
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+
+    id = Column(Integer, primary_key=True)
+    telegram_id = Column(BigInteger, nullable=False)
+    chat_id = Column(BigInteger, nullable=False)
+    # The "received, processing" reply that is edited with the result
+    status_message_id = Column(BigInteger, nullable=True)
+    status = Column(String, nullable=False, default=PENDING, index=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    files = Column(Text, nullable=False)
+    result = Column(Text, nullable=True)
+    error = Column(Text, nullable=True)
+    next_attempt_at = Column(DateTime, nullable=True)
+    created_at = Column(
+        DateTime,
+        default=datetime.utcnow
+    )
+    updated_at = Column(
+        DateTime,
+        default=datetime.utcnow,
+        onupdate=datetime.utcnow
+    )
+
+    def __repr__(self):
+        return (
+            f"<IngestionJob("
+            f"id={self.id}, "
+            f"status={self.status}, "
+            f"attempts={self.attempts}"
+            f")>"
+        )
@@ -1,7 +1,7 @@
 from datetime import datetime
 from sqlalchemy import (
     Column, Integer, String, ForeignKey,
-    DateTime, Numeric
+    DateTime, Numeric, Index, Text, DDL, event
 )
 from sqlalchemy.orm import relationship
 from app.models.base import Base
@@ -9,6 +9,10 @@ from app.models.base import Base
 
 class Receipt(Base):
     __tablename__ = 'receipts'
+    __table_args__ = (
+        # Serves period listings and keyset pagination on (date, id)
+        Index('ix_receipts_team_date_id', 'team_id', 'date', 'id'),
+    )
 
     id = Column(Integer, primary_key=True)
     team_id = Column(Integer, ForeignKey('teams.id'))
@@ -27,6 +31,10 @@ class Receipt(Base):
     notes = Column(String, nullable=True)
     organization = Column(String, nullable=True)
     fee = Column(Numeric(10, 2), nullable=True)
+    # Tesseract language model used, None when no OCR was needed
+    ocr_lang = Column(String, nullable=True)
+    # Full OCR text; searchable with the parties and operation number
+    raw_text = Column(Text, nullable=True)
 
     # Relationships
     team = relationship("Team", back_populates="receipts")
@@ -39,4 +47,65 @@ class Receipt(Base):
             f"amount={self.amount}, "
             f"operation_number={self.operation_number}"
             f")>"
-        )
\ No newline at end of file
+        )
+
+
+# Full-text index over SEARCH_COLUMNS, for create_all() through the
+# listeners below. Migration 6a1f0c8e2d57 keeps its own frozen copy; a
+# change here needs a new migration as well.
+#
+# SQLite: an FTS5 table with the receipts table as external content,
+# kept in step by triggers. Postgres: a generated tsvector column with a
+# GIN index, operation number weighted highest, then the parties.
+SEARCH_COLUMNS = ('raw_text', 'sender', 'receiver', 'organization',
+                  'operation_number')
+
+SQLITE_SEARCH_DDL = (
+    "CREATE VIRTUAL TABLE receipts_fts USING fts5("
+    "raw_text, sender, receiver, organization, operation_number, "
+    "content='receipts', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER receipts_fts_insert AFTER INSERT ON receipts BEGIN "
+    "INSERT INTO receipts_fts(rowid, raw_text, sender, receiver, "
+    "organization, operation_number) VALUES (new.id, new.raw_text, "
+    "new.sender, new.receiver, new.organization, new.operation_number); "
+    "END",
+    "CREATE TRIGGER receipts_fts_delete AFTER DELETE ON receipts BEGIN "
+    "INSERT INTO receipts_fts(receipts_fts, rowid, raw_text, sender, "
+    "receiver, organization, operation_number) VALUES ('delete', old.id, "
+    "old.raw_text, old.sender, old.receiver, old.organization, "
+    "old.operation_number); "
+    "END",
+    "CREATE TRIGGER receipts_fts_update AFTER UPDATE OF raw_text, sender, "
+    "receiver, organization, operation_number ON receipts BEGIN "
+    "INSERT INTO receipts_fts(receipts_fts, rowid, raw_text, sender, "
+    "receiver, organization, operation_number) VALUES ('delete', old.id, "
+    "old.raw_text, old.sender, old.receiver, old.organization, "
+    "old.operation_number); "
+    "INSERT INTO receipts_fts(rowid, raw_text, sender, receiver, "
+    "organization, operation_number) VALUES (new.id, new.raw_text, "
+    "new.sender, new.receiver, new.organization, new.operation_number); "
+    "END",
+)
+
+POSTGRES_SEARCH_DDL = (
+    "ALTER TABLE receipts ADD COLUMN search_vector tsvector "
+    "GENERATED ALWAYS AS ("
+    "setweight(to_tsvector('simple', coalesce(operation_number, '')), 'A')"
+    " || setweight(to_tsvector('simple', coalesce(sender, '') || ' ' || "
+    "coalesce(receiver, '') || ' ' || coalesce(organization, '')), 'B')"
+    " || setweight(to_tsvector('simple', coalesce(raw_text, '')), 'D')"
+    ") STORED",
+    "CREATE INDEX ix_receipts_search_vector ON receipts "
+    "USING gin (search_vector)",
+)
+
+for _statement in SQLITE_SEARCH_DDL:
+    event.listen(Receipt.__table__, 'after_create',
+                 DDL(_statement).execute_if(dialect='sqlite'))
+for _statement in POSTGRES_SEARCH_DDL:
+    event.listen(Receipt.__table__, 'after_create',
+                 DDL(_statement).execute_if(dialect='postgresql'))
+event.listen(Receipt.__table__, 'before_drop',
+             DDL("DROP TABLE IF EXISTS receipts_fts")
+             .execute_if(dialect='sqlite'))
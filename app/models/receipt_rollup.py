@@ -0,0 +1,27 @@
+from sqlalchemy import Column, Date, ForeignKey, Integer, Numeric, String
+from app.models.base import Base
+
+
+class ReceiptDailyRollup(Base):
+    """Receipt count and amount per team, day and status.
+
+    Maintained by ``ReceiptRepository`` in the same transaction as the
+    receipt changes, so period summaries never have to scan receipts.
+    """
+    __tablename__ = 'receipt_daily_rollups'
+
+    team_id = Column(Integer, ForeignKey('teams.id'), primary_key=True)
+    day = Column(Date, primary_key=True)
+    status = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+    amount = Column(Numeric(14, 2), nullable=False, default=0)
+
+    def __repr__(self):
+        return (
+            f"<ReceiptDailyRollup("
+            f"team_id={self.team_id}, "
+            f"day={self.day}, "
+            f"status={self.status}, "
+            f"count={self.count}"
+            f")>"
+        )
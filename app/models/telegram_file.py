@@ -0,0 +1,25 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, Text, DateTime
+from app.models.base import Base
+
+
+class TelegramFile(Base):
+    """A Telegram attachment that has already been stored and OCR'd."""
+    __tablename__ = 'telegram_files'
+
+    id = Column(Integer, primary_key=True)
+    file_unique_id = Column(String, unique=True, nullable=False, index=True)
+    file_path = Column(String, nullable=False)
+    parsed_data = Column(Text, nullable=False)
+    created_at = Column(
+        DateTime,
+        default=datetime.utcnow
+    )
+
+    def __repr__(self):
+        return (
+            f"<TelegramFile("
+            f"file_unique_id={self.file_unique_id}, "
+            f"file_path={self.file_path}"
+            f")>"
+        )
@@ -1,7 +1,6 @@
 from sqlalchemy import Column, Integer, String
 from sqlalchemy.orm import relationship
 from app.models.base import Base
-from app.models.team import TeamMember as team_members
 
 
 class User(Base):
@@ -12,10 +11,11 @@ class User(Base):
     username = Column(String)
 
     # Relationships
+    team_memberships = relationship("TeamMember", back_populates="user")
     teams = relationship(
         "Team",
-        secondary=team_members,
-        back_populates="members"
+        secondary="team_members",
+        viewonly=True
     )
 
     def __repr__(self):
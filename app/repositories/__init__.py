@@ -1,5 +1,11 @@
 from app.repositories.receipt import ReceiptRepository
 from app.repositories.team import TeamRepository
 from app.repositories.user import UserRepository
+from app.repositories.telegram_file import TelegramFileRepository
+from app.repositories.ingestion_job import IngestionJobRepository
+from app.repositories.receipt_rollup import ReceiptRollupRepository
+from app.repositories.receipt_batcher import ReceiptInsertBatcher
 
-__all__ = ['UserRepository', 'TeamRepository', 'ReceiptRepository']
+__all__ = ['UserRepository', 'TeamRepository', 'ReceiptRepository',
+           'TelegramFileRepository', 'IngestionJobRepository',
+           'ReceiptRollupRepository', 'ReceiptInsertBatcher']
@@ -1,32 +1,86 @@
 from typing import TypeVar, Type, Optional, List, Any, Dict
+from sqlalchemy.engine import Result
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Executable
 from sqlalchemy import select, update, delete
 
+from app.core.metrics import DB_QUERY_SECONDS
+from app.db.unit_of_work import current_session, current_unit_of_work
+
 ModelType = TypeVar("ModelType")
 
 
 class BaseRepository:
-    def __init__(self, session: AsyncSession, model: Type[ModelType]):
-        self.session = session
+    """Data access for one model.
+
+    Without an explicit ``session`` the repository works in the unit of
+    work active when a method is called. Writes are only flushed; the
+    owner of the session or unit of work commits.
+    """
+
+    def __init__(
+            self,
+            session: Optional[AsyncSession],
+            model: Type[ModelType]
+    ):
+        self._session = session
         self.model = model
 
+    @property
+    def session(self) -> AsyncSession:
+        if self._session is not None:
+            return self._session
+        return current_session()
+
+    async def _begin_write(self) -> None:
+        """Queue for the writer turn of the unit of work, if any."""
+        if self._session is None:
+            await current_unit_of_work().begin_write()
+
+    async def _execute(
+            self,
+            stmt: Executable,
+            params: Optional[List[Dict[str, Any]]] = None
+    ) -> Result:
+        """Execute ``stmt``, timed per repository and statement type.
+
+        ``params`` runs it once per parameter set, batched by the driver.
+        """
+        if getattr(stmt, 'is_dml', False):
+            await self._begin_write()
+        with DB_QUERY_SECONDS.time(repository=type(self).__name__,
+                                   statement=type(stmt).__name__.lower()):
+            return await self.session.execute(stmt, params)
+
+    async def _flush(self) -> None:
+        await self._begin_write()
+        with DB_QUERY_SECONDS.time(repository=type(self).__name__,
+                                   statement='flush'):
+            await self.session.flush()
+
     async def get_by_id(self, id: int) -> Optional[ModelType]:
         stmt = select(self.model).where(self.model.id == id)
-        result = await self.session.execute(stmt)
+        result = await self._execute(stmt)
         return result.scalars().first()
 
     async def get_all(self) -> List[ModelType]:
         stmt = select(self.model)
-        result = await self.session.execute(stmt)
+        result = await self._execute(stmt)
         return result.scalars().all()
 
     async def create(self, **kwargs) -> ModelType:
         instance = self.model(**kwargs)
         self.session.add(instance)
-        await self.session.commit()
-        await self.session.refresh(instance)
+        await self._flush()
         return instance
 
+    async def create_many(self, rows: List[Dict[str, Any]]) -> List[ModelType]:
+        """Insert all ``rows`` in a single flush."""
+        instances = [self.model(**row) for row in rows]
+        self.session.add_all(instances)
+        await self._flush()
+        return instances
+
     async def update(self, id: int, **kwargs) -> Optional[ModelType]:
         stmt = (
             update(self.model)
@@ -34,12 +88,10 @@ class BaseRepository:
             .values(**kwargs)
             .returning(self.model)
         )
-        result = await self.session.execute(stmt)
-        await self.session.commit()
+        result = await self._execute(stmt)
         return result.scalars().first()
 
     async def delete(self, id: int) -> bool:
         stmt = delete(self.model).where(self.model.id == id)
-        result = await self.session.execute(stmt)
-        await self.session.commit()
+        result = await self._execute(stmt)
         return result.rowcount > 0
\ No newline at end of file
@@ -0,0 +1,30 @@
+from typing import List
+from sqlalchemy import select, update
+from app.models.ingestion_job import IngestionJob
+from .base import BaseRepository
+
+
+class IngestionJobRepository(BaseRepository):
+    def __init__(self, session=None):
+        super().__init__(session, IngestionJob)
+
+    async def get_unfinished(self) -> List[IngestionJob]:
+        stmt = (
+            select(IngestionJob)
+            .where(IngestionJob.status.in_(
+                [IngestionJob.PENDING, IngestionJob.RUNNING]
+            ))
+            .order_by(IngestionJob.id)
+        )
+        result = await self._execute(stmt)
+        return result.scalars().all()
+
+    async def reset_running(self) -> int:
+        """Return jobs interrupted by a restart to the pending state."""
+        stmt = (
+            update(IngestionJob)
+            .where(IngestionJob.status == IngestionJob.RUNNING)
+            .values(status=IngestionJob.PENDING)
+        )
+        result = await self._execute(stmt)
+        return result.rowcount
@@ -1,13 +1,136 @@
+import re
 from datetime import datetime
-from typing import List, Optional
-from sqlalchemy import select, and_
+from decimal import Decimal
+from typing import (
+    Any, AsyncIterator, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+)
+from sqlalchemy import (
+    insert, select, update, and_, tuple_, func, literal_column, table, column
+)
+from sqlalchemy.engine import Row
+from app.core.metrics import DB_QUERY_SECONDS
 from app.models.receipt import Receipt
+from app.models.user import User
 from .base import BaseRepository
+from .receipt_rollup import ReceiptRollupRepository, RollupDeltas
+
+# Search terms; anything else in a query is ignored, which also keeps
+# FTS5 and tsquery syntax out of user input
+_SEARCH_TERM = re.compile(r'\w+')
+
+# bm25() weights of the receipts_fts columns: raw_text, sender, receiver,
+# organization, operation_number
+_FTS_WEIGHTS = (1.0, 4.0, 4.0, 4.0, 8.0)
+
+# Columns that decide which daily rollup a receipt is counted in
+_ROLLUP_COLUMNS = ('team_id', 'date', 'status', 'amount')
+
+
+def _add_deltas(
+        deltas: RollupDeltas,
+        rows: Iterable[Tuple[Any, ...]],
+        sign: int
+) -> RollupDeltas:
+    for team_id, date, status, amount in rows:
+        if team_id is None or date is None or status is None:
+            continue
+        key = (team_id, date.date(), status)
+        count, total = deltas.get(key, (0, Decimal(0)))
+        deltas[key] = (count + sign,
+                       total + sign * Decimal(str(amount or 0)))
+    return deltas
+
+
+def _rollup_row(receipt: Receipt) -> Tuple[Any, ...]:
+    return tuple(getattr(receipt, column) for column in _ROLLUP_COLUMNS)
 
 
 class ReceiptRepository(BaseRepository):
-    def __init__(self, session):
+    """Receipts plus their daily rollups, kept in step in one transaction."""
+
+    def __init__(self, session=None):
         super().__init__(session, Receipt)
+        self.rollups = ReceiptRollupRepository(session)
+
+    async def create(self, **kwargs) -> Receipt:
+        receipt = Receipt(**kwargs)
+        self.session.add(receipt)
+        await self.rollups.apply(_add_deltas({}, [_rollup_row(receipt)], 1))
+        await self._flush()
+        return receipt
+
+    async def create_many(self, rows: List[Dict[str, Any]]) -> List[Receipt]:
+        """Insert ``rows`` with one INSERT ... RETURNING, in input order."""
+        if not rows:
+            return []
+        stmt = insert(Receipt).returning(Receipt,
+                                         sort_by_parameter_order=True)
+        receipts = (await self._execute(stmt, rows)).scalars().all()
+        await self.rollups.apply(
+            _add_deltas({}, map(_rollup_row, receipts), 1))
+        return receipts
+
+    async def bulk_create(
+            self,
+            rows: List[Dict[str, Any]],
+            chunk_size: int = 1000
+    ) -> int:
+        """Insert ``rows`` without loading them back, for bulk imports.
+
+        Each chunk is one INSERT executed for all of its rows, batched by
+        the driver; returns the number of rows.
+        """
+        for start in range(0, len(rows), chunk_size):
+            chunk = rows[start:start + chunk_size]
+            await self._execute(insert(Receipt), chunk)
+            await self.rollups.apply(_add_deltas(
+                {},
+                (tuple(row.get(c) for c in _ROLLUP_COLUMNS) for row in chunk),
+                1
+            ))
+        return len(rows)
+
+    async def get_existing_file_paths(
+            self,
+            team_id: int,
+            file_paths: Iterable[str]
+    ) -> Set[str]:
+        """Which of ``file_paths`` already have a receipt in the team."""
+        stmt = select(Receipt.file_path).where(
+            and_(
+                Receipt.team_id == team_id,
+                Receipt.file_path.in_(list(file_paths))
+            )
+        )
+        result = await self._execute(stmt)
+        return set(result.scalars().all())
+
+    async def update(self, id: int, **kwargs) -> Optional[Receipt]:
+        if not set(kwargs) & set(_ROLLUP_COLUMNS):
+            return await super().update(id, **kwargs)
+
+        # Lock the row so concurrent updates move it between rollups once
+        await self._begin_write()
+        stmt = (
+            select(*(getattr(Receipt, c) for c in _ROLLUP_COLUMNS))
+            .where(Receipt.id == id)
+            .with_for_update()
+        )
+        before = (await self._execute(stmt)).first()
+        if before is None:
+            return None
+
+        stmt = (
+            update(Receipt)
+            .where(Receipt.id == id)
+            .values(**kwargs)
+            .returning(Receipt)
+        )
+        receipt = (await self._execute(stmt)).scalars().first()
+        deltas = _add_deltas({}, [tuple(before)], -1)
+        await self.rollups.apply(
+            _add_deltas(deltas, [_rollup_row(receipt)], 1))
+        return receipt
 
     async def get_team_receipts_in_period(
             self,
@@ -26,9 +149,143 @@ class ReceiptRepository(BaseRepository):
             )
             .order_by(Receipt.date)
         )
-        result = await self.session.execute(stmt)
+        result = await self._execute(stmt)
         return result.scalars().all()
 
+    async def stream_team_receipts_in_period(
+            self,
+            team_id: int,
+            start_date: datetime,
+            end_date: datetime,
+            batch_size: int = 1000
+    ) -> AsyncIterator[Sequence[Row]]:
+        """Yield the period's receipts in batches of rows, by (date, id).
+
+        Rows are read through a server-side cursor ``batch_size`` at a
+        time and are plain column tuples rather than ORM objects (plus the
+        uploader's ``username``), so memory does not grow with the period.
+        """
+        stmt = (
+            select(
+                Receipt.id, Receipt.date, Receipt.amount, Receipt.fee,
+                Receipt.status, Receipt.operation_number, Receipt.sender,
+                Receipt.receiver, Receipt.organization, Receipt.notes,
+                Receipt.file_path, User.username
+            )
+            .outerjoin(User, User.id == Receipt.uploaded_by)
+            .where(
+                and_(
+                    Receipt.team_id == team_id,
+                    Receipt.date >= start_date,
+                    Receipt.date <= end_date
+                )
+            )
+            .order_by(Receipt.date, Receipt.id)
+            .execution_options(yield_per=batch_size)
+        )
+        with DB_QUERY_SECONDS.time(repository=type(self).__name__,
+                                   statement='stream'):
+            result = await self.session.stream(stmt)
+        try:
+            async for rows in result.partitions():
+                yield rows
+        finally:
+            await result.close()
+
+    async def search(
+            self,
+            team_id: int,
+            query: str,
+            limit: int,
+            offset: int = 0,
+            start_date: Optional[datetime] = None,
+            end_date: Optional[datetime] = None
+    ) -> Tuple[List[Receipt], bool]:
+        """Team receipts matching every word of ``query``, best first.
+
+        Words match as prefixes anywhere in the OCR text, the parties or
+        the operation number. This is one query on the full-text index
+        (FTS5 on SQLite, ``search_vector`` on Postgres), ranked with more
+        weight on the operation number and the parties than on the text.
+        Also returns whether more results follow.
+        """
+        terms = _SEARCH_TERM.findall(query.lower())
+        if not terms:
+            return [], False
+
+        if self.session.get_bind().dialect.name == 'postgresql':
+            vector = literal_column('receipts.search_vector')
+            tsquery = func.to_tsquery(
+                literal_column("'simple'"),
+                ' & '.join(f"{term}:*" for term in terms)
+            )
+            stmt = select(Receipt).where(vector.op('@@')(tsquery))
+            rank = func.ts_rank_cd(vector, tsquery).desc()
+        else:
+            fts = table('receipts_fts', column('rowid'))
+            stmt = (
+                select(Receipt)
+                .join(fts, fts.c.rowid == Receipt.id)
+                .where(literal_column('receipts_fts').op('MATCH')(
+                    ' '.join(f'"{term}"*' for term in terms)))
+            )
+            # Lower is better
+            rank = func.bm25(literal_column('receipts_fts'), *_FTS_WEIGHTS)
+
+        stmt = stmt.where(Receipt.team_id == team_id)
+        if start_date is not None:
+            stmt = stmt.where(Receipt.date >= start_date)
+        if end_date is not None:
+            stmt = stmt.where(Receipt.date <= end_date)
+        stmt = (stmt.order_by(rank, Receipt.date.desc(), Receipt.id.desc())
+                .offset(offset).limit(limit + 1))
+
+        # One extra row tells whether there is another page
+        receipts = (await self._execute(stmt)).scalars().all()
+        return receipts[:limit], len(receipts) > limit
+
+    async def get_team_receipts_page(
+            self,
+            team_id: int,
+            start_date: datetime,
+            end_date: datetime,
+            limit: int,
+            cursor: Optional[Tuple[datetime, int]] = None,
+            backward: bool = False
+    ) -> Tuple[List[Receipt], bool]:
+        """Return up to ``limit`` receipts after (or before) ``cursor``.
+
+        Receipts are ordered by (date, id) and the page is found with a
+        seek on ``ix_receipts_team_date_id`` instead of an OFFSET, so every
+        page costs the same. Also returns whether more receipts exist in
+        the direction of travel.
+        """
+        key = tuple_(Receipt.date, Receipt.id)
+        stmt = select(Receipt).where(
+            and_(
+                Receipt.team_id == team_id,
+                Receipt.date >= start_date,
+                Receipt.date <= end_date
+            )
+        )
+        if backward:
+            if cursor is not None:
+                stmt = stmt.where(key < tuple_(*cursor))
+            stmt = stmt.order_by(Receipt.date.desc(), Receipt.id.desc())
+        else:
+            if cursor is not None:
+                stmt = stmt.where(key > tuple_(*cursor))
+            stmt = stmt.order_by(Receipt.date, Receipt.id)
+
+        # One extra row tells whether there is another page
+        result = await self._execute(stmt.limit(limit + 1))
+        receipts = result.scalars().all()
+        has_more = len(receipts) > limit
+        receipts = receipts[:limit]
+        if backward:
+            receipts.reverse()
+        return receipts, has_more
+
     async def create_receipt(
             self,
             team_id: int,
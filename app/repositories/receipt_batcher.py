@@ -0,0 +1,176 @@
+# app/repositories/receipt_batcher.py
+import asyncio
+import contextvars
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app.core.logging import logger
+from app.core.metrics import RECEIPT_INSERT_BATCH_SIZE
+from app.db.unit_of_work import current_unit_of_work, unit_of_work
+from app.models.receipt import Receipt
+from .receipt import ReceiptRepository
+
+# Runs in the transaction that inserted a caller's receipts
+OnInsert = Callable[[List[Receipt]], Awaitable[None]]
+# Rows of one caller, its callback and the future resolved with its
+# receipts
+_Pending = Tuple[List[Dict[str, Any]], Optional[OnInsert], asyncio.Future]
+
+
+class ReceiptInsertBatcher:
+    """Group commit for standalone receipt inserts.
+
+    Rows handed to ``insert_many`` outside a unit of work are queued; a
+    background task waits up to ``window`` seconds after the first ones
+    (or until ``max_batch`` rows are queued) and writes everything queued
+    with one INSERT ... RETURNING in its own transaction. Each caller gets
+    back its persisted receipts; ``on_insert`` lets it write more in that
+    same transaction, e.g. the progress of the job the receipts belong to.
+
+    Inside a unit of work the rows are inserted in it directly, so they
+    commit or roll back with the rest of the caller's work.
+
+    The rows of one call always share a transaction. If a batch fails,
+    each caller's rows are retried on their own so that one bad row only
+    fails its own caller.
+    """
+
+    def __init__(self, session_factory, window: float = 0.02,
+                 max_batch: int = 100):
+        self.session_factory = session_factory
+        self.window = window
+        self.max_batch = max_batch
+        self._queue: Optional[asyncio.Queue] = None
+        self._full: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        # Rows in the queue, not yet taken into a batch
+        self._queued_rows = 0
+
+    async def insert(self, **row) -> Receipt:
+        return (await self.insert_many([row]))[0]
+
+    async def insert_many(
+            self,
+            rows: List[Dict[str, Any]],
+            on_insert: Optional[OnInsert] = None
+    ) -> List[Receipt]:
+        if current_unit_of_work() is not None:
+            receipts = await ReceiptRepository().create_many(rows)
+            if on_insert is not None:
+                await on_insert(receipts)
+            return receipts
+        if not rows and on_insert is None:
+            return []
+
+        self._ensure_started()
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((rows, on_insert, future))
+        self._queued_rows += len(rows)
+        if self._queued_rows >= self.max_batch:
+            self._full.set()
+        return await future
+
+    async def close(self) -> None:
+        """Write the rows still queued, then stop the batching task."""
+        if self._task is None:
+            return
+        if not self._task.done():
+            self._queue.put_nowait(None)
+            self._full.set()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    def _ensure_started(self) -> None:
+        loop = asyncio.get_running_loop()
+        if (self._task is not None and not self._task.done()
+                and self._task.get_loop() is loop):
+            return
+        self._queue = asyncio.Queue()
+        self._full = asyncio.Event()
+        self._queued_rows = 0
+        # In an empty context rather than a copy of the caller's, so that
+        # no unit of work active there is visible to the batches
+        self._task = loop.create_task(self._run(),
+                                      context=contextvars.Context())
+
+    def _take(self) -> Optional[_Pending]:
+        item = self._queue.get_nowait()
+        if item is not None:
+            self._queued_rows -= len(item[0])
+        return item
+
+    async def _run(self) -> None:
+        closing = False
+        while not closing:
+            first = await self._queue.get()
+            if first is None:
+                return
+            self._queued_rows -= len(first[0])
+            batch: List[_Pending] = [first]
+            size = len(first[0])
+
+            if self.window > 0 and size + self._queued_rows < self.max_batch:
+                self._full.clear()
+                try:
+                    await asyncio.wait_for(self._full.wait(), self.window)
+                except asyncio.TimeoutError:
+                    pass
+            while size < self.max_batch and not self._queue.empty():
+                item = self._take()
+                if item is None:
+                    # Write what was taken, then stop
+                    closing = True
+                    break
+                batch.append(item)
+                size += len(item[0])
+
+            # Callers that went away are skipped
+            batch = [item for item in batch if not item[2].done()]
+            if batch:
+                await self._write(batch)
+
+    async def _write(self, batch: List[_Pending]) -> None:
+        RECEIPT_INSERT_BATCH_SIZE.observe(
+            sum(len(rows) for rows, _, _ in batch))
+        try:
+            receipts = await self._insert(batch)
+        except Exception as e:
+            if len(batch) == 1:
+                self._resolve(batch[0][2], exception=e)
+                return
+            logger.warning(f"Receipt batch of {len(batch)} callers failed "
+                           f"({e}), retrying them one by one")
+            for item in batch:
+                await self._write([item])
+            return
+
+        for (_, _, future), caller_receipts in zip(batch, receipts):
+            self._resolve(future, caller_receipts)
+
+    async def _insert(self, batch: List[_Pending]) -> List[List[Receipt]]:
+        """Write a batch in one transaction; receipts per caller."""
+        if current_unit_of_work() is not None:
+            # _run never inherits one (see _ensure_started); a batch must
+            # not end up in, or next to, a request's transaction
+            raise RuntimeError("Receipt batches run outside units of work")
+        async with unit_of_work(self.session_factory, join=False):
+            receipts = await ReceiptRepository().create_many(
+                [row for rows, _, _ in batch for row in rows])
+            result, start = [], 0
+            for rows, on_insert, _ in batch:
+                caller_receipts = receipts[start:start + len(rows)]
+                start += len(rows)
+                if on_insert is not None:
+                    await on_insert(caller_receipts)
+                result.append(caller_receipts)
+            return result
+
+    @staticmethod
+    def _resolve(future: asyncio.Future,
+                 receipts: Optional[List[Receipt]] = None,
+                 exception: Optional[Exception] = None) -> None:
+        if future.done():
+            return
+        if exception is not None:
+            future.set_exception(exception)
+        else:
+            future.set_result(receipts)
@@ -0,0 +1,97 @@
+from datetime import date
+from decimal import Decimal
+from typing import Dict, List, Tuple
+from sqlalchemy import select, update, and_, func
+from sqlalchemy.dialects import postgresql, sqlite
+from app.models.receipt_rollup import ReceiptDailyRollup
+from .base import BaseRepository
+
+# (team_id, day, status) -> (count delta, amount delta)
+RollupDeltas = Dict[Tuple[int, date, str], Tuple[int, Decimal]]
+
+# Dialects with INSERT ... ON CONFLICT DO UPDATE
+_UPSERT_INSERTS = {
+    'postgresql': postgresql.insert,
+    'sqlite': sqlite.insert,
+}
+
+
+class ReceiptRollupRepository(BaseRepository):
+    def __init__(self, session=None):
+        super().__init__(session, ReceiptDailyRollup)
+
+    async def apply(self, deltas: RollupDeltas) -> None:
+        """Add deltas to the daily rollups, within the current transaction."""
+        rows = [
+            {'team_id': team_id, 'day': day, 'status': status,
+             'count': count, 'amount': amount}
+            for (team_id, day, status), (count, amount) in deltas.items()
+            if count or amount
+        ]
+        if not rows:
+            return
+
+        insert = _UPSERT_INSERTS.get(self.session.get_bind().dialect.name)
+        if insert is None:
+            await self._apply_without_upsert(rows)
+            return
+
+        stmt = insert(ReceiptDailyRollup).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['team_id', 'day', 'status'],
+            set_={
+                'count': ReceiptDailyRollup.count + stmt.excluded.count,
+                'amount': ReceiptDailyRollup.amount + stmt.excluded.amount,
+            }
+        )
+        await self._execute(stmt)
+
+    async def _apply_without_upsert(self, rows: List[dict]) -> None:
+        for row in rows:
+            stmt = (
+                update(ReceiptDailyRollup)
+                .where(
+                    and_(
+                        ReceiptDailyRollup.team_id == row['team_id'],
+                        ReceiptDailyRollup.day == row['day'],
+                        ReceiptDailyRollup.status == row['status']
+                    )
+                )
+                .values(
+                    count=ReceiptDailyRollup.count + row['count'],
+                    amount=ReceiptDailyRollup.amount + row['amount']
+                )
+            )
+            result = await self._execute(stmt)
+            if result.rowcount == 0:
+                self.session.add(ReceiptDailyRollup(**row))
+        await self.session.flush()
+
+    async def get_summary(
+            self,
+            team_id: int,
+            start_day: date,
+            end_day: date
+    ) -> Dict[str, Tuple[int, Decimal]]:
+        """Receipt count and amount per status for days in the range."""
+        stmt = (
+            select(
+                ReceiptDailyRollup.status,
+                func.sum(ReceiptDailyRollup.count),
+                func.sum(ReceiptDailyRollup.amount)
+            )
+            .where(
+                and_(
+                    ReceiptDailyRollup.team_id == team_id,
+                    ReceiptDailyRollup.day >= start_day,
+                    ReceiptDailyRollup.day <= end_day
+                )
+            )
+            .group_by(ReceiptDailyRollup.status)
+        )
+        result = await self._execute(stmt)
+        return {
+            status: (int(count), Decimal(amount))
+            for status, count, amount in result.all()
+            if count
+        }
@@ -7,7 +7,7 @@ from .base import BaseRepository
 
 
 class TeamRepository(BaseRepository):
-    def __init__(self, session):
+    def __init__(self, session=None):
         super().__init__(session, Team)
 
     async def get_user_team(self, user_id: int) -> Optional[Team]:
@@ -16,7 +16,12 @@ class TeamRepository(BaseRepository):
             .join(TeamMember)
             .where(TeamMember.user_id == user_id)
         )
-        result = await self.session.execute(stmt)
+        result = await self._execute(stmt)
+        return result.scalars().first()
+
+    async def get_membership(self, user_id: int) -> Optional[TeamMember]:
+        stmt = select(TeamMember).where(TeamMember.user_id == user_id)
+        result = await self._execute(stmt)
         return result.scalars().first()
 
     async def is_admin(self, team_id: int, user_id: int) -> bool:
@@ -27,7 +32,7 @@ class TeamRepository(BaseRepository):
                 TeamMember.is_admin == True
             )
         )
-        result = await self.session.execute(stmt)
+        result = await self._execute(stmt)
         return result.scalars().first() is not None
 
     async def add_member(
@@ -42,8 +47,7 @@ class TeamRepository(BaseRepository):
             is_admin=is_admin
         )
         self.session.add(team_member)
-        await self.session.commit()
-        await self.session.refresh(team_member)
+        await self._flush()
         return team_member
 
     async def get_team_receipts(
@@ -63,5 +67,5 @@ class TeamRepository(BaseRepository):
             )
             .order_by(Receipt.date)
         )
-        result = await self.session.execute(stmt)
+        result = await self._execute(stmt)
         return result.scalars().all()
\ No newline at end of file
@@ -0,0 +1,19 @@
+from typing import Optional
+from sqlalchemy import select
+from app.models.telegram_file import TelegramFile
+from .base import BaseRepository
+
+
+class TelegramFileRepository(BaseRepository):
+    def __init__(self, session=None):
+        super().__init__(session, TelegramFile)
+
+    async def get_by_unique_id(
+            self,
+            file_unique_id: str
+    ) -> Optional[TelegramFile]:
+        stmt = select(TelegramFile).where(
+            TelegramFile.file_unique_id == file_unique_id
+        )
+        result = await self._execute(stmt)
+        return result.scalars().first()
@@ -5,17 +5,17 @@ from .base import BaseRepository
 
 
 class UserRepository(BaseRepository):
-    def __init__(self, session):
+    def __init__(self, session=None):
         super().__init__(session, User)
 
     async def get_by_telegram_id(self, telegram_id: int) -> Optional[User]:
         stmt = select(User).where(User.telegram_id == telegram_id)
-        result = await self.session.execute(stmt)
+        result = await self._execute(stmt)
         return result.scalars().first()
 
     async def get_by_username(self, username: str) -> Optional[User]:
         stmt = select(User).where(User.username == username)
-        result = await self.session.execute(stmt)
+        result = await self._execute(stmt)
         return result.scalars().first()
 
     async def create_from_telegram(
@@ -0,0 +1,201 @@
+# app/services/archive_service.py
+import asyncio
+import tempfile
+import time
+import uuid
+import zipfile
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+
+from app.core.metrics import EXPORT_SECONDS
+from app.db.unit_of_work import current_unit_of_work
+from app.repositories.receipt import ReceiptRepository
+from app.services.base import BaseService
+from app.services.export_service import EXPORT_COLUMNS, CsvExportWriter
+from app.services.file_storage import FileStorageService
+from app.services.identity_cache import IdentityCache, identity_cache
+
+# Already compressed; deflating them again costs CPU and saves nothing
+STORED_SUFFIXES = {'.jpg', '.jpeg', '.png', '.pdf'}
+
+MANIFEST_NAME = 'manifest.csv'
+
+# ZIP64 local header plus data descriptor, and central directory entry
+_LOCAL_OVERHEAD = 30 + 20 + 24
+_CENTRAL_OVERHEAD = 46 + 28
+# ZIP64 end records plus the classic end of central directory
+_END_OVERHEAD = 56 + 20 + 22
+
+
+class SplitZipWriter:
+    """ZIP archives of at most ``max_part_bytes`` each, written to disk.
+
+    Every part is a complete archive of its own rather than a volume of
+    a spanned ZIP, so each one opens anywhere. Files are copied in
+    chunks by ``zipfile``; nothing is held in memory.
+    """
+
+    def __init__(self, directory: Path, max_part_bytes: int):
+        self.directory = directory
+        self.max_part_bytes = max_part_bytes
+        self.parts: List[Path] = []
+        self._stem = f"archive_{uuid.uuid4().hex}"
+        self._zip: Optional[zipfile.ZipFile] = None
+        self._central_bytes = 0
+
+    def add(self, path: Path, name: str) -> int:
+        """Add ``path`` as ``name``; returns the 1-based part number."""
+        encoded = len(name.encode())
+        self._reserve(path.stat().st_size + _LOCAL_OVERHEAD + encoded,
+                      _CENTRAL_OVERHEAD + encoded)
+        compression = (zipfile.ZIP_STORED
+                       if path.suffix.lower() in STORED_SUFFIXES
+                       else zipfile.ZIP_DEFLATED)
+        self._zip.write(path, name, compress_type=compression)
+        return len(self.parts)
+
+    def close(self) -> None:
+        if self._zip is not None:
+            self._zip.close()
+            self._zip = None
+
+    def discard(self) -> None:
+        self.close()
+        for part in self.parts:
+            part.unlink(missing_ok=True)
+
+    def _reserve(self, local_bytes: int, central_bytes: int) -> None:
+        if self._zip is not None and self._zip.namelist():
+            projected = (self._zip.fp.tell() + local_bytes
+                         + self._central_bytes + central_bytes
+                         + _END_OVERHEAD)
+            if projected > self.max_part_bytes:
+                self.close()
+        if self._zip is None:
+            part = self.directory / f"{self._stem}_{len(self.parts) + 1}.zip"
+            self.parts.append(part)
+            self._zip = zipfile.ZipFile(part, 'w')
+            self._central_bytes = 0
+        self._central_bytes += central_bytes
+
+
+@dataclass
+class ArchiveResult:
+    # Complete ZIP files, each within the part size limit when possible
+    parts: List[Path]
+    receipts: int
+    # Receipts whose stored file is gone
+    missing: int = 0
+    sizes: List[int] = field(default_factory=list)
+
+
+def archive_entry_name(receipt_id: int, receipt_date: Optional[datetime],
+                       file_path: str) -> str:
+    """Readable, unique name of a receipt's file inside the archive."""
+    day = receipt_date.strftime('%Y-%m-%d') if receipt_date else 'undated'
+    return f"{day}_{receipt_id}{Path(file_path).suffix.lower()}"
+
+
+class ArchiveService(BaseService):
+    """ZIP archives of the original files behind a team's receipts.
+
+    Receipts are streamed from the database like exports and their files
+    are copied into the archive one at a time in a thread. A CSV manifest
+    lists every receipt with the part and name of its file. Archives
+    larger than ``max_part_bytes`` are split into several complete ZIP
+    files; the manifest goes into the last one.
+    """
+
+    def __init__(
+            self,
+            file_storage: FileStorageService,
+            export_dir: Path,
+            max_part_bytes: int,
+            batch_size: int = 1000,
+            identity_cache: IdentityCache = identity_cache,
+            session=None
+    ):
+        super().__init__(session)
+        self.file_storage = file_storage
+        self.export_dir = export_dir
+        self.max_part_bytes = max_part_bytes
+        self.batch_size = batch_size
+        self.identity_cache = identity_cache
+        self.receipt_repository = ReceiptRepository(session)
+
+    async def archive_team_files(
+            self,
+            telegram_id: int,
+            start_date: datetime,
+            end_date: datetime
+    ) -> Optional[ArchiveResult]:
+        """Archive the user's team receipt files for a date range.
+
+        Returns None when the user is not in a team. The caller sends the
+        parts and removes them afterwards.
+        """
+        identity = await self.identity_cache.resolve(self.session,
+                                                     telegram_id)
+        if identity is None or identity.team_id is None:
+            return None
+
+        self.export_dir.mkdir(parents=True, exist_ok=True)
+        started = time.perf_counter()
+        archive = SplitZipWriter(self.export_dir, self.max_part_bytes)
+        result = ArchiveResult(parts=archive.parts, receipts=0)
+        with tempfile.TemporaryDirectory(dir=self.export_dir) as work_dir:
+            manifest_path = Path(work_dir) / MANIFEST_NAME
+            manifest = CsvExportWriter(manifest_path)
+            try:
+                manifest.write_rows(
+                    [[header for header, _ in EXPORT_COLUMNS]
+                     + ['Part', 'File']])
+                async for rows in (
+                        self.receipt_repository
+                        .stream_team_receipts_in_period(
+                            identity.team_id, start_date, end_date,
+                            batch_size=self.batch_size)
+                ):
+                    await asyncio.to_thread(self._add_rows, archive,
+                                            manifest, rows, result)
+                manifest.close()
+                uow = current_unit_of_work()
+                if self.session is None and uow is not None:
+                    # End the read before the caller starts uploading
+                    await uow.commit()
+
+                if result.receipts:
+                    await asyncio.to_thread(archive.add, manifest_path,
+                                            MANIFEST_NAME)
+                await asyncio.to_thread(archive.close)
+            except BaseException:
+                manifest.close()
+                await asyncio.to_thread(archive.discard)
+                raise
+
+        result.sizes = [part.stat().st_size for part in result.parts]
+        EXPORT_SECONDS.observe(time.perf_counter() - started, format='zip')
+        return result
+
+    def _add_rows(
+            self,
+            archive: SplitZipWriter,
+            manifest: CsvExportWriter,
+            rows,
+            result: ArchiveResult
+    ) -> None:
+        entries = []
+        for row in rows:
+            values = [row._mapping[key] for _, key in EXPORT_COLUMNS]
+            path = (self.file_storage.resolve(row.file_path)
+                    if row.file_path else None)
+            if path is None or not path.is_file():
+                result.missing += 1
+                entries.append(values + [None, 'missing'])
+            else:
+                name = archive_entry_name(row.id, row.date, row.file_path)
+                entries.append(values + [archive.add(path, name), name])
+            result.receipts += 1
+        manifest.write_rows(entries)
@@ -1,6 +1,24 @@
+from typing import Optional
+
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.db.unit_of_work import current_unit_of_work
+
 
 class BaseService:
-    def __init__(self, session: AsyncSession):
-        self.session = session
\ No newline at end of file
+    """Services hold no session of their own by default.
+
+    Their repositories then use the active unit of work, so one service
+    instance can be shared by every update. An explicit ``session`` pins
+    the service to it instead.
+    """
+
+    def __init__(self, session: Optional[AsyncSession] = None):
+        self.session = session
+
+    async def _rollback(self) -> None:
+        """Roll back the service's session or the active unit of work."""
+        if self.session is not None:
+            await self.session.rollback()
+        else:
+            await current_unit_of_work().rollback()
@@ -0,0 +1,271 @@
+# app/services/export_service.py
+import asyncio
+import csv
+import re
+import time
+import uuid
+import zipfile
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Type
+from xml.sax.saxutils import escape
+
+from app.core.metrics import EXPORT_SECONDS
+from app.db.unit_of_work import current_unit_of_work
+from app.repositories.receipt import ReceiptRepository
+from app.services.base import BaseService
+from app.services.identity_cache import IdentityCache, identity_cache
+
+# (header, row key) of each exported column, in order
+EXPORT_COLUMNS = (
+    ('ID', 'id'),
+    ('Date', 'date'),
+    ('Amount', 'amount'),
+    ('Fee', 'fee'),
+    ('Status', 'status'),
+    ('Operation number', 'operation_number'),
+    ('Sender', 'sender'),
+    ('Receiver', 'receiver'),
+    ('Organization', 'organization'),
+    ('Notes', 'notes'),
+    ('Uploaded by', 'username'),
+)
+
+
+class CsvExportWriter:
+    # BOM so that Excel opens the Cyrillic text as UTF-8
+    encoding = 'utf-8-sig'
+
+    def __init__(self, path: Path):
+        self._file = path.open('w', encoding=self.encoding, newline='')
+        self._writer = csv.writer(self._file)
+
+    def write_rows(self, rows: Sequence[Sequence[Any]]) -> None:
+        self._writer.writerows(
+            [None if value is None else
+             value.isoformat(sep=' ') if isinstance(value, datetime) else
+             value for value in row]
+            for row in rows
+        )
+
+    def close(self) -> None:
+        self._file.close()
+
+
+# Characters XML 1.0 does not allow, even escaped
+_XML_INVALID = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]')
+# Excel counts days from 1899-12-30
+_EXCEL_EPOCH = datetime(1899, 12, 30)
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/'
+    'content-types">'
+    '<Default Extension="rels" ContentType="application/'
+    'vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" ContentType="application/'
+    'vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="'
+    'application/vnd.openxmlformats-officedocument.spreadsheetml.'
+    'worksheet+xml"/>'
+    '<Override PartName="/xl/styles.xml" ContentType="application/'
+    'vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+    '</Types>'
+)
+_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/'
+    'relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/'
+    'officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/'
+    'main" xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/'
+    'relationships">'
+    '<sheets><sheet name="Receipts" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/'
+    'relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/'
+    'officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/'
+    'officeDocument/2006/relationships/styles" Target="styles.xml"/>'
+    '</Relationships>'
+)
+# Style 1 is a date and time, style 2 a number with two decimals
+_STYLES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/'
+    '2006/main">'
+    '<numFmts count="1"><numFmt numFmtId="164" '
+    'formatCode="yyyy-mm-dd hh:mm:ss"/></numFmts>'
+    '<fonts count="1"><font><sz val="11"/><name val="Calibri"/></font>'
+    '</fonts>'
+    '<fills count="1"><fill><patternFill patternType="none"/></fill></fills>'
+    '<borders count="1"><border/></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0"/></cellStyleXfs>'
+    '<cellXfs count="3"><xf numFmtId="0" xfId="0"/>'
+    '<xf numFmtId="164" xfId="0" applyNumberFormat="1"/>'
+    '<xf numFmtId="4" xfId="0" applyNumberFormat="1"/></cellXfs>'
+    '</styleSheet>'
+)
+_SHEET_START = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/'
+    '2006/main"><sheetData>'
+)
+_SHEET_END = '</sheetData></worksheet>'
+
+
+def _xlsx_cell(value: Any) -> str:
+    if value is None:
+        return '<c/>'
+    if isinstance(value, datetime):
+        serial = (value - _EXCEL_EPOCH).total_seconds() / 86400
+        return f'<c s="1"><v>{serial:.6f}</v></c>'
+    if isinstance(value, Decimal):
+        return f'<c s="2"><v>{value}</v></c>'
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return f'<c><v>{value}</v></c>'
+    text = escape(_XML_INVALID.sub('', str(value)))
+    return (f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t>'
+            f'</is></c>')
+
+
+class XlsxExportWriter:
+    """Minimal single-sheet XLSX written row by row.
+
+    Cells use inline strings instead of the shared string table, so
+    nothing has to be kept in memory until the end; the worksheet is
+    streamed into the zip as it is produced.
+    """
+
+    def __init__(self, path: Path):
+        self._zip = zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED)
+        for name, content in (
+                ('[Content_Types].xml', _CONTENT_TYPES),
+                ('_rels/.rels', _ROOT_RELS),
+                ('xl/workbook.xml', _WORKBOOK),
+                ('xl/_rels/workbook.xml.rels', _WORKBOOK_RELS),
+                ('xl/styles.xml', _STYLES),
+        ):
+            self._zip.writestr(name, content)
+        self._sheet = self._zip.open('xl/worksheets/sheet1.xml', 'w',
+                                     force_zip64=True)
+        self._sheet.write(_SHEET_START.encode())
+
+    def write_rows(self, rows: Sequence[Sequence[Any]]) -> None:
+        self._sheet.write(''.join(
+            '<row>' + ''.join(map(_xlsx_cell, row)) + '</row>'
+            for row in rows
+        ).encode())
+
+    def close(self) -> None:
+        self._sheet.write(_SHEET_END.encode())
+        self._sheet.close()
+        self._zip.close()
+
+
+EXPORT_WRITERS: Dict[str, Type] = {
+    'csv': CsvExportWriter,
+    'xlsx': XlsxExportWriter,
+}
+
+
+@dataclass
+class ExportResult:
+    path: Path
+    rows: int
+    size: int
+
+
+class ExportService(BaseService):
+    """Spreadsheets of a team's receipts, written to ``export_dir``.
+
+    Rows are streamed from the database in batches and each batch is
+    written in a thread, so memory stays flat however long the period
+    is and the event loop is not blocked. The caller sends the file and
+    removes it afterwards.
+    """
+
+    def __init__(
+            self,
+            export_dir: Path,
+            batch_size: int = 1000,
+            identity_cache: IdentityCache = identity_cache,
+            session=None
+    ):
+        super().__init__(session)
+        self.export_dir = export_dir
+        self.batch_size = batch_size
+        self.identity_cache = identity_cache
+        self.receipt_repository = ReceiptRepository(session)
+
+    async def export_team_receipts(
+            self,
+            telegram_id: int,
+            start_date: datetime,
+            end_date: datetime,
+            fmt: str = 'csv'
+    ) -> Optional[ExportResult]:
+        """Write the user's team receipts for a date range to a file.
+
+        Returns None when the user is not in a team.
+        """
+        if fmt not in EXPORT_WRITERS:
+            raise ValueError(f"Unknown export format: {fmt}")
+        identity = await self.identity_cache.resolve(self.session,
+                                                     telegram_id)
+        if identity is None or identity.team_id is None:
+            return None
+
+        self.export_dir.mkdir(parents=True, exist_ok=True)
+        path = self.export_dir / f"receipts_{uuid.uuid4().hex}.{fmt}"
+        started = time.perf_counter()
+        writer = await asyncio.to_thread(EXPORT_WRITERS[fmt], path)
+        closed = False
+        count = 0
+        try:
+            await asyncio.to_thread(
+                writer.write_rows,
+                [[header for header, _ in EXPORT_COLUMNS]]
+            )
+            async for rows in (
+                    self.receipt_repository.stream_team_receipts_in_period(
+                        identity.team_id, start_date, end_date,
+                        batch_size=self.batch_size)
+            ):
+                values: List[List[Any]] = [
+                    [row._mapping[key] for _, key in EXPORT_COLUMNS]
+                    for row in rows
+                ]
+                await asyncio.to_thread(writer.write_rows, values)
+                count += len(values)
+            closed = True
+            await asyncio.to_thread(writer.close)
+            uow = current_unit_of_work()
+            if self.session is None and uow is not None:
+                # End the read before the caller starts uploading
+                await uow.commit()
+        except BaseException:
+            if not closed:
+                # Only the file handles; the original error is what counts
+                try:
+                    await asyncio.to_thread(writer.close)
+                except Exception:
+                    pass
+            path.unlink(missing_ok=True)
+            raise
+        EXPORT_SECONDS.observe(time.perf_counter() - started, format=fmt)
+        return ExportResult(path, count, path.stat().st_size)
@@ -1,7 +1,54 @@
+import hashlib
+import mimetypes
+import uuid
+from dataclasses import dataclass
 from pathlib import Path
+from typing import AsyncIterable, AsyncIterator, Tuple, Union
+
 import aiofiles
+import aiofiles.os
 from app.core.config import settings
 
+CHUNK_SIZE = 256 * 1024
+
+FileSource = Union[Path, AsyncIterable[bytes]]
+
+# Leading bytes of the file types receipts arrive as
+FILE_SIGNATURES = (
+    (b'%PDF-', '.pdf'),
+    (b'\xff\xd8\xff', '.jpg'),
+    (b'\x89PNG\r\n\x1a\n', '.png'),
+)
+HEAD_BYTES = 16
+
+
+@dataclass
+class StoredFile:
+    path: Path
+    sha256: str
+    size: int
+    # What gets persisted in Receipt.file_path; see FileStorageService.resolve
+    key: str
+
+
+async def iter_file(
+        file_path: Path,
+        chunk_size: int = CHUNK_SIZE
+) -> AsyncIterator[bytes]:
+    async with aiofiles.open(file_path, 'rb') as f:
+        while chunk := await f.read(chunk_size):
+            yield chunk
+
+
+def normalized_suffix(head: bytes, filename: str) -> str:
+    """Canonical extension for a file from its first bytes or its name."""
+    for signature, suffix in FILE_SIGNATURES:
+        if head.startswith(signature):
+            return suffix
+    mime_type, _ = mimetypes.guess_type(filename)
+    suffix = mimetypes.guess_extension(mime_type) if mime_type else None
+    return suffix or Path(filename).suffix.lower()
+
 
 class FileStorageService:
     def __init__(self, upload_dir: Path):
@@ -15,5 +62,115 @@ class FileStorageService:
             await f.write(file_data)
         return file_path
 
+    async def save(self, source: FileSource, filename: str) -> StoredFile:
+        """Store a file given either as a local path or a chunk stream."""
+        if isinstance(source, Path):
+            source = iter_file(source)
+        return await self.save_stream(source, filename)
+
+    async def save_stream(
+            self,
+            chunks: AsyncIterable[bytes],
+            filename: str
+    ) -> StoredFile:
+        """Write chunks to storage, hashing them on the way.
+
+        Data goes to a temporary file in ``temp_dir`` and is only moved
+        into place by ``_store`` once complete, so a failed download never
+        leaves a partial file behind.
+        """
+        self.temp_dir.mkdir(parents=True, exist_ok=True)
+        temp_path = self.temp_dir / f".{uuid.uuid4().hex}.part"
+        digest = hashlib.sha256()
+        head = b''
+        size = 0
+
+        try:
+            async with aiofiles.open(temp_path, 'wb') as f:
+                async for chunk in chunks:
+                    digest.update(chunk)
+                    if len(head) < HEAD_BYTES:
+                        head += chunk[:HEAD_BYTES - len(head)]
+                    size += len(chunk)
+                    await f.write(chunk)
+
+            file_path, key = await self._store(
+                temp_path, digest.hexdigest(), filename, head)
+        except BaseException:
+            try:
+                await aiofiles.os.remove(temp_path)
+            except FileNotFoundError:
+                pass
+            raise
+
+        return StoredFile(path=file_path, sha256=digest.hexdigest(),
+                          size=size, key=key)
+
+    @property
+    def temp_dir(self) -> Path:
+        return self.upload_dir
+
+    async def _store(
+            self,
+            temp_path: Path,
+            sha256: str,
+            filename: str,
+            head: bytes
+    ) -> Tuple[Path, str]:
+        """Move a complete upload into place; returns its path and key."""
+        file_path = self.upload_dir / filename
+        await aiofiles.os.replace(temp_path, file_path)
+        return file_path, str(file_path)
+
     async def get_file_path(self, filename: str) -> Path:
-        return self.upload_dir / filename
\ No newline at end of file
+        return self.upload_dir / filename
+
+    def resolve(self, key: str) -> Path:
+        """Return the local path of a stored file from its key."""
+        return Path(key)
+
+
+class ContentAddressedStorage(FileStorageService):
+    """Stores each distinct file once, named after its SHA-256.
+
+    Files live in ``<upload_dir>/ab/cd/abcd...<ext>`` so no directory
+    grows beyond a few thousand entries, and the key ``abcd...<ext>`` is
+    all that needs to be persisted. The extension is kept because OCR
+    dispatches on it; it comes from the content where possible, so the
+    same bytes uploaded as ``.jpeg`` and ``.jpg`` are stored once.
+    """
+
+    @property
+    def temp_dir(self) -> Path:
+        return self.upload_dir / '.tmp'
+
+    def resolve(self, key: str) -> Path:
+        if '/' in key or '\\' in key:
+            # Path stored before content addressing was enabled
+            return Path(key)
+        return self.upload_dir / key[:2] / key[2:4] / key
+
+    async def _store(
+            self,
+            temp_path: Path,
+            sha256: str,
+            filename: str,
+            head: bytes
+    ) -> Tuple[Path, str]:
+        key = sha256 + normalized_suffix(head, filename)
+        file_path = self.resolve(key)
+        if await aiofiles.os.path.exists(file_path):
+            # Same content is already stored
+            await aiofiles.os.remove(temp_path)
+        else:
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+            await aiofiles.os.replace(temp_path, file_path)
+        return file_path, key
+
+
+def create_file_storage(backend: str, upload_dir: Path) -> FileStorageService:
+    if backend == 'content_addressed':
+        return ContentAddressedStorage(upload_dir)
+    if backend == 'flat':
+        return FileStorageService(upload_dir)
+    raise ValueError(f"Unknown file storage backend: {backend}")
@@ -0,0 +1,85 @@
+# app/services/identity_cache.py
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from app.core.config import settings
+from app.core.metrics import IDENTITY_CACHE_LOOKUPS
+from app.repositories.team import TeamRepository
+from app.repositories.user import UserRepository
+
+
+@dataclass(frozen=True)
+class Identity:
+    """Who a Telegram user is in the database and which team they're in."""
+    user_id: int
+    team_id: Optional[int]
+    is_admin: bool
+
+
+class IdentityCache:
+    """In-process TTL + LRU cache of Telegram id -> ``Identity``.
+
+    Services call ``invalidate`` once a membership change has committed
+    (see ``unit_of_work.on_commit``); the TTL bounds staleness for
+    changes made outside this process.
+    """
+
+    def __init__(self, max_items: int = 10_000, ttl: float = 300.0):
+        self.max_items = max_items
+        self.ttl = ttl
+        self._items: OrderedDict[int, Tuple[float, Identity]] = OrderedDict()
+
+    def get(self, telegram_id: int) -> Optional[Identity]:
+        item = self._items.get(telegram_id)
+        if item is None or item[0] < time.monotonic():
+            if item is not None:
+                del self._items[telegram_id]
+            IDENTITY_CACHE_LOOKUPS.inc(result='miss')
+            return None
+        self._items.move_to_end(telegram_id)
+        IDENTITY_CACHE_LOOKUPS.inc(result='hit')
+        return item[1]
+
+    def set(self, telegram_id: int, identity: Identity) -> None:
+        self._items[telegram_id] = (time.monotonic() + self.ttl, identity)
+        self._items.move_to_end(telegram_id)
+        while len(self._items) > self.max_items:
+            self._items.popitem(last=False)
+
+    def invalidate(self, telegram_id: int) -> None:
+        self._items.pop(telegram_id, None)
+
+    def clear(self) -> None:
+        self._items.clear()
+
+    async def resolve(self, session, telegram_id: int) -> Optional[Identity]:
+        """Return the cached identity, loading it on a miss.
+
+        Loads with ``session``, or in the active unit of work when it is
+        None. Returns None for unknown users; those are not cached.
+        """
+        identity = self.get(telegram_id)
+        if identity is not None:
+            return identity
+
+        user = await UserRepository(session).get_by_telegram_id(telegram_id)
+        if user is None:
+            return None
+        identity = await self.load(session, user.id)
+        self.set(telegram_id, identity)
+        return identity
+
+    @staticmethod
+    async def load(session, user_id: int) -> Identity:
+        membership = await TeamRepository(session).get_membership(user_id)
+        if membership is None:
+            return Identity(user_id, None, False)
+        return Identity(user_id, membership.team_id, membership.is_admin)
+
+
+identity_cache = IdentityCache(
+    max_items=settings.IDENTITY_CACHE_SIZE,
+    ttl=settings.IDENTITY_CACHE_TTL
+)
@@ -0,0 +1,426 @@
+# app/services/ingestion_service.py
+import asyncio
+import json
+import random
+from contextlib import nullcontext
+from datetime import datetime, timedelta
+from decimal import Decimal
+from functools import partial
+from typing import (
+    Any, AsyncIterable, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+)
+from weakref import WeakValueDictionary
+
+from sqlalchemy.exc import OperationalError
+
+from app.core.logging import logger
+from app.core.metrics import INGESTION_JOBS, RECEIPTS_PROCESSED
+from app.db.unit_of_work import current_unit_of_work, unit_of_work
+from app.models.ingestion_job import IngestionJob
+from app.repositories.ingestion_job import IngestionJobRepository
+from app.services.ocr import OCRBusyError, OCRProcessingError
+from app.services.receipt_service import ReceiptService
+
+# Opens a Telegram file by file_id: returns a chunk stream and the filename
+FileOpener = Callable[[str], Awaitable[Tuple[AsyncIterable[bytes], str]]]
+# Delivers the final result of a job to the user
+Notifier = Callable[[IngestionJob, str], Awaitable[None]]
+
+# Failures that may go away on their own and are worth another attempt
+TRANSIENT_ERRORS = (
+    OCRBusyError,
+    ConnectionError,
+    asyncio.TimeoutError,
+    OperationalError,
+)
+
+
+def _failure_outcome(error: BaseException) -> str:
+    """``receipts_processed_total`` outcome of a failed file."""
+    if isinstance(error, OCRBusyError):
+        return 'busy'
+    if isinstance(error, OCRProcessingError):
+        return 'ocr_error'
+    if isinstance(error, ValueError):
+        return 'invalid'
+    return 'error'
+
+
+class IngestionService:
+    """Persistent queue of uploads processed by background workers.
+
+    Handlers only record a job and acknowledge the upload; ``workers``
+    tasks then download, OCR and store the files and report the result
+    through ``notify``. Jobs live in the database, so pending and
+    interrupted ones are picked up again by ``start`` after a restart.
+    Albums arrive as one job with several files, processed concurrently
+    and answered with a single summary. Transient failures are retried
+    with exponential backoff up to ``max_attempts`` times.
+    """
+
+    def __init__(
+            self,
+            session_factory,
+            receipt_service: ReceiptService,
+            open_file: FileOpener,
+            notify: Notifier,
+            workers: int = 2,
+            user_concurrency: int = 3,
+            max_attempts: int = 5,
+            retry_base_delay: float = 5.0,
+            retry_max_delay: float = 300.0
+    ):
+        self.session_factory = session_factory
+        self.receipt_service = receipt_service
+        self.repository = IngestionJobRepository()
+        self.open_file = open_file
+        self.notify = notify
+        self.workers = workers
+        self.user_concurrency = user_concurrency
+        self.max_attempts = max_attempts
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._tasks: List[asyncio.Task] = []
+        self._timers: Set[asyncio.TimerHandle] = set()
+        # Per-user OCR slots shared by all of that user's jobs; entries go
+        # away once no job holds them.
+        self._slots: WeakValueDictionary = WeakValueDictionary()
+
+    @property
+    def queued(self) -> int:
+        return self._queue.qsize()
+
+    async def submit(
+            self,
+            telegram_id: int,
+            chat_id: int,
+            files: List[Dict[str, str]],
+            status_message_id: Optional[int] = None
+    ) -> IngestionJob:
+        """Persist a job for ``files`` and queue it.
+
+        Each file is a dict with the Telegram ``file_id`` and
+        ``file_unique_id``. The job is committed on its own, before the
+        caller's unit of work ends, so a worker can pick it up at once;
+        what the caller wrote so far (e.g. registering the user) is
+        committed first.
+        """
+        outer = current_unit_of_work()
+        if outer is not None:
+            await outer.commit()
+        async with unit_of_work(self.session_factory, join=False):
+            job = await self.repository.create(
+                telegram_id=telegram_id,
+                chat_id=chat_id,
+                status_message_id=status_message_id,
+                status=IngestionJob.PENDING,
+                attempts=0,
+                files=json.dumps(files)
+            )
+        INGESTION_JOBS.inc(event='submitted')
+        self._queue.put_nowait(job.id)
+        return job
+
+    async def start(self) -> None:
+        """Recover unfinished jobs and start the workers."""
+        async with unit_of_work(self.session_factory, join=False):
+            interrupted = await self.repository.reset_running()
+            jobs = await self.repository.get_unfinished()
+
+        for job in jobs:
+            self._schedule(job.id, job.next_attempt_at)
+        if jobs:
+            INGESTION_JOBS.inc(len(jobs), event='recovered')
+            logger.info(f"Recovered {len(jobs)} ingestion jobs "
+                        f"({interrupted} interrupted)")
+
+        self._tasks = [
+            asyncio.create_task(self._worker())
+            for _ in range(self.workers)
+        ]
+
+    async def stop(self) -> None:
+        """Stop the workers; interrupted jobs are recovered on next start."""
+        for timer in self._timers:
+            timer.cancel()
+        self._timers.clear()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def _schedule(self, job_id: int, at: Optional[datetime]) -> None:
+        delay = (at - datetime.utcnow()).total_seconds() if at else 0
+        if delay <= 0:
+            self._queue.put_nowait(job_id)
+            return
+
+        def enqueue():
+            self._timers.discard(timer)
+            self._queue.put_nowait(job_id)
+
+        timer = asyncio.get_running_loop().call_later(delay, enqueue)
+        self._timers.add(timer)
+
+    def _retry_delay(self, attempts: int) -> float:
+        delay = min(self.retry_base_delay * 2 ** (attempts - 1),
+                    self.retry_max_delay)
+        # Jitter so that jobs failing together don't retry together
+        return delay * random.uniform(0.8, 1.2)
+
+    async def _worker(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run(job_id)
+            except Exception as e:
+                logger.error(f"Ingestion job {job_id} crashed: {e}",
+                             exc_info=True)
+                await self._crashed(job_id, e)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job_id: int) -> None:
+        job = await self._claim(job_id)
+        if job is None:
+            return
+
+        files = json.loads(job.files)
+        results = json.loads(job.result) if job.result else [None] * len(
+            files)
+        error = await self._process(job, files, results)
+
+        if error is not None and job.attempts < self.max_attempts:
+            delay = self._retry_delay(job.attempts)
+            next_attempt_at = datetime.utcnow() + timedelta(seconds=delay)
+            await self._update(
+                job.id,
+                status=IngestionJob.PENDING,
+                result=json.dumps(results),
+                error=str(error),
+                next_attempt_at=next_attempt_at
+            )
+            INGESTION_JOBS.inc(event='retried')
+            logger.info(f"Ingestion job {job.id} attempt {job.attempts} "
+                        f"failed ({error}), retrying in {delay:.0f}s")
+            self._schedule(job.id, next_attempt_at)
+            return
+
+        if error is not None:
+            results = [
+                result or {'error': str(error)}
+                for result in results
+            ]
+        status = IngestionJob.FAILED if error else IngestionJob.DONE
+        await self._update(
+            job.id,
+            status=status,
+            result=json.dumps(results),
+            error=str(error) if error else None,
+            next_attempt_at=None
+        )
+        INGESTION_JOBS.inc(event=status)
+
+        try:
+            await self.notify(job, self._summary(results))
+        except Exception as e:
+            logger.error(f"Failed to report ingestion job {job.id}: {e}")
+
+    async def _crashed(self, job_id: int, error: Exception) -> None:
+        """Retry or fail a job whose run raised unexpectedly.
+
+        Otherwise it would stay running until the next restart.
+        """
+        try:
+            async with unit_of_work(self.session_factory, join=False):
+                job = await self.repository.get_by_id(job_id)
+                if job is None or job.status != IngestionJob.RUNNING:
+                    return
+                job.error = str(error)
+                if job.attempts < self.max_attempts:
+                    delay = self._retry_delay(job.attempts)
+                    job.status = IngestionJob.PENDING
+                    job.next_attempt_at = (datetime.utcnow()
+                                           + timedelta(seconds=delay))
+                else:
+                    job.status = IngestionJob.FAILED
+                    job.next_attempt_at = None
+                    files = json.loads(job.files)
+                    results = (json.loads(job.result) if job.result
+                               else [None] * len(files))
+                    results = [
+                        result or {'error': str(error)}
+                        for result in results
+                    ]
+                    job.result = json.dumps(results)
+        except Exception as e:
+            logger.error(f"Failed to reschedule ingestion job {job_id}: "
+                         f"{e}")
+            return
+
+        if job.status == IngestionJob.PENDING:
+            INGESTION_JOBS.inc(event='retried')
+            self._schedule(job.id, job.next_attempt_at)
+            return
+
+        INGESTION_JOBS.inc(event=IngestionJob.FAILED)
+        try:
+            await self.notify(job, self._summary(results))
+        except Exception as e:
+            logger.error(f"Failed to report ingestion job {job.id}: {e}")
+
+    async def _claim(self, job_id: int) -> Optional[IngestionJob]:
+        """Mark a pending job as running; returns it detached."""
+        async with unit_of_work(self.session_factory, join=False):
+            job = await self.repository.get_by_id(job_id)
+            if job is None or job.status != IngestionJob.PENDING:
+                return None
+            job.status = IngestionJob.RUNNING
+            job.attempts += 1
+        return job
+
+    async def _update(self, job_id: int, **values) -> None:
+        async with unit_of_work(self.session_factory, join=False):
+            await self.repository.update(job_id, **values)
+
+    def _user_slots(self, telegram_id: int) -> asyncio.Semaphore:
+        slots = self._slots.get(telegram_id)
+        if slots is None:
+            slots = asyncio.Semaphore(self.user_concurrency)
+            self._slots[telegram_id] = slots
+        return slots
+
+    async def _process(
+            self,
+            job: IngestionJob,
+            files: List[Dict[str, str]],
+            results: List[Optional[Dict[str, Any]]]
+    ) -> Optional[Exception]:
+        """Fill in ``results`` for files not done yet.
+
+        Files are downloaded and OCR'd concurrently, at most
+        ``user_concurrency`` at a time per user, then all receipts are
+        written in one transaction together with the job's results. With
+        group commit that transaction is shared with other jobs.
+        Returns the last transient error, leaving the affected files
+        without a result so that a retry picks them up again.
+        """
+        try:
+            async with unit_of_work(self.session_factory, join=False):
+                uploader = await self.receipt_service.get_uploader(
+                    job.telegram_id)
+        except ValueError as e:
+            for result in results:
+                if result is None:
+                    RECEIPTS_PROCESSED.inc(outcome='invalid')
+            results[:] = [result or {'error': str(e)} for result in results]
+            return None
+
+        pending = [i for i, result in enumerate(results) if result is None]
+        slots = self._user_slots(job.telegram_id)
+
+        async def extract(file: Dict[str, str]):
+            # One unit of work per file; they run concurrently
+            async with slots, unit_of_work(self.session_factory,
+                                           join=False):
+                return await self.receipt_service.extract_telegram_file(
+                    file['file_unique_id'],
+                    partial(self.open_file, file['file_id'])
+                )
+
+        outcomes = await asyncio.gather(
+            *(extract(files[i]) for i in pending),
+            return_exceptions=True
+        )
+
+        transient = None
+        extracted = []
+        for index, outcome in zip(pending, outcomes):
+            if isinstance(outcome, asyncio.CancelledError):
+                raise outcome
+            if isinstance(outcome, Exception):
+                RECEIPTS_PROCESSED.inc(outcome=_failure_outcome(outcome))
+            if isinstance(outcome, TRANSIENT_ERRORS):
+                transient = outcome
+            elif isinstance(outcome, Exception):
+                results[index] = {'error': str(outcome)}
+            else:
+                extracted.append((index, outcome))
+
+        if not extracted:
+            return transient
+
+        progress = list(results)
+
+        async def record(receipts) -> None:
+            for (index, _), receipt in zip(extracted, receipts):
+                if isinstance(receipt, Exception):
+                    progress[index] = {'error': str(receipt)}
+                else:
+                    progress[index] = {
+                        'receipt_id': receipt.id,
+                        'amount': str(receipt.amount),
+                        'date': receipt.date.strftime('%Y-%m-%d'),
+                        'status': receipt.status,
+                    }
+            # Committed with the receipts, so a job interrupted after this
+            # point never stores them a second time
+            await self.repository.update(job.id,
+                                         result=json.dumps(progress))
+
+        # With group commit the receipts are written in the batcher's
+        # transaction; otherwise in one of our own
+        transaction = (nullcontext() if self.receipt_service.group_commit
+                       else unit_of_work(self.session_factory, join=False))
+        try:
+            async with transaction:
+                await self.receipt_service.create_receipts(
+                    uploader,
+                    [outcome for _, outcome in extracted],
+                    on_insert=record
+                )
+        except Exception as e:
+            RECEIPTS_PROCESSED.inc(len(extracted),
+                                   outcome=_failure_outcome(e))
+            if isinstance(e, TRANSIENT_ERRORS):
+                return e
+            for index, _ in extracted:
+                results[index] = {'error': str(e)}
+            return transient
+
+        for index, _ in extracted:
+            RECEIPTS_PROCESSED.inc(
+                outcome='invalid' if 'error' in progress[index]
+                else 'success')
+        results[:] = progress
+        return transient
+
+    @staticmethod
+    def _summary(results: List[Dict[str, Any]]) -> str:
+        if len(results) == 1:
+            result = results[0]
+            if 'error' in result:
+                return f"Failed to process receipt: {result['error']}"
+            return (
+                f"Receipt processed successfully!\n"
+                f"Amount: {result['amount']}\n"
+                f"Date: {result['date']}\n"
+                f"Status: {result['status']}"
+            )
+
+        processed = [result for result in results if 'error' not in result]
+        total = sum(Decimal(result['amount']) for result in processed)
+        lines = [
+            f"Processed {len(processed)} of {len(results)} receipts",
+            f"Total amount: {total:.2f}",
+            "",
+        ]
+        for number, result in enumerate(results, start=1):
+            if 'error' in result:
+                lines.append(f"{number}. Failed: {result['error']}")
+            else:
+                lines.append(f"{number}. {result['date']} - "
+                             f"Amount: {result['amount']}")
+        return "\n".join(lines)
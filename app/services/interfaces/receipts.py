@@ -1,6 +1,6 @@
 from abc import ABC, abstractmethod
 from pathlib import Path
-from typing import Dict, Any
+from typing import AsyncIterable, Dict, Any, Union
 
 
 class ReceiptServiceInterface(ABC):
@@ -13,7 +13,7 @@ class ReceiptServiceInterface(ABC):
             self,
             team_id: int,
             user_id: int,
-            file_data: bytes,
+            source: Union[Path, AsyncIterable[bytes]],
             filename: str
     ) -> Dict[str, Any]:
         pass
\ No newline at end of file
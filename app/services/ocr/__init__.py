@@ -1,4 +1,8 @@
 from app.services.ocr.receipt_parcer import ReceiptParser
-from app.services.ocr.ocr import OCRProcessingError, OCRService
+from app.services.ocr.templates import BankTemplate, TemplateRegistry
+from app.services.ocr.exceptions import OCRBusyError, OCRProcessingError
+from app.services.ocr.ocr import OCRService
+from app.services.ocr.pool import OCRWorkerPool
 
-__all__ = ['OCRService', 'ReceiptParser', 'OCRProcessingError']
+__all__ = ['OCRService', 'ReceiptParser', 'OCRProcessingError',
+           'OCRBusyError', 'OCRWorkerPool', 'BankTemplate', 'TemplateRegistry']
@@ -0,0 +1,189 @@
+# app/services/ocr/cache.py
+import asyncio
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from datetime import date, datetime
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import aiofiles
+
+from app.core.logging import logger
+from app.core.metrics import OCR_CACHE_LOOKUPS
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def _sha256_file(file_path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+async def sha256_file(file_path: Path) -> str:
+    """Hash a file without blocking the event loop."""
+    return await asyncio.to_thread(_sha256_file, file_path)
+
+
+def _encode(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {'__datetime__': value.isoformat()}
+    if isinstance(value, date):
+        return {'__date__': value.isoformat()}
+    if isinstance(value, Decimal):
+        return {'__decimal__': str(value)}
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def _decode(obj: Dict[str, Any]) -> Any:
+    if '__datetime__' in obj:
+        return datetime.fromisoformat(obj['__datetime__'])
+    if '__date__' in obj:
+        return date.fromisoformat(obj['__date__'])
+    if '__decimal__' in obj:
+        return Decimal(obj['__decimal__'])
+    return obj
+
+
+def dump_result(value: Dict[str, Any]) -> str:
+    """Serialize a parsed OCR result to JSON."""
+    return json.dumps(value, default=_encode, ensure_ascii=False)
+
+
+def load_result(data: str) -> Dict[str, Any]:
+    """Inverse of ``dump_result``."""
+    return json.loads(data, object_hook=_decode)
+
+
+class OCRResultCache:
+    """Two-tier cache of parsed OCR results.
+
+    Entries are keyed by the SHA-256 of the file content combined with the
+    OCR parameters that produced them. Recently used entries are kept in
+    memory; everything is also written to ``cache_dir`` as JSON, and the
+    least recently used files are evicted once the directory grows past
+    ``max_disk_bytes``.
+    """
+
+    def __init__(
+            self,
+            cache_dir: Path,
+            max_memory_items: int = 256,
+            max_disk_bytes: int = 100 * 1024 * 1024
+    ):
+        self.cache_dir = cache_dir
+        self.max_memory_items = max_memory_items
+        self.max_disk_bytes = max_disk_bytes
+
+        self._memory: OrderedDict[str, Dict[str, Any]] = OrderedDict()
+        # key -> size in bytes, least recently used first
+        self._disk: Optional[OrderedDict[str, int]] = None
+        self._disk_bytes = 0
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(digest: str, params: Dict[str, Any]) -> str:
+        payload = json.dumps(params, sort_keys=True)
+        return hashlib.sha256(f"{digest}:{payload}".encode()).hexdigest()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        hits = self.memory_hits + self.disk_hits
+        return {
+            'memory_hits': self.memory_hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'hit_rate': hits / lookups if lookups else 0.0,
+            'memory_items': len(self._memory),
+            'disk_items': len(self._disk or ()),
+            'disk_bytes': self._disk_bytes,
+        }
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def _scan_disk(self) -> OrderedDict:
+        entries = []
+        if self.cache_dir.exists():
+            for path in self.cache_dir.glob('*/*.json'):
+                stat = path.stat()
+                entries.append((stat.st_mtime, path.stem, stat.st_size))
+        entries.sort()
+        return OrderedDict((key, size) for _, key, size in entries)
+
+    async def _disk_index(self) -> OrderedDict:
+        if self._disk is None:
+            self._disk = await asyncio.to_thread(self._scan_disk)
+            self._disk_bytes = sum(self._disk.values())
+        return self._disk
+
+    def _remember(self, key: str, value: Dict[str, Any]) -> None:
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            self.memory_hits += 1
+            OCR_CACHE_LOOKUPS.inc(result='memory_hit')
+            return dict(self._memory[key])
+
+        disk = await self._disk_index()
+        if key in disk:
+            path = self._path(key)
+            try:
+                async with aiofiles.open(path, 'r', encoding='utf-8') as f:
+                    value = load_result(await f.read())
+                os.utime(path)
+            except (OSError, ValueError) as e:
+                logger.error(f"Dropping unreadable OCR cache entry {key}: {e}")
+                self._disk_bytes -= disk.pop(key)
+            else:
+                disk.move_to_end(key)
+                self.disk_hits += 1
+                OCR_CACHE_LOOKUPS.inc(result='disk_hit')
+                self._remember(key, value)
+                return dict(value)
+
+        self.misses += 1
+        OCR_CACHE_LOOKUPS.inc(result='miss')
+        return None
+
+    async def set(self, key: str, value: Dict[str, Any]) -> None:
+        """Cache ``value``; a failed write is logged, never raised."""
+        self._remember(key, dict(value))
+
+        path = self._path(key)
+        try:
+            data = dump_result(value)
+            size = len(data.encode('utf-8'))
+            disk = await self._disk_index()
+            path.parent.mkdir(parents=True, exist_ok=True)
+            async with aiofiles.open(path, 'w', encoding='utf-8') as f:
+                await f.write(data)
+        except (OSError, TypeError, ValueError) as e:
+            logger.error(f"Failed to write OCR cache entry {key}: {e}")
+            return
+
+        self._disk_bytes += size - disk.pop(key, 0)
+        disk[key] = size
+        self._evict(disk)
+
+    def _evict(self, disk: OrderedDict) -> None:
+        while self._disk_bytes > self.max_disk_bytes and len(disk) > 1:
+            key, size = disk.popitem(last=False)
+            self._disk_bytes -= size
+            try:
+                self._path(key).unlink()
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,11 @@
+# app/services/ocr/exceptions.py
+
+
+class OCRProcessingError(Exception):
+    """Raised when OCR processing fails."""
+    pass
+
+
+class OCRBusyError(OCRProcessingError):
+    """Raised when the OCR worker pool cannot accept more jobs."""
+    pass
@@ -0,0 +1,168 @@
+# app/services/ocr/jobs.py
+"""Blocking OCR jobs executed inside the OCR worker processes.
+
+Everything here runs in a child process, so functions must be importable
+at module level and take/return picklable values only.
+"""
+import time
+from typing import Any, Dict, List, Optional
+
+import pytesseract
+from PIL import Image
+import pdfplumber
+
+from app.services.ocr.language import (
+    AUTO, BOTH, DETECTION_LANG, choose_language
+)
+from app.services.ocr.preprocessing import (
+    PreprocessingConfig, preprocess_image
+)
+from app.services.ocr.templates import default_registry
+
+
+def configure_worker(tesseract_cmd: str | None) -> None:
+    """Process pool initializer."""
+    if tesseract_cmd:
+        pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
+
+
+def engine_version() -> str:
+    return str(pytesseract.get_tesseract_version())
+
+
+def _add_timings(total: Dict[str, float], timings: Dict[str, float]) -> None:
+    for stage, seconds in timings.items():
+        total[stage] = total.get(stage, 0.0) + seconds
+
+
+def _timed_ocr(
+        image: Image.Image,
+        lang: str,
+        stage: str,
+        timings: Dict[str, float],
+        config: str = ''
+) -> str:
+    started = time.perf_counter()
+    try:
+        text = pytesseract.image_to_string(image, lang=lang, config=config)
+    except (pytesseract.TesseractError,
+            pytesseract.TesseractNotFoundError) as e:
+        # pytesseract's exceptions can't be unpickled in the parent
+        # process, which would take the whole pool down with them.
+        raise RuntimeError(str(e)) from None
+    _add_timings(timings, {stage: time.perf_counter() - started})
+    return text
+
+
+def _detect_language(image: Image.Image, timings: Dict[str, float]) -> str:
+    """Pick the language model from a quick pass over a half-size image."""
+    small = image.resize(
+        (max(1, image.width // 2), max(1, image.height // 2)),
+        Image.BILINEAR
+    )
+    text = _timed_ocr(small, DETECTION_LANG, 'lang_detect', timings,
+                      config='--psm 6')
+    return choose_language(text)
+
+
+def _ocr(
+        image: Image.Image,
+        lang: str,
+        preprocessing: PreprocessingConfig,
+        timings: Dict[str, float],
+        verify: bool
+) -> Dict[str, Any]:
+    image, stage_timings = preprocess_image(image, preprocessing)
+    _add_timings(timings, stage_timings)
+
+    if lang == AUTO:
+        lang = _detect_language(image, timings)
+
+    result = {
+        'text': _timed_ocr(image, lang, 'tesseract', timings),
+        'lang': lang,
+        'verify_text': None,
+    }
+    if verify and lang != BOTH:
+        result['verify_text'] = _timed_ocr(image, BOTH, 'verify', timings)
+    return result
+
+
+def _merge_langs(langs: List[str]) -> Optional[str]:
+    if not langs:
+        return None
+    return langs[0] if len(set(langs)) == 1 else BOTH
+
+
+def image_to_text(
+        file_path: str,
+        lang: str,
+        preprocessing: PreprocessingConfig,
+        verify: bool = False
+) -> Dict[str, Any]:
+    """OCR an image.
+
+    Returns the text, the language model used, seconds spent per stage
+    and, when ``verify`` is set, the text produced by ``rus+eng`` too.
+    """
+    timings: Dict[str, float] = {}
+    with Image.open(file_path) as image:
+        result = _ocr(image, lang, preprocessing, timings, verify)
+    result['timings'] = timings
+    return result
+
+
+def pdf_to_text(
+        file_path: str,
+        lang: str,
+        dpi: int,
+        preprocessing: PreprocessingConfig,
+        verify: bool = False
+) -> Dict[str, Any]:
+    """Extract receipt text from a PDF one page at a time.
+
+    Pages with a text layer are read directly; pages without one (scans)
+    are rendered at ``dpi`` and OCR'd. Each page is parsed on its own with
+    the template picked from the first one, and reading stops as soon as
+    the pages so far have yielded the receipt date and amount. The result
+    has the same shape as ``image_to_text``; ``lang`` is None when no page
+    needed OCR.
+    """
+    template = None
+    found: Dict[str, Any] = {}
+    texts = []
+    verify_texts = []
+    verified = False
+    langs = []
+    timings: Dict[str, float] = {}
+    with pdfplumber.open(file_path) as pdf:
+        for page in pdf.pages:
+            text = page.extract_text()
+            if not text or not text.strip():
+                page_image = page.to_image(resolution=dpi).original
+                page_result = _ocr(page_image, lang, preprocessing, timings,
+                                   verify)
+                text = page_result['text']
+                langs.append(page_result['lang'])
+                verify_texts.append(page_result['verify_text'] or text)
+                verified |= page_result['verify_text'] is not None
+            else:
+                verify_texts.append(text)
+            # Drop the page's parsed objects before moving on
+            page.close()
+
+            texts.append(text)
+            if template is None:
+                # The bank's header is on the first page
+                template = default_registry.match(text)
+            for name, value in template.parse(text).items():
+                if found.get(name) is None:
+                    found[name] = value
+            if found.get('date') and found.get('amount'):
+                break
+    return {
+        'text': "\n".join(texts),
+        'lang': _merge_langs(langs),
+        'verify_text': "\n".join(verify_texts) if verified else None,
+        'timings': timings,
+    }
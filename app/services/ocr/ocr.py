@@ -1,22 +1,68 @@
 # app/services/ocr/ocr_service.py
+import random
+from dataclasses import asdict
 from pathlib import Path
-from typing import Dict, Any
-import pytesseract
-from PIL import Image
-import pdfplumber
+from typing import Dict, Any, Optional
 
+from app.core.logging import logger
+from app.core.metrics import (
+    OCR_LANGUAGE, OCR_WORKER_STAGE_SECONDS, RECEIPT_STAGE_SECONDS
+)
+from app.services.ocr import jobs
+from app.services.ocr.exceptions import OCRBusyError, OCRProcessingError
+from app.services.ocr.language import AUTO, LanguageStats
+from app.services.ocr.pool import OCRWorkerPool
+from app.services.ocr.preprocessing import PreprocessingConfig
 from app.services.ocr.receipt_parcer import ReceiptParser
 
 
-# app/services/ocr/exceptions.py
-class OCRProcessingError(Exception):
-    """Raised when OCR processing fails."""
-    pass
+class OCRService:
+    """Extracts receipt data from images and PDFs.
 
+    ``lang`` may be ``auto`` to pick the language model per document;
+    ``lang_verify_rate`` is then the share of documents additionally
+    OCR'd with ``rus+eng`` to check that the choice didn't cost accuracy.
+    """
 
-class OCRService:
-    def __init__(self):
+    def __init__(
+            self,
+            pool: OCRWorkerPool,
+            lang: str = 'rus+eng',
+            pdf_dpi: int = 300,
+            preprocessing: Optional[PreprocessingConfig] = None,
+            lang_verify_rate: float = 0.0
+    ):
+        self.pool = pool
+        self.lang = lang
+        self.pdf_dpi = pdf_dpi
+        self.preprocessing = preprocessing or PreprocessingConfig()
+        self.lang_verify_rate = lang_verify_rate
+        self.language_stats = LanguageStats()
         self.parser = ReceiptParser()
+        self._engine_version: Optional[str] = None
+
+    async def cache_params(self) -> Dict[str, Any]:
+        """Everything besides the file content that affects the result.
+
+        Includes the parser's templates, since results are cached parsed.
+        """
+        if self._engine_version is None:
+            try:
+                self._engine_version = await self.pool.run(
+                    jobs.engine_version
+                )
+            except OCRBusyError:
+                raise
+            except Exception:
+                self._engine_version = 'unknown'
+        return {
+            'engine': 'tesseract',
+            'engine_version': self._engine_version,
+            'lang': self.lang,
+            'pdf_dpi': self.pdf_dpi,
+            'preprocessing': asdict(self.preprocessing),
+            'parser': self.parser.registry.version,
+        }
 
     async def process_document(self, file_path: Path) -> Dict[str, Any]:
         """Process document based on file type."""
@@ -27,42 +73,73 @@ class OCRService:
     async def process_pdf(self, file_path: Path) -> Dict[str, Any]:
         """Extract text from PDF and parse receipt data."""
         try:
-            with pdfplumber.open(file_path) as pdf:
-                text = ""
-                for page in pdf.pages:
-                    text += page.extract_text()
-            return self.parser.parse_text(text)
+            result = await self.pool.run(
+                jobs.pdf_to_text,
+                str(file_path),
+                self.lang,
+                self.pdf_dpi,
+                self.preprocessing,
+                self._should_verify()
+            )
+            return self._handle_result(file_path, result)
+        except OCRBusyError:
+            raise
         except Exception as e:
             raise OCRProcessingError(f"Error processing PDF: {str(e)}")
 
     async def process_image(self, file_path: Path) -> Dict[str, Any]:
         """Extract text from image and parse receipt data."""
         try:
-            image = Image.open(file_path)
-            text = pytesseract.image_to_string(
-                image,
-                lang='rus+eng'
+            result = await self.pool.run(
+                jobs.image_to_text,
+                str(file_path),
+                self.lang,
+                self.preprocessing,
+                self._should_verify()
             )
-            return self.parser.parse_text(text)
+            return self._handle_result(file_path, result)
+        except OCRBusyError:
+            raise
         except Exception as e:
             raise OCRProcessingError(f"Error processing image: {str(e)}")
 
+    def _should_verify(self) -> bool:
+        return self.lang == AUTO and random.random() < self.lang_verify_rate
 
-    #
-    # @staticmethod
-    # def _parse_text(text: str) -> dict:
-    #     # This is a simplified example - you'll need to adjust patterns
-    #     # based on your actual receipt format
-    #     date_pattern = r'\d{2}\.\d{2}\.\d{4}'
-    #     amount_pattern = r'\d+[\.,]\d{2}'
-    #
-    #     date_match = re.search(date_pattern, text)
-    #     amount_match = re.search(amount_pattern, text)
-    #
-    #     return {
-    #         'date': datetime.strptime(date_match.group(),
-    #                                   '%d.%m.%Y') if date_match else None,
-    #         'amount': float(amount_match.group().replace(',',
-    #                                                      '.')) if amount_match else None,
-    #         'raw_text': text
-    #     }
+    def _handle_result(
+            self,
+            file_path: Path,
+            result: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Parse a worker result and record language statistics."""
+        self._log_timings(file_path, result['timings'])
+        with RECEIPT_STAGE_SECONDS.time(stage='parse'):
+            receipt_data = self.parser.parse_text(result['text'])
+        receipt_data['ocr_lang'] = result['lang']
+
+        if result['lang']:
+            OCR_LANGUAGE.inc(lang=result['lang'])
+        if self.lang == AUTO:
+            self.language_stats.record(result['lang'])
+        if result['verify_text'] is not None:
+            match = self.language_stats.record_verification(
+                receipt_data,
+                self.parser.parse_text(result['verify_text'])
+            )
+            if not match:
+                logger.info(
+                    f"Language '{result['lang']}' changed parsed fields "
+                    f"of {file_path.name} compared to rus+eng"
+                )
+        return receipt_data
+
+    @staticmethod
+    def _log_timings(file_path: Path, timings: Dict[str, float]) -> None:
+        for stage, seconds in timings.items():
+            OCR_WORKER_STAGE_SECONDS.observe(seconds, stage=stage)
+        if timings:
+            stages = ", ".join(
+                f"{stage}={seconds * 1000:.0f}ms"
+                for stage, seconds in timings.items()
+            )
+            logger.debug(f"OCR stages for {file_path.name}: {stages}")
@@ -0,0 +1,70 @@
+# app/services/ocr/pool.py
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional
+
+from app.core.logging import logger
+from app.services.ocr.exceptions import OCRBusyError, OCRProcessingError
+from app.services.ocr.jobs import configure_worker
+
+
+class OCRWorkerPool:
+    """Runs blocking OCR jobs in worker processes.
+
+    At most ``max_workers`` jobs run at once and at most ``max_queue`` more
+    wait for a free worker. Anything beyond that is rejected with
+    ``OCRBusyError`` instead of piling up in memory.
+    """
+
+    def __init__(
+            self,
+            max_workers: int,
+            max_queue: int,
+            tesseract_cmd: Optional[str] = None
+    ):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.tesseract_cmd = tesseract_cmd
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pending = 0
+
+    @property
+    def running(self) -> int:
+        return min(self._pending, self.max_workers)
+
+    @property
+    def queued(self) -> int:
+        return max(self._pending - self.max_workers, 0)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                initializer=configure_worker,
+                initargs=(self.tesseract_cmd,)
+            )
+        return self._executor
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Run ``func(*args)`` in a worker process and await its result."""
+        if self._pending >= self.max_workers + self.max_queue:
+            raise OCRBusyError("OCR queue is full")
+
+        self._pending += 1
+        try:
+            future = self._get_executor().submit(func, *args)
+            return await asyncio.wrap_future(future)
+        except BrokenProcessPool as e:
+            # A worker died (e.g. killed by the OOM killer); start over with
+            # a fresh pool for the next job.
+            logger.error(f"OCR worker pool broken: {e}")
+            self._executor = None
+            raise OCRProcessingError("OCR worker crashed")
+        finally:
+            self._pending -= 1
+
+    def shutdown(self, wait: bool = False) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+            self._executor = None
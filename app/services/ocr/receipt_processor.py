@@ -1,66 +1,186 @@
-from datetime import datetime
 from decimal import Decimal
-from typing import Dict, Any
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, Any, List, Optional, Tuple, Union
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.logging import logger
-from app.services.file_storage import FileStorageService
-from app.services.ocr import OCRProcessingError, OCRService
+from app.core.metrics import RECEIPT_STAGE_SECONDS
+from app.services.file_storage import FileSource, FileStorageService
+from app.services.ocr import OCRBusyError, OCRProcessingError, OCRService
+from app.services.ocr.cache import OCRResultCache
 from app.repositories.receipt import ReceiptRepository
+from app.repositories.receipt_batcher import ReceiptInsertBatcher
 from app.models.receipt import Receipt
 
 
 class ReceiptProcessor:
     def __init__(
             self,
-            session: AsyncSession,
             file_storage: FileStorageService,
-            ocr_service: OCRService
+            ocr_service: OCRService,
+            ocr_cache: Optional[OCRResultCache] = None,
+            batcher: Optional[ReceiptInsertBatcher] = None,
+            session: Optional[AsyncSession] = None
     ):
         self.repository = ReceiptRepository(session)
+        # Only used without an explicit session
+        self.batcher = batcher if session is None else None
         self.file_storage = file_storage
         self.ocr_service = ocr_service
+        self.ocr_cache = ocr_cache
 
     async def process_receipt(
             self,
             team_id: int,
             user_id: int,
-            file_data: bytes,
+            source: FileSource,
             filename: str
     ) -> Receipt:
+        file_path, receipt_data = await self.extract(source, filename)
+        return await self.create_receipt(
+            team_id,
+            user_id,
+            file_path,
+            receipt_data
+        )
+
+    async def extract(
+            self,
+            source: FileSource,
+            filename: str
+    ) -> Tuple[str, Dict[str, Any]]:
+        """Store the file and extract receipt data from it.
+
+        Returns the storage key of the file and the parsed data.
+        """
         try:
-            # Save file
-            file_path = await self.file_storage.save_file(
-                file_data,
-                filename
-            )
+            # Save file (for streamed sources this includes the transfer)
+            with RECEIPT_STAGE_SECONDS.time(stage='save'):
+                stored = await self.file_storage.save(source, filename)
 
             # Process with OCR
-            receipt_data = await self.ocr_service.process_document(
-                file_path
+            receipt_data = await self._extract_receipt_data(
+                stored.path,
+                stored.sha256
             )
+            return stored.key, receipt_data
 
-            if not receipt_data.get('amount') or not receipt_data.get('date'):
-                raise ValueError(
-                    "Could not extract required information from receipt"
-                )
-
-            # Prepare receipt data
-            receipt_data = self._prepare_receipt_data(
-                receipt_data,
-                team_id,
-                user_id,
-                str(file_path)
-            )
-
-            # Save to database
-            return await self.repository.create(**receipt_data)
-
+        except OCRBusyError:
+            raise
         except OCRProcessingError as e:
             # Log error and raise appropriate exception
             logger.error(f"OCR processing failed: {str(e)}")
             raise ValueError("Failed to process receipt")
 
+    async def create_receipt(
+            self,
+            team_id: int,
+            user_id: int,
+            file_path: str,
+            receipt_data: Dict[str, Any]
+    ) -> Receipt:
+        """Validate extracted data and save the receipt."""
+        row = self.validated_row(team_id, user_id, file_path, receipt_data)
+
+        # Save to database
+        with RECEIPT_STAGE_SECONDS.time(stage='db_insert'):
+            if self.batcher is not None:
+                return await self.batcher.insert(**row)
+            return await self.repository.create(**row)
+
+    async def create_receipts(
+            self,
+            team_id: int,
+            user_id: int,
+            extracted: List[Tuple[str, Dict[str, Any]]],
+            on_insert: Optional[Callable[
+                [List[Union[Receipt, ValueError]]], Awaitable[None]]] = None
+    ) -> List[Union[Receipt, ValueError]]:
+        """Save several extracted receipts in one transaction.
+
+        ``extracted`` holds (file_path, receipt_data) pairs. The result is
+        aligned with it; entries that fail validation are returned as the
+        ``ValueError`` explaining why instead of aborting the batch.
+
+        Outside a unit of work the receipts are group-committed by the
+        batcher. ``on_insert`` receives the result before it is returned,
+        in the transaction that writes the receipts.
+        """
+        outcomes: List[Union[Receipt, ValueError, None]] = []
+        rows = []
+        for file_path, receipt_data in extracted:
+            try:
+                rows.append(self.validated_row(
+                    team_id, user_id, file_path, receipt_data))
+                outcomes.append(None)
+            except ValueError as e:
+                outcomes.append(e)
+
+        def aligned(receipts: List[Receipt]):
+            receipts = iter(receipts)
+            return [
+                next(receipts) if outcome is None else outcome
+                for outcome in outcomes
+            ]
+
+        async def inserted(receipts: List[Receipt]) -> None:
+            await on_insert(aligned(receipts))
+
+        callback = inserted if on_insert is not None else None
+        with RECEIPT_STAGE_SECONDS.time(stage='db_insert'):
+            if self.batcher is not None:
+                receipts = await self.batcher.insert_many(rows, callback)
+            else:
+                receipts = await self.repository.create_many(rows)
+                if callback is not None:
+                    await callback(receipts)
+        return aligned(receipts)
+
+    def validated_row(
+            self,
+            team_id: int,
+            user_id: int,
+            file_path: str,
+            receipt_data: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Receipt columns for extracted data; ValueError if incomplete."""
+        if not receipt_data.get('amount') or not receipt_data.get('date'):
+            raise ValueError(
+                "Could not extract required information from receipt"
+            )
+
+        # Prepare receipt data
+        return self._prepare_receipt_data(
+            receipt_data,
+            team_id,
+            user_id,
+            file_path
+        )
+
+    async def _extract_receipt_data(
+            self,
+            file_path: Path,
+            digest: str
+    ) -> Dict[str, Any]:
+        """Run OCR on the file, reusing a cached result for known content."""
+        if self.ocr_cache is None:
+            with RECEIPT_STAGE_SECONDS.time(stage='ocr'):
+                return await self.ocr_service.process_document(file_path)
+
+        with RECEIPT_STAGE_SECONDS.time(stage='cache_lookup'):
+            key = self.ocr_cache.make_key(
+                digest,
+                await self.ocr_service.cache_params()
+            )
+            cached = await self.ocr_cache.get(key)
+        if cached is not None:
+            return cached
+
+        with RECEIPT_STAGE_SECONDS.time(stage='ocr'):
+            receipt_data = await self.ocr_service.process_document(file_path)
+        await self.ocr_cache.set(key, receipt_data)
+        return receipt_data
+
     def _prepare_receipt_data(
             self,
             ocr_data: Dict[str, Any],
@@ -71,7 +191,7 @@ class ReceiptProcessor:
         return {
             'team_id': team_id,
             'uploaded_by': user_id,
-            'date': datetime.strptime(ocr_data['date'], '%Y-%m-%d'),
+            'date': ocr_data['date'],
             'amount': Decimal(str(ocr_data['amount'])),
             'operation_number': ocr_data['operation_number'],
             'sender': ocr_data['sender'],
@@ -81,5 +201,7 @@ class ReceiptProcessor:
             'organization': ocr_data.get('organization'),
             'fee': Decimal(
                 str(ocr_data['fee'])) if 'fee' in ocr_data else None,
-            'notes': ocr_data.get('notes')
+            'notes': ocr_data.get('notes'),
+            'ocr_lang': ocr_data.get('ocr_lang'),
+            'raw_text': ocr_data.get('raw_text')
         }
@@ -0,0 +1,199 @@
+# app/services/ocr/templates.py
+"""Per-bank receipt layouts.
+
+Every template compiles its field patterns once, at import time. The
+registry picks a template from markers found in the first lines of the
+text, so a document is only matched against its own bank's patterns;
+adding a bank adds a few substring checks to the fingerprint and never
+runs its field patterns on other banks' receipts.
+
+Fields are looked up with one precompiled ``search`` each rather than a
+single alternation of all fields: patterns start with literal labels,
+which CPython's regex engine scans for far faster than it can try every
+alternative at every position (see benchmarks/parser_bench.py).
+"""
+import hashlib
+import json
+import re
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+
+FIELDS = (
+    'date', 'amount', 'operation_number', 'sender', 'receiver',
+    'organization'
+)
+
+# Number of leading lines the fingerprint looks at
+HEAD_LINES = 8
+
+# Bump when the parsing code changes what it extracts; template changes
+# are picked up by ``TemplateRegistry.version`` on their own
+PARSER_VERSION = 1
+
+_DOTTED_DATE = re.compile(r'(\d{2})\.(\d{2})\.(\d{4})(?: (\d{2}):(\d{2}))?$')
+
+
+@dataclass
+class BankTemplate:
+    """Field patterns for one receipt layout.
+
+    Each pattern in ``fields`` must capture its value in exactly one named
+    group called like the field, e.g. ``Сумма:\\s*(?P<amount>...)``.
+    """
+    name: str
+    fields: Dict[str, str]
+    # Text fragments identifying the layout in the first lines
+    markers: Sequence[str] = ()
+    min_markers: int = 1
+    date_formats: Sequence[str] = ('%d.%m.%Y',)
+    flags: int = 0
+    patterns: Dict[str, re.Pattern] = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self.patterns = {}
+        for name, pattern in self.fields.items():
+            compiled = re.compile(pattern, self.flags)
+            if compiled.groups != 1 or name not in compiled.groupindex:
+                raise ValueError(
+                    f"Template {self.name}: pattern for '{name}' must have "
+                    f"a single capturing group named '{name}'"
+                )
+            self.patterns[name] = compiled
+        self.markers = tuple(marker.lower() for marker in self.markers)
+
+    def parse(self, text: str) -> Dict[str, Any]:
+        result: Dict[str, Any] = dict.fromkeys(FIELDS)
+        for name, pattern in self.patterns.items():
+            match = pattern.search(text)
+            if match:
+                result[name] = match.group(1).strip()
+        result['date'] = self._parse_date(result['date'])
+        result['amount'] = _parse_amount(result['amount'])
+        result['bank'] = self.name
+        return result
+
+    def _parse_date(self, value: Optional[str]) -> Optional[datetime]:
+        if not value:
+            return None
+        match = _DOTTED_DATE.match(value)
+        if match:
+            # Fast path for dd.mm.yyyy[ HH:MM]; strptime is slow
+            day, month, year, hour, minute = match.groups()
+            try:
+                return datetime(int(year), int(month), int(day),
+                                int(hour or 0), int(minute or 0))
+            except ValueError:
+                return None
+        for date_format in self.date_formats:
+            try:
+                return datetime.strptime(value, date_format)
+            except ValueError:
+                continue
+        return None
+
+
+def _parse_amount(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    # Banks print thousands separated by (non-breaking) spaces
+    value = ''.join(value.split()).replace(',', '.')
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+def _head(text: str, lines: int = HEAD_LINES) -> str:
+    end = -1
+    for _ in range(lines):
+        end = text.find('\n', end + 1)
+        if end == -1:
+            return text
+    return text[:end]
+
+
+class TemplateRegistry:
+    def __init__(self, fallback: BankTemplate):
+        self.fallback = fallback
+        self.templates: List[BankTemplate] = []
+
+        self._version: Optional[str] = None
+
+    @property
+    def version(self) -> str:
+        """Changes with any template definition or ``PARSER_VERSION``.
+
+        Part of the OCR cache key, as cached results are parsed fields.
+        """
+        if self._version is None:
+            definition = json.dumps([PARSER_VERSION] + [
+                [t.name, t.fields, list(t.markers), t.min_markers,
+                 list(t.date_formats), t.flags]
+                for t in [self.fallback] + self.templates
+            ], sort_keys=True, ensure_ascii=False)
+            self._version = hashlib.sha256(
+                definition.encode()).hexdigest()[:16]
+        return self._version
+
+    def register(self, template: BankTemplate) -> BankTemplate:
+        if any(t.name == template.name for t in self.templates):
+            raise ValueError(f"Template {template.name} already registered")
+        if not template.markers:
+            raise ValueError(f"Template {template.name} has no markers")
+        self.templates.append(template)
+        self._version = None
+        return template
+
+    def match(self, text: str) -> BankTemplate:
+        """Pick the template whose markers occur in the first lines."""
+        head = _head(text).lower()
+        best, best_hits = self.fallback, 0
+        for template in self.templates:
+            hits = sum(marker in head for marker in template.markers)
+            if best_hits < hits >= template.min_markers:
+                best, best_hits = template, hits
+        return best
+
+
+GENERIC_TEMPLATE = BankTemplate(
+    name='generic',
+    fields={
+        'date': r'\b(?P<date>\d{2}\.\d{2}\.\d{4})\b',
+        # Not part of a longer number such as the date
+        'amount': r'(?<![\d.,])(?P<amount>\d+[\.,]\d{2})(?![\d.,])',
+        'operation_number': r'\bОперация[:\s]+'
+                            r'(?P<operation_number>[A-Z0-9]+)\b',
+        'sender': r'От кого:?\s+(?P<sender>[^\n]+)',
+        'receiver': r'Получатель:?\s+(?P<receiver>[^\n]+)',
+        'organization': r'Организация:?\s+(?P<organization>[^\n]+)',
+    }
+)
+
+# Transfer confirmations with "Номер операции" / "Сумма операции" and an
+# ИСПОЛНЕНО stamp, as printed by most of the banks we receive receipts from.
+OPERATION_RECEIPT_TEMPLATE = BankTemplate(
+    name='operation_receipt',
+    markers=(
+        'Номер операции', 'Номер транзакции', 'Сумма операции',
+        'Дата и время', 'ИСПОЛНЕНО', 'ОПЕРАЦИЯ ВЫПОЛНЕНА',
+    ),
+    min_markers=2,
+    fields={
+        'date': r'Дата и время[:\s]+'
+                r'(?P<date>\d{2}\.\d{2}\.\d{4}(?: \d{2}:\d{2})?)',
+        'amount': r'(?:Сумма операции|Сумма)[:\s]+'
+                  r'(?P<amount>\d[\d \u00a0]*[.,]\d{2})',
+        'operation_number': r'(?:Номер операции|Номер транзакции)[:\s]*'
+                            r'(?P<operation_number>\d+)',
+        'sender': r'(?:Счет отправителя|Отправитель)[:\s]*(?P<sender>[^\n]+)',
+        'receiver': r'(?:Счет зачисления|Получатель)[:\s]*'
+                    r'(?P<receiver>[^\n]+)',
+        'organization': r'(?P<organization>(?:ОАО|ЗАО|АО)[ \t]*«?'
+                        r'[А-Яа-яA-Za-z \t]+»?)',
+    },
+    date_formats=('%d.%m.%Y %H:%M', '%d.%m.%Y'),
+)
+
+default_registry = TemplateRegistry(fallback=GENERIC_TEMPLATE)
+default_registry.register(OPERATION_RECEIPT_TEMPLATE)
@@ -1,75 +1,200 @@
-from datetime import datetime
-from typing import Optional, List, Tuple, BinaryIO
-from pathlib import Path
-import tempfile
+import asyncio
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal
+from typing import (
+    Any, AsyncIterable, Awaitable, Callable, Dict, List, Optional, Tuple,
+    Union
+)
 
+from app.core.metrics import RECEIPT_STAGE_SECONDS, RECEIPTS_PROCESSED
 from app.models.receipt import Receipt
 from app.repositories.receipt import ReceiptRepository
-from app.repositories.team import TeamRepository
-from app.repositories.user import UserRepository
+from app.repositories.receipt_batcher import ReceiptInsertBatcher
+from app.repositories.receipt_rollup import ReceiptRollupRepository
+from app.repositories.telegram_file import TelegramFileRepository
 from app.services.base import BaseService
-from app.services.file_storage import FileStorageService
-from app.services.ocr import OCRService, OCRProcessingError
+from app.services.file_storage import FileSource, FileStorageService
+from app.services.identity_cache import Identity, IdentityCache, identity_cache
+from app.services.ocr import OCRBusyError, OCRProcessingError, OCRService
+from app.services.ocr.cache import OCRResultCache, dump_result, load_result
 from app.services.ocr.receipt_processor import ReceiptProcessor
 
+# Fetches a Telegram attachment: returns a chunk stream and the filename
+Downloader = Callable[[], Awaitable[Tuple[AsyncIterable[bytes], str]]]
+
+BUSY_MESSAGE = ("The bot is busy processing other receipts. "
+                "Please try again in a minute.")
+
+
+@dataclass
+class ReceiptPage:
+    receipts: List[Receipt]
+    has_prev: bool
+    has_next: bool
+
 
 class ReceiptService(BaseService):
-    def __init__(self, session, upload_dir):
+    # Extractions currently running, keyed by Telegram file_unique_id.
+    # Shared by all instances so that concurrent uploads of one file are
+    # coalesced even when each is handled by a different service.
+    _inflight: Dict[str, asyncio.Task] = {}
+
+    def __init__(self, file_storage: FileStorageService,
+                 ocr_service: OCRService,
+                 ocr_cache: Optional[OCRResultCache] = None,
+                 identity_cache: IdentityCache = identity_cache,
+                 receipt_batcher: Optional[ReceiptInsertBatcher] = None,
+                 session=None):
         super().__init__(session)
+        self.identity_cache = identity_cache
         self.receipt_repository = ReceiptRepository(session)
-        self.team_repository = TeamRepository(session)
-        self.user_repository = UserRepository(session)
+        self.rollup_repository = ReceiptRollupRepository(session)
+        self.telegram_file_repository = TelegramFileRepository(session)
 
         # Initialize required services
-        self.file_storage = FileStorageService(upload_dir=upload_dir)
-        self.ocr_service = OCRService()
+        self.file_storage = file_storage
+        self.ocr_service = ocr_service
         self.receipt_processor = ReceiptProcessor(
             session=session,
             file_storage=self.file_storage,
-            ocr_service=self.ocr_service
+            ocr_service=self.ocr_service,
+            ocr_cache=ocr_cache,
+            batcher=receipt_batcher
         )
 
     async def process_receipt(
             self,
             telegram_id: int,
-            file_data: BinaryIO,
+            source: FileSource,
             filename: str
     ) -> Tuple[Optional[Receipt], str]:
-        """Process and store a new receipt."""
-        user = await self.user_repository.get_by_telegram_id(telegram_id)
-        if not user:
-            return None, "User not found"
-
-        team = await self.team_repository.get_user_team(user.id)
-        if not team:
-            return None, "User is not in any team"
+        """Process and store a new receipt.
 
+        ``source`` is either a local file or an async stream of chunks;
+        it is written to storage once without being buffered in memory.
+        """
         try:
-            # Create temporary file
-            with tempfile.NamedTemporaryFile(delete=False) as temp_file:
-                temp_file.write(file_data.read())
-                temp_path = Path(temp_file.name)
+            identity = await self.get_uploader(telegram_id)
+        except ValueError as e:
+            return None, str(e)
 
+        try:
             # Process receipt using ReceiptProcessor
             receipt = await self.receipt_processor.process_receipt(
-                team_id=team.id,
-                user_id=user.id,
-                file_data=temp_path.read_bytes(),
+                team_id=identity.team_id,
+                user_id=identity.user_id,
+                source=source,
                 filename=filename
             )
 
-            # Clean up temporary file
-            temp_path.unlink()
-
+            RECEIPTS_PROCESSED.inc(outcome='success')
             return receipt, "Receipt processed successfully"
 
+        except OCRBusyError:
+            RECEIPTS_PROCESSED.inc(outcome='busy')
+            return None, BUSY_MESSAGE
         except OCRProcessingError as e:
+            RECEIPTS_PROCESSED.inc(outcome='ocr_error')
             return None, f"OCR processing failed: {str(e)}"
         except ValueError as e:
+            RECEIPTS_PROCESSED.inc(outcome='invalid')
             return None, str(e)
         except Exception as e:
+            RECEIPTS_PROCESSED.inc(outcome='error')
             return None, f"Failed to process receipt: {str(e)}"
 
+    async def get_uploader(self, telegram_id: int) -> Identity:
+        """Return the user and the team their receipts are filed under."""
+        identity = await self.identity_cache.resolve(self.session,
+                                                     telegram_id)
+        if not identity:
+            raise ValueError("User not found")
+
+        if identity.team_id is None:
+            raise ValueError("User is not in any team")
+        return identity
+
+    async def extract_telegram_file(
+            self,
+            file_unique_id: str,
+            download: Downloader
+    ) -> Tuple[str, Dict[str, Any]]:
+        """Store and OCR an attachment without creating a receipt.
+
+        Returns the storage key and the parsed data. Concurrent
+        extractions each need their own unit of work; those of the same
+        ``file_unique_id`` share one job.
+        """
+        task = self._inflight.get(file_unique_id)
+        if task is None:
+            task = asyncio.ensure_future(
+                self._resolve_telegram_file(file_unique_id, download)
+            )
+            self._inflight[file_unique_id] = task
+            task.add_done_callback(
+                lambda _: self._inflight.pop(file_unique_id, None)
+            )
+        # Shield the shared job so one cancelled waiter doesn't cancel it
+        # for everybody else.
+        return await asyncio.shield(task)
+
+    @property
+    def group_commit(self) -> bool:
+        """Whether ``create_receipts`` commits on its own when called
+        outside a unit of work."""
+        return self.receipt_processor.batcher is not None
+
+    async def create_receipts(
+            self,
+            uploader: Identity,
+            extracted: List[Tuple[str, Dict[str, Any]]],
+            on_insert: Optional[Callable[
+                [List[Union[Receipt, ValueError]]], Awaitable[None]]] = None
+    ) -> List[Union[Receipt, ValueError]]:
+        """Create receipts for extracted files in one batch.
+
+        ``uploader`` comes from ``get_uploader``. See
+        ``ReceiptProcessor.create_receipts`` for ``on_insert``.
+        """
+        return await self.receipt_processor.create_receipts(
+            team_id=uploader.team_id,
+            user_id=uploader.user_id,
+            extracted=extracted,
+            on_insert=on_insert
+        )
+
+    async def _resolve_telegram_file(
+            self,
+            file_unique_id: str,
+            download: Downloader
+    ) -> Tuple[str, Dict[str, Any]]:
+        known = await self.telegram_file_repository.get_by_unique_id(
+            file_unique_id
+        )
+        if known:
+            return known.file_path, load_result(known.parsed_data)
+
+        # Only covers resolving the file; the transfer itself is streamed
+        # into storage and counted in the "save" stage.
+        with RECEIPT_STAGE_SECONDS.time(stage='download'):
+            chunks, filename = await download()
+        file_path, receipt_data = await self.receipt_processor.extract(
+            chunks,
+            filename
+        )
+        await self.telegram_file_repository.create(
+            file_unique_id=file_unique_id,
+            file_path=file_path,
+            parsed_data=dump_result(receipt_data)
+        )
+        return file_path, receipt_data
+
+    async def _team_id(self, telegram_id: int) -> Optional[int]:
+        identity = await self.identity_cache.resolve(self.session,
+                                                     telegram_id)
+        return identity.team_id if identity else None
+
     async def get_user_receipts(
             self,
             telegram_id: int,
@@ -77,20 +202,94 @@ class ReceiptService(BaseService):
             end_date: datetime
     ) -> List[Receipt]:
         """Get user's receipts for date range."""
-        user = await self.user_repository.get_by_telegram_id(telegram_id)
-        if not user:
-            return []
-
-        team = await self.team_repository.get_user_team(user.id)
-        if not team:
+        team_id = await self._team_id(telegram_id)
+        if team_id is None:
             return []
 
         return await self.receipt_repository.get_team_receipts_in_period(
-            team.id,
+            team_id,
             start_date,
             end_date
         )
 
+    async def get_user_receipts_page(
+            self,
+            telegram_id: int,
+            start_date: datetime,
+            end_date: datetime,
+            limit: int,
+            cursor: Optional[Tuple[datetime, int]] = None,
+            backward: bool = False
+    ) -> ReceiptPage:
+        """Get one page of the user's team receipts for a date range.
+
+        ``cursor`` is the (date, id) of the last receipt of the previous
+        page, or of the first one of the next page when ``backward``.
+        """
+        team_id = await self._team_id(telegram_id)
+        if team_id is None:
+            return ReceiptPage([], False, False)
+
+        receipts, has_more = (
+            await self.receipt_repository.get_team_receipts_page(
+                team_id,
+                start_date,
+                end_date,
+                limit,
+                cursor=cursor,
+                backward=backward
+            )
+        )
+        if backward:
+            return ReceiptPage(receipts, has_prev=has_more, has_next=True)
+        return ReceiptPage(receipts, has_prev=cursor is not None,
+                           has_next=has_more)
+
+    async def search_receipts(
+            self,
+            telegram_id: int,
+            query: str,
+            limit: int,
+            offset: int = 0,
+            start_date: Optional[datetime] = None,
+            end_date: Optional[datetime] = None
+    ) -> ReceiptPage:
+        """Full-text search over the user's team receipts, best first."""
+        team_id = await self._team_id(telegram_id)
+        if team_id is None:
+            return ReceiptPage([], False, False)
+
+        receipts, has_more = await self.receipt_repository.search(
+            team_id,
+            query,
+            limit,
+            offset=offset,
+            start_date=start_date,
+            end_date=end_date
+        )
+        return ReceiptPage(receipts, has_prev=offset > 0, has_next=has_more)
+
+    async def get_period_summary(
+            self,
+            telegram_id: int,
+            start_day: date,
+            end_day: date
+    ) -> Dict[str, Tuple[int, Decimal]]:
+        """Receipt count and amount per status, both days inclusive.
+
+        Read from the daily rollups, so the cost depends on the number of
+        days in the period rather than on the number of receipts.
+        """
+        team_id = await self._team_id(telegram_id)
+        if team_id is None:
+            return {}
+
+        return await self.rollup_repository.get_summary(
+            team_id,
+            start_day,
+            end_day
+        )
+
     async def update_receipt_status(
             self,
             receipt_id: int,
@@ -98,8 +297,8 @@ class ReceiptService(BaseService):
             admin_telegram_id: int
     ) -> Tuple[bool, str]:
         """Update receipt status (admin only)."""
-        admin = await self.user_repository.get_by_telegram_id(
-            admin_telegram_id)
+        admin = await self.identity_cache.resolve(self.session,
+                                                  admin_telegram_id)
         if not admin:
             return False, "Admin not found"
 
@@ -107,7 +306,7 @@ class ReceiptService(BaseService):
         if not receipt:
             return False, "Receipt not found"
 
-        if not await self.team_repository.is_admin(receipt.team_id, admin.id):
+        if not (admin.is_admin and admin.team_id == receipt.team_id):
             return False, "User is not team admin"
 
         try:
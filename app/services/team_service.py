@@ -1,17 +1,21 @@
 from typing import Optional, List, Tuple
 from datetime import datetime
+from app.db.unit_of_work import on_commit
 from app.models.team import Team
 from app.models.receipt import Receipt
 from app.repositories.team import TeamRepository
 from app.repositories.user import UserRepository
+from app.services.identity_cache import IdentityCache, identity_cache
 from .base import BaseService
 
 
 class TeamService(BaseService):
-    def __init__(self, session):
+    def __init__(self, session=None,
+                 identity_cache: IdentityCache = identity_cache):
         super().__init__(session)
         self.team_repository = TeamRepository(session)
         self.user_repository = UserRepository(session)
+        self.identity_cache = identity_cache
 
     async def create_team(
             self,
@@ -19,25 +23,30 @@ class TeamService(BaseService):
             team_name: str
     ) -> Tuple[Team, str]:
         """Create a new team and add creator as admin."""
-        user = await self.user_repository.get_by_telegram_id(telegram_id)
-        if not user:
+        identity = await self.identity_cache.resolve(self.session,
+                                                     telegram_id)
+        if not identity:
             return None, "User not found"
 
         # Check if user already in team
-        existing_team = await self.team_repository.get_user_team(user.id)
-        if existing_team:
+        if identity.team_id is not None:
             return None, "User already belongs to a team"
 
         try:
             team = await self.team_repository.create(name=team_name)
             await self.team_repository.add_member(
                 team.id,
-                user.id,
+                identity.user_id,
                 is_admin=True
             )
-            return team, "Team created successfully"
-        except Exception as e:
-            return None, f"Failed to create team: {str(e)}"
+        except Exception:
+            # Never leave a team without its admin for the commit; what
+            # was cached in this transaction may be gone with it
+            await self._rollback()
+            self.identity_cache.invalidate(telegram_id)
+            raise
+        on_commit(lambda: self.identity_cache.invalidate(telegram_id))
+        return team, "Team created successfully"
 
     async def invite_member(
             self,
@@ -45,16 +54,15 @@ class TeamService(BaseService):
             username: str
     ) -> Tuple[bool, str]:
         """Invite a user to team."""
-        admin = await self.user_repository.get_by_telegram_id(
-            admin_telegram_id)
+        admin = await self.identity_cache.resolve(self.session,
+                                                  admin_telegram_id)
         if not admin:
             return False, "Admin not found"
 
-        team = await self.team_repository.get_user_team(admin.id)
-        if not team:
+        if admin.team_id is None:
             return False, "Admin is not in any team"
 
-        if not await self.team_repository.is_admin(team.id, admin.id):
+        if not admin.is_admin:
             return False, "User is not team admin"
 
         user = await self.user_repository.get_by_username(username)
@@ -68,23 +76,27 @@ class TeamService(BaseService):
 
         try:
             await self.team_repository.add_member(
-                team.id,
+                admin.team_id,
                 user.id,
                 is_admin=False
             )
-            return True, "User invited successfully"
-        except Exception as e:
-            return False, f"Failed to invite user: {str(e)}"
+        except Exception:
+            await self._rollback()
+            self.identity_cache.invalidate(admin_telegram_id)
+            raise
+        on_commit(lambda: self.identity_cache.invalidate(user.telegram_id))
+        return True, "User invited successfully"
 
     async def get_user_team(
             self,
             telegram_id: int
     ) -> Optional[Team]:
         """Get user's team."""
-        user = await self.user_repository.get_by_telegram_id(telegram_id)
-        if not user:
+        identity = await self.identity_cache.resolve(self.session,
+                                                     telegram_id)
+        if not identity or identity.team_id is None:
             return None
-        return await self.team_repository.get_user_team(user.id)
+        return await self.team_repository.get_by_id(identity.team_id)
 
     async def get_team_receipts(
             self,
@@ -105,7 +117,7 @@ class TeamService(BaseService):
             team_id: int
     ) -> bool:
         """Check if user is team admin."""
-        user = await self.user_repository.get_by_telegram_id(telegram_id)
-        if not user:
-            return False
-        return await self.team_repository.is_admin(team_id, user.id)
\ No newline at end of file
+        identity = await self.identity_cache.resolve(self.session,
+                                                     telegram_id)
+        return bool(identity and identity.team_id == team_id
+                    and identity.is_admin)
\ No newline at end of file
@@ -1,38 +1,51 @@
 # app/services/user_service.py
-from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.unit_of_work import on_commit
 from app.repositories.user import UserRepository
 from app.models.user import User
+from app.services.identity_cache import Identity, IdentityCache, identity_cache
 from app.core.logging import logger
+from .base import BaseService
 
 
-class UserService:
-    def __init__(self, session_factory: AsyncSession):
-        self.session_factory = session_factory
+class UserService(BaseService):
+    def __init__(
+            self,
+            session=None,
+            identity_cache: IdentityCache = identity_cache
+    ):
+        super().__init__(session)
+        self.user_repository = UserRepository(session)
+        self.identity_cache = identity_cache
 
-    async def get_or_create_user(
+    async def get_or_create_identity(
             self,
             user_id: int,
-            username: str | None,
-            first_name: str | None,
-            last_name: str | None
-    ) -> User:
-        async with self.session_factory() as session:
-            repository = UserRepository(session)
-            user = await repository.get_by_telegram_id(user_id)
+            username: str | None
+    ) -> Identity:
+        """Return the user's identity, registering unknown users.
+
+        Served from the identity cache when possible, so most updates
+        need no queries at all.
+        """
+        identity = self.identity_cache.get(user_id)
+        if identity is not None:
+            return identity
 
-            if not user:
-                user = await repository.create(
-                    telegram_id=user_id,
-                    username=username,
-                    first_name=first_name,
-                    last_name=last_name
-                )
-                await session.commit()
-                logger.info(f"Created new user: {user_id}")
+        user = await self.user_repository.get_by_telegram_id(user_id)
+        if not user:
+            user = await self.user_repository.create(
+                telegram_id=user_id,
+                username=username
+            )
+            logger.info(f"Created new user: {user_id}")
+            identity = Identity(user.id, None, False)
+            # Not cached before the user row is committed
+            on_commit(lambda: self.identity_cache.set(user_id, identity))
+            return identity
 
-            return user
+        identity = await self.identity_cache.load(self.session, user.id)
+        self.identity_cache.set(user_id, identity)
+        return identity
 
     async def get_user(self, user_id: int) -> User | None:
-        async with self.session_factory() as session:
-            repository = UserRepository(session)
-            return await repository.get_by_telegram_id(user_id)
+        return await self.user_repository.get_by_telegram_id(user_id)
@@ -0,0 +1,144 @@
+# benchmarks/export_bench.py
+"""Time and peak memory of receipt exports as the period grows.
+
+Seeds a fresh SQLite database per row count with one team's receipts,
+then exports the whole period through ``ExportService`` in each format.
+``loaded-csv`` is the old way for comparison: every receipt is loaded
+with ``get_team_receipts_in_period`` before the file is written. Peak
+memory is measured with tracemalloc, which slows every mode alike.
+
+    python -m benchmarks.export_bench --rows 1000,100000,1000000
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Dict, List
+
+os.environ.setdefault('BOT_TOKEN', 'benchmark')
+
+from app.core.database import create_database_engine, create_session_factory
+from app.db.unit_of_work import unit_of_work
+from app.models import Base
+from app.repositories.receipt import ReceiptRepository
+from app.services.export_service import (
+    EXPORT_COLUMNS, CsvExportWriter, ExportService
+)
+from app.services.identity_cache import identity_cache
+from benchmarks.db_pool_bench import PERIOD_END, PERIOD_START, _receipt_row
+from benchmarks.ingest_bench import seed_database
+
+MODES = ('csv', 'xlsx', 'loaded-csv')
+
+
+async def seed_receipts(session_factory, rows: int) -> int:
+    telegram_id = await seed_database(session_factory)
+    async with unit_of_work(session_factory):
+        identity = await identity_cache.resolve(None, telegram_id)
+    rng = random.Random(rows)
+    for start in range(0, rows, 10_000):
+        async with unit_of_work(session_factory):
+            await ReceiptRepository().bulk_create([
+                _receipt_row(rng, identity.team_id, identity.user_id)
+                for _ in range(min(10_000, rows - start))
+            ])
+    return telegram_id
+
+
+async def export_loaded(session_factory, telegram_id: int,
+                        path: Path) -> int:
+    async with unit_of_work(session_factory):
+        identity = await identity_cache.resolve(None, telegram_id)
+        receipts = await ReceiptRepository().get_team_receipts_in_period(
+            identity.team_id, PERIOD_START, PERIOD_END)
+    writer = CsvExportWriter(path)
+    writer.write_rows([[getattr(receipt, key, None)
+                        for _, key in EXPORT_COLUMNS]
+                       for receipt in receipts])
+    writer.close()
+    return len(receipts)
+
+
+async def run(args: argparse.Namespace, work_dir: Path,
+              rows: int) -> List[Dict[str, Any]]:
+    database = work_dir / f"export-{rows}.db"
+    engine = create_database_engine(f"sqlite+aiosqlite:///{database}")
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    session_factory = create_session_factory(engine)
+    telegram_id = await seed_receipts(session_factory, rows)
+    service = ExportService(work_dir, batch_size=args.batch_size)
+
+    results = []
+    for mode in args.modes:
+        tracemalloc.start()
+        started = time.perf_counter()
+        if mode == 'loaded-csv':
+            path = work_dir / 'loaded.csv'
+            count = await export_loaded(session_factory, telegram_id, path)
+        else:
+            async with unit_of_work(session_factory):
+                result = await service.export_team_receipts(
+                    telegram_id, PERIOD_START, PERIOD_END, fmt=mode)
+            path, count = result.path, result.rows
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        results.append({
+            'mode': mode,
+            'rows': count,
+            'seconds': elapsed,
+            'rows_per_second': count / elapsed,
+            'file_mb': path.stat().st_size / 1024 / 1024,
+            'peak_mb': peak / 1024 / 1024,
+        })
+        path.unlink()
+        print(f"{mode:<11} {count:>9} {elapsed:>8.2f} "
+              f"{count / elapsed:>10.0f} {results[-1]['file_mb']:>8.1f} "
+              f"{results[-1]['peak_mb']:>8.1f}")
+
+    await engine.dispose()
+    return results
+
+
+async def main_async(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    print(f"{'mode':<11} {'rows':>9} {'seconds':>8} {'rows/s':>10} "
+          f"{'file MB':>8} {'peak MB':>8}")
+    results = []
+    with tempfile.TemporaryDirectory() as work_dir:
+        for rows in args.rows:
+            results.extend(await run(args, Path(work_dir), rows))
+    return results
+
+
+def main():
+    def csv(cast=str):
+        return lambda value: [cast(v) for v in value.split(',') if v]
+
+    arg_parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    arg_parser.add_argument('--rows', type=csv(int),
+                            default=[1000, 100_000])
+    arg_parser.add_argument('--modes', type=csv(), default=list(MODES))
+    arg_parser.add_argument('--batch-size', type=int, default=1000,
+                            help='rows fetched per round trip')
+    arg_parser.add_argument('--json', type=Path)
+    args = arg_parser.parse_args()
+
+    unknown = set(args.modes) - set(MODES)
+    if unknown:
+        sys.exit(f"Unknown modes: {', '.join(sorted(unknown))}")
+
+    results = asyncio.run(main_async(args))
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+# benchmarks/generate_parser_corpus.py
+"""Generate the synthetic part of the parser benchmark corpus.
+
+Output is deterministic for a given seed, so a corpus version can always
+be regenerated and diffed. Hand-written and anonymised receipts live in
+``benchmarks/corpus/parser_seed.jsonl`` and are copied into every version.
+
+    python -m benchmarks.generate_parser_corpus --version v1
+"""
+import argparse
+import json
+import random
+from datetime import datetime, timedelta
+from pathlib import Path
+
+CORPUS_DIR = Path(__file__).parent / 'corpus'
+SEED_FILE = CORPUS_DIR / 'parser_seed.jsonl'
+
+FIRST_NAMES = ['Иван', 'Мария', 'Фаррух', 'Дилноза', 'Алексей', 'Шахло',
+               'Рустам', 'Ольга', 'Сухроб', 'Нигина']
+LAST_NAMES = ['Иванов', 'Петрова', 'Рахимов', 'Каримова', 'Смирнов',
+              'Назарова', 'Саидов', 'Кузнецова', 'Юсупов', 'Шарипова']
+BANKS = ['ОАО «Первый Банк»', 'ЗАО «Городской Банк»', 'АО «Восток Финанс»',
+         'ЗАО «Сбережения»']
+SHOPS = ['ООО Ромашка', 'ИП Каримов', 'Магазин Продукты', 'Аптека №5',
+         'ООО ТехноМаркет']
+
+
+def _name(rng: random.Random) -> str:
+    return (f"{rng.choice(LAST_NAMES)} {rng.choice(FIRST_NAMES)[0]}."
+            f"{rng.choice(FIRST_NAMES)[0]}.")
+
+
+def _amount(rng: random.Random) -> float:
+    return round(rng.uniform(1, 250_000), 2)
+
+
+def _format_amount(amount: float, rng: random.Random) -> str:
+    whole, cents = f"{amount:.2f}".split('.')
+    separator = rng.choice(['', ' ', '\u00a0'])
+    groups = []
+    while whole:
+        groups.insert(0, whole[-3:])
+        whole = whole[:-3]
+    return separator.join(groups) + rng.choice([',', '.']) + cents
+
+
+def _noise(lines, rng: random.Random):
+    """OCR-like noise: stray blank lines, trailing spaces, junk lines."""
+    noisy = []
+    for line in lines:
+        if rng.random() < 0.1:
+            noisy.append('')
+        if rng.random() < 0.2:
+            line += ' ' * rng.randint(1, 3)
+        noisy.append(line)
+        if rng.random() < 0.05:
+            noisy.append(rng.choice(['—' * 20, '* * *', '|', '.']))
+    return noisy
+
+
+def operation_receipt(rng: random.Random, when: datetime):
+    amount = _amount(rng)
+    operation = str(rng.randint(10 ** 8, 10 ** 12))
+    sender = str(rng.randint(10 ** 13, 10 ** 14))
+    receiver = _name(rng)
+    bank = rng.choice(BANKS)
+    status = rng.choice(['ИСПОЛНЕНО', 'ОПЕРАЦИЯ ВЫПОЛНЕНА'])
+    body = [
+        f"Дата и время: {when:%d.%m.%Y %H:%M}",
+        f"{rng.choice(['Номер операции', 'Номер транзакции'])}: {operation}",
+        f"{rng.choice(['Сумма операции', 'Сумма'])}: "
+        f"{_format_amount(amount, rng)}",
+        f"Счет отправителя: {sender}",
+        f"Получатель: {receiver}",
+    ]
+    rng.shuffle(body)
+    lines = [bank, status] + body + ['Спасибо, что выбрали наш банк']
+    expected = {
+        'date': f"{when:%Y-%m-%d %H:%M}",
+        'amount': f"{amount:.2f}",
+        'operation_number': operation,
+        'sender': sender,
+        'receiver': receiver,
+        'organization': bank,
+    }
+    return 'operation_receipt', _noise(lines, rng), expected
+
+
+def shop_receipt(rng: random.Random, when: datetime):
+    amount = round(rng.uniform(1, 9_999), 2)
+    operation = ''.join(rng.choice('ABCDEF0123456789') for _ in range(8))
+    sender = _name(rng)
+    receiver = rng.choice(SHOPS)
+    organization = rng.choice(SHOPS)
+    lines = [
+        'КАССОВЫЙ ЧЕК',
+        f"{when:%d.%m.%Y}",
+        f"Операция: {operation}",
+        f"ИТОГО {amount:.2f}".replace('.', rng.choice([',', '.'])),
+        f"От кого: {sender}",
+        f"Получатель: {receiver}",
+        f"Организация: {organization}",
+    ]
+    expected = {
+        'date': f"{when:%Y-%m-%d}",
+        'amount': f"{amount:.2f}",
+        'operation_number': operation,
+        'sender': sender,
+        'receiver': receiver,
+        'organization': organization,
+    }
+    return 'generic', _noise(lines, rng), expected
+
+
+LAYOUTS = [operation_receipt, shop_receipt]
+
+
+def generate(count: int, seed: int):
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    for number in range(count):
+        when = start + timedelta(minutes=rng.randint(0, 2 * 365 * 24 * 60))
+        layout, lines, expected = rng.choice(LAYOUTS)(rng, when)
+        yield {
+            'id': f"generated-{number:05d}",
+            'source': 'generated',
+            'layout': layout,
+            'text': '\n'.join(lines),
+            'expected': expected,
+        }
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    arg_parser.add_argument('--version', required=True)
+    arg_parser.add_argument('--count', type=int, default=400)
+    arg_parser.add_argument('--seed', type=int, default=1)
+    args = arg_parser.parse_args()
+
+    output = CORPUS_DIR / f"parser_{args.version}.jsonl"
+    with open(output, 'w', encoding='utf-8') as f:
+        if SEED_FILE.exists():
+            f.write(SEED_FILE.read_text(encoding='utf-8'))
+        for document in generate(args.count, args.seed):
+            f.write(json.dumps(document, ensure_ascii=False) + '\n')
+    print(f"Wrote {output}")
+
+
+if __name__ == '__main__':
+    main()
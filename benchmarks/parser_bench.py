@@ -0,0 +1,225 @@
+# benchmarks/parser_bench.py
+"""Speed and accuracy benchmark for ReceiptParser.
+
+    python benchmarks/parser_bench.py run [--json results.json]
+    python benchmarks/parser_bench.py compare <base-rev> [<head-rev>]
+    python benchmarks/parser_bench.py diff base.json head.json
+
+``compare`` checks out each revision into a temporary git worktree and
+benchmarks that revision's parser against the same corpus, so results
+are comparable across commits. ``compare`` and ``diff`` exit with status
+1 when the head is slower or less accurate than allowed.
+
+The script deliberately imports nothing from this directory: ``app`` is
+resolved from PYTHONPATH, which is how ``compare`` points it at another
+revision.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+BENCH_DIR = Path(__file__).resolve().parent
+REPO_DIR = BENCH_DIR.parent
+CORPUS_DIR = BENCH_DIR / 'corpus'
+FIELDS = (
+    'date', 'amount', 'operation_number', 'sender', 'receiver',
+    'organization'
+)
+
+
+def latest_corpus() -> Path:
+    versions = sorted(CORPUS_DIR.glob('parser_v*.jsonl'),
+                      key=lambda p: int(p.stem.split('_v')[1]))
+    if not versions:
+        sys.exit("No corpus found; run benchmarks/generate_parser_corpus.py")
+    return versions[-1]
+
+
+def load_corpus(path: Path) -> List[Dict[str, Any]]:
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def normalize(field: str, value: Any) -> Optional[str]:
+    if value is None or value == '':
+        return None
+    if field == 'date':
+        if isinstance(value, datetime):
+            if value.hour or value.minute:
+                return f"{value:%Y-%m-%d %H:%M}"
+            return f"{value:%Y-%m-%d}"
+        return str(value)
+    if field == 'amount':
+        return f"{float(value):.2f}"
+    return str(value).strip()
+
+
+def run(corpus_path: Path, repeat: int) -> Dict[str, Any]:
+    # Settings may be imported by the parser's package; it needs a token
+    os.environ.setdefault('BOT_TOKEN', 'benchmark')
+    from app.services.ocr.receipt_parcer import ReceiptParser
+
+    documents = load_corpus(corpus_path)
+    texts = [document['text'] for document in documents]
+    parser = ReceiptParser()
+
+    # Accuracy
+    correct = {field: 0 for field in FIELDS}
+    failures: Dict[str, List[str]] = {field: [] for field in FIELDS}
+    for document in documents:
+        parsed = parser.parse_text(document['text'])
+        for field in FIELDS:
+            expected = document['expected'].get(field)
+            if normalize(field, parsed.get(field)) == expected:
+                correct[field] += 1
+            else:
+                failures[field].append(document['id'])
+
+    # Speed: best of ``repeat`` passes over the whole corpus
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for text in texts:
+            parser.parse_text(text)
+        best = min(best, time.perf_counter() - started)
+
+    return {
+        'corpus': corpus_path.name,
+        'documents': len(documents),
+        'docs_per_second': len(documents) / best,
+        'accuracy': {
+            field: correct[field] / len(documents) for field in FIELDS
+        },
+        'failures': failures,
+    }
+
+
+def print_results(results: Dict[str, Any]) -> None:
+    print(f"corpus:        {results['corpus']} "
+          f"({results['documents']} documents)")
+    print(f"throughput:    {results['docs_per_second']:,.0f} docs/s")
+    for field, accuracy in results['accuracy'].items():
+        print(f"  {field:<17} {accuracy:7.2%}")
+
+
+def diff(
+        base: Dict[str, Any],
+        head: Dict[str, Any],
+        max_slowdown: float,
+        max_accuracy_drop: float
+) -> bool:
+    """Print a comparison; return True if head regressed."""
+    regressed = False
+    speed_change = head['docs_per_second'] / base['docs_per_second'] - 1
+    flag = ''
+    if speed_change < -max_slowdown:
+        flag, regressed = '  REGRESSION', True
+    print(f"throughput:    {base['docs_per_second']:,.0f} -> "
+          f"{head['docs_per_second']:,.0f} docs/s "
+          f"({speed_change:+.1%}){flag}")
+
+    for field in FIELDS:
+        before = base['accuracy'].get(field, 0.0)
+        after = head['accuracy'].get(field, 0.0)
+        flag = ''
+        if after < before - max_accuracy_drop:
+            flag, regressed = '  REGRESSION', True
+        print(f"  {field:<17} {before:7.2%} -> {after:7.2%}{flag}")
+        newly_failing = (set(head['failures'].get(field, []))
+                         - set(base['failures'].get(field, [])))
+        if newly_failing:
+            print(f"    newly failing: "
+                  f"{', '.join(sorted(newly_failing)[:10])}")
+    return regressed
+
+
+def run_revision(
+        rev: str,
+        corpus_path: Path,
+        repeat: int
+) -> Dict[str, Any]:
+    """Benchmark the parser as of git revision ``rev``."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        worktree = Path(temp_dir) / 'tree'
+        output = Path(temp_dir) / 'results.json'
+        subprocess.run(
+            ['git', 'worktree', 'add', '--detach', str(worktree), rev],
+            cwd=REPO_DIR, check=True, capture_output=True
+        )
+        try:
+            subprocess.run(
+                [sys.executable, str(Path(__file__).resolve()),
+                 '--corpus', str(corpus_path), '--repeat', str(repeat),
+                 'run', '--json', str(output), '--quiet'],
+                cwd=worktree, check=True,
+                env={**os.environ, 'PYTHONPATH': str(worktree)}
+            )
+            return json.loads(output.read_text())
+        finally:
+            subprocess.run(
+                ['git', 'worktree', 'remove', '--force', str(worktree)],
+                cwd=REPO_DIR, check=True, capture_output=True
+            )
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    arg_parser.add_argument('--corpus', type=Path, default=None)
+    arg_parser.add_argument('--repeat', type=int, default=5)
+    arg_parser.add_argument('--max-slowdown', type=float, default=0.10,
+                            help='tolerated throughput drop (fraction)')
+    arg_parser.add_argument('--max-accuracy-drop', type=float,
+                            default=0.005,
+                            help='tolerated per-field accuracy drop')
+    commands = arg_parser.add_subparsers(dest='command')
+
+    run_parser = commands.add_parser('run')
+    run_parser.add_argument('--json', type=Path)
+    run_parser.add_argument('--quiet', action='store_true')
+
+    compare_parser = commands.add_parser('compare')
+    compare_parser.add_argument('base')
+    compare_parser.add_argument('head', nargs='?', default=None,
+                                help='defaults to the working tree')
+
+    diff_parser = commands.add_parser('diff')
+    diff_parser.add_argument('base', type=Path)
+    diff_parser.add_argument('head', type=Path)
+
+    args = arg_parser.parse_args()
+    corpus_path = (args.corpus or latest_corpus()).resolve()
+
+    if args.command == 'compare':
+        base = run_revision(args.base, corpus_path, args.repeat)
+        if args.head:
+            head = run_revision(args.head, corpus_path, args.repeat)
+        else:
+            sys.path.insert(0, str(REPO_DIR))
+            head = run(corpus_path, args.repeat)
+        print(f"{args.base} -> {args.head or 'working tree'}")
+        sys.exit(diff(base, head, args.max_slowdown, args.max_accuracy_drop))
+
+    if args.command == 'diff':
+        base = json.loads(args.base.read_text())
+        head = json.loads(args.head.read_text())
+        sys.exit(diff(base, head, args.max_slowdown, args.max_accuracy_drop))
+
+    # run
+    if str(REPO_DIR) not in sys.path and 'PYTHONPATH' not in os.environ:
+        sys.path.insert(0, str(REPO_DIR))
+    results = run(corpus_path, args.repeat)
+    if not getattr(args, 'quiet', False):
+        print_results(results)
+    if getattr(args, 'json', None):
+        args.json.write_text(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
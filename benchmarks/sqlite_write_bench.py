@@ -0,0 +1,185 @@
+# benchmarks/sqlite_write_bench.py
+"""Write throughput of SQLite with N concurrent uploaders.
+
+Each upload is one unit of work like the ingestion path: look up the
+uploader, insert a receipt (plus its daily rollup) and commit. Runs every
+mode at every uploader count on a fresh database file:
+
+- ``rollback``: stock SQLite (rollback journal), connections race for
+  the write lock
+- ``wal``: WAL and the connect-time pragmas, still racing
+- ``wal-writer``: WAL plus the single writer queue (the default)
+- ``batched``: WAL, single writer and group commit of receipt inserts
+  made after the lookup's unit of work
+
+    python -m benchmarks.sqlite_write_bench --uploaders 1,8,32
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, List
+
+os.environ.setdefault('BOT_TOKEN', 'benchmark')
+
+from sqlalchemy import event
+
+from app.core.database import create_database_engine, create_session_factory
+from app.db.unit_of_work import unit_of_work
+from app.models import Base
+from app.repositories.receipt import ReceiptRepository
+from app.repositories.receipt_batcher import ReceiptInsertBatcher
+from app.repositories.team import TeamRepository
+from app.repositories.user import UserRepository
+from benchmarks.db_pool_bench import _receipt_row
+from benchmarks.ingest_bench import percentile, seed_database
+
+MODES = {
+    'rollback': {'sqlite_wal': False, 'single_writer': False},
+    'wal': {'sqlite_wal': True, 'single_writer': False},
+    'wal-writer': {'sqlite_wal': True, 'single_writer': True},
+    'batched': {'sqlite_wal': True, 'single_writer': True},
+}
+
+
+async def run(
+        args: argparse.Namespace,
+        work_dir: Path,
+        mode: str,
+        uploaders: int
+) -> Dict[str, Any]:
+    database = work_dir / f"{mode}-{uploaders}.db"
+    # One pool slot per uploader so that the pool is never the bottleneck
+    engine = create_database_engine(
+        f"sqlite+aiosqlite:///{database}", profile='sqlite-dev',
+        pool_size=uploaders, **MODES[mode]
+    )
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    session_factory = create_session_factory(engine)
+    telegram_id = await seed_database(session_factory)
+    batcher = None
+    if mode == 'batched':
+        batcher = ReceiptInsertBatcher(session_factory,
+                                       window=args.batch_window / 1000)
+
+    # Write transactions; read-only units of work commit as well
+    commits = 0
+
+    def mark_write(connection, cursor, statement, *args):
+        if not statement.lstrip().upper().startswith('SELECT'):
+            connection.info['wrote'] = True
+
+    def count_commit(connection):
+        nonlocal commits
+        if connection.info.pop('wrote', False):
+            commits += 1
+
+    event.listen(engine.sync_engine, 'after_cursor_execute', mark_write)
+    event.listen(engine.sync_engine, 'commit', count_commit)
+    event.listen(engine.sync_engine, 'rollback',
+                 lambda connection: connection.info.pop('wrote', None))
+
+    latencies: List[float] = []
+    errors: Dict[str, int] = defaultdict(int)
+
+    async def uploader(number: int):
+        rng = random.Random(number)
+        for _ in range(args.uploads):
+            started = time.perf_counter()
+            try:
+                async with unit_of_work(session_factory):
+                    user = await UserRepository().get_by_telegram_id(
+                        telegram_id)
+                    membership = await TeamRepository().get_membership(
+                        user.id)
+                    await asyncio.sleep(args.hold_ms / 1000)
+                    row = _receipt_row(rng, membership.team_id, user.id)
+                    if batcher is None:
+                        await ReceiptRepository().create(**row)
+                if batcher is not None:
+                    # Standalone insert; in a unit of work it is not batched
+                    await batcher.insert(**row)
+            except Exception as e:
+                # DBAPI error, without SQLAlchemy's statement dump
+                errors[str(getattr(e, 'orig', e))] += 1
+                continue
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(uploader(number) for number in range(uploaders)))
+    elapsed = time.perf_counter() - started
+    if batcher is not None:
+        await batcher.close()
+    await engine.dispose()
+
+    return {
+        'mode': mode,
+        'uploaders': uploaders,
+        'receipts': len(latencies),
+        'throughput': len(latencies) / elapsed,
+        'write_transactions_per_second': commits / elapsed,
+        'p50': percentile(latencies, 0.50),
+        'p95': percentile(latencies, 0.95),
+        'errors': dict(errors),
+    }
+
+
+def print_result(result: Dict[str, Any]) -> None:
+    print(f"{result['mode']:<11} {result['uploaders']:>9} "
+          f"{result['receipts']:>8} {result['throughput']:>10.1f} "
+          f"{result['write_transactions_per_second']:>10.1f} "
+          f"{result['p50'] * 1000:>8.1f} {result['p95'] * 1000:>8.1f} "
+          f"{sum(result['errors'].values()):>7}")
+    for error, count in result['errors'].items():
+        print(f"  ! {count} x {error}")
+
+
+async def main_async(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    print(f"{args.uploads} uploads per uploader, hold {args.hold_ms:g} ms")
+    print(f"{'mode':<11} {'uploaders':>9} {'receipts':>8} {'receipts/s':>10} "
+          f"{'write tx/s':>10} {'p50 ms':>8} {'p95 ms':>8} {'failed':>7}")
+    results = []
+    with tempfile.TemporaryDirectory() as work_dir:
+        for uploaders in args.uploaders:
+            for mode in args.modes:
+                result = await run(args, Path(work_dir), mode, uploaders)
+                print_result(result)
+                results.append(result)
+    return results
+
+
+def main():
+    def csv(cast=str):
+        return lambda value: [cast(v) for v in value.split(',') if v]
+
+    arg_parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    arg_parser.add_argument('--uploaders', type=csv(int),
+                            default=[1, 8, 32])
+    arg_parser.add_argument('--uploads', type=int, default=50,
+                            help='receipts per uploader')
+    arg_parser.add_argument('--modes', type=csv(), default=list(MODES))
+    arg_parser.add_argument('--hold-ms', type=float, default=2.0,
+                            help='work between the lookup and the insert')
+    arg_parser.add_argument('--batch-window', type=float, default=20.0,
+                            help='group commit window in ms (batched mode)')
+    arg_parser.add_argument('--json', type=Path)
+    args = arg_parser.parse_args()
+
+    unknown = set(args.modes) - set(MODES)
+    if unknown:
+        sys.exit(f"Unknown modes: {', '.join(sorted(unknown))}")
+
+    results = asyncio.run(main_async(args))
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+# benchmarks/synthetic.py
+"""Locally generated receipt images and PDFs for benchmarks."""
+import io
+import random
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from PIL import Image, ImageDraw, ImageFilter, ImageFont
+
+FONT_CANDIDATES = [
+    '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf',
+    '/usr/share/fonts/TTF/DejaVuSans.ttf',
+    '/Library/Fonts/Arial Unicode.ttf',
+    'C:/Windows/Fonts/arial.ttf',
+]
+
+# (width, height) of rendered photos
+RESOLUTIONS = {
+    'small': (800, 1200),
+    'medium': (1600, 2400),
+    'large': (3000, 4000),
+}
+
+
+def find_font(path: Optional[str] = None) -> str:
+    for candidate in ([path] if path else []) + FONT_CANDIDATES:
+        if candidate and Path(candidate).exists():
+            return candidate
+    raise SystemExit(
+        "No TrueType font with Cyrillic glyphs found; pass --font"
+    )
+
+
+def receipt_lines(rng: random.Random) -> Tuple[List[str], Dict[str, str]]:
+    """Lines of an operation receipt and the fields they contain."""
+    when = datetime(2024, 1, 1) + timedelta(
+        minutes=rng.randint(0, 365 * 24 * 60))
+    amount = round(rng.uniform(10, 50_000), 2)
+    operation = str(rng.randint(10 ** 8, 10 ** 10))
+    lines = [
+        'ОАО «Первый Банк»',
+        'ИСПОЛНЕНО',
+        f"Дата и время: {when:%d.%m.%Y %H:%M}",
+        f"Номер операции: {operation}",
+        f"Сумма операции: {amount:.2f}".replace('.', ','),
+        f"Счет отправителя: {rng.randint(10 ** 13, 10 ** 14)}",
+        'Получатель: Рахимов Ф.Ш.',
+    ]
+    expected = {
+        'date': f"{when:%Y-%m-%d %H:%M}",
+        'amount': f"{amount:.2f}",
+        'operation_number': operation,
+    }
+    return lines, expected
+
+
+def render_image(
+        lines: List[str],
+        size: Tuple[int, int],
+        noise: float,
+        font_path: str,
+        rng: random.Random
+) -> Image.Image:
+    """Photo-like receipt: paper on a darker background, skewed, noisy."""
+    width, height = size
+    image = Image.new('RGB', size, (95, 85, 75))
+    draw = ImageDraw.Draw(image)
+    margin_x, margin_y = width // 8, height // 10
+    draw.rectangle(
+        (margin_x, margin_y, width - margin_x, height - margin_y),
+        fill=(238, 234, 226)
+    )
+    font = ImageFont.truetype(font_path, max(12, width // 32))
+    line_height = int(font.size * 1.6)
+    y = margin_y + line_height
+    for line in lines:
+        draw.text((margin_x + font.size, y), line, fill=(25, 25, 25),
+                  font=font)
+        y += line_height
+
+    if noise:
+        image = image.rotate(rng.uniform(-3, 3) * noise,
+                             resample=Image.BICUBIC,
+                             fillcolor=(95, 85, 75))
+        grain = Image.effect_noise(size, 40 * noise).convert('RGB')
+        image = Image.blend(image, grain, 0.15 * noise)
+        image = image.filter(ImageFilter.GaussianBlur(noise))
+    return image
+
+
+def _pdf_string(text: str) -> bytes:
+    raw = text.encode('cp1251')
+    return (raw.replace(b'\\', b'\\\\').replace(b'(', b'\\(')
+            .replace(b')', b'\\)'))
+
+
+def _cyrillic_differences() -> str:
+    """Map cp1251 codes to Adobe glyph names so Cyrillic text extracts."""
+    # Glyph numbering puts Ё/ё right after Е/е, cp1251 doesn't
+    upper = [n for n in range(10017, 10050) if n != 10023]   # А-Я
+    lower = [n for n in range(10065, 10098) if n != 10071]   # а-я
+    names = [f"/afii{n}" for n in upper + lower]
+    return (f"[168 /afii10023 171 /guillemotleft 184 /afii10071 "
+            f"187 /guillemotright 185 /numero 192 {' '.join(names)}]")
+
+
+def text_pdf(lines: List[str]) -> bytes:
+    """Single-page PDF with a real text layer."""
+    content = b"BT /F1 11 Tf 14 TL 50 780 Td\n"
+    for line in lines:
+        content += b"(" + _pdf_string(line) + b") Tj T*\n"
+    content += b"ET"
+
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+        b"/Contents 4 0 R /Resources << /Font << /F1 5 0 R >> >> >>",
+        b"<< /Length %d >>\nstream\n" % len(content) + content
+        + b"\nendstream",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica "
+        b"/Encoding << /Type /Encoding /BaseEncoding /WinAnsiEncoding "
+        b"/Differences " + _cyrillic_differences().encode() + b" >> >>",
+    ]
+    out = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += (b"trailer << /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF"
+            % (len(objects) + 1, xref))
+    return out
+
+
+def scanned_pdf(image: Image.Image) -> bytes:
+    """PDF containing only a page image, as produced by scanners."""
+    buffer = io.BytesIO()
+    image.convert('RGB').save(buffer, format='PDF', resolution=200)
+    return buffer.getvalue()
+
+
+def jpeg(image: Image.Image, quality: int = 85) -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, format='JPEG', quality=quality)
+    return buffer.getvalue()
@@ -1,71 +1,179 @@
 # main.py
 import asyncio
 from aiogram import Bot, Dispatcher
-from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 
 from app.bot.handlers.team import setup_team_handlers
 from app.core.config import settings
+from app.core.database import create_database_engine, create_session_factory
 from app.core.logging import logger
-from app.bot.handlers import base, setup_receipt_handlers
+from app.bot.handlers import (
+    base, setup_export_handlers, setup_receipt_handlers, setup_stats_handlers
+)
 from app.bot.middlewares.auth import AuthMiddleware
+from app.bot.middlewares.metrics import HandlerMetricsMiddleware
+from app.bot.downloads import open_telegram_file
+from app.bot.notifications import make_job_notifier
+from app.core.metrics import (
+    INGESTION_QUEUE, OCR_LANGUAGE_MATCH_RATE, OCR_LANGUAGE_SINGLE_RATE,
+    OCR_QUEUE, start_metrics_server
+)
+from app.db.unit_of_work import unit_of_work
 from app.services.user_service import UserService
 from app.services.receipt_service import ReceiptService
+from app.services.file_storage import create_file_storage
+from app.services.ingestion_service import IngestionService
+from app.services.export_service import ExportService
+from app.services.archive_service import ArchiveService
+from app.services.ocr import OCRService, OCRWorkerPool
+from app.services.ocr.preprocessing import PreprocessingConfig
+from app.services.ocr.cache import OCRResultCache
 from app.services.team_service import TeamService
+from app.repositories import ReceiptInsertBatcher
 
 
 async def main():
     logger.info("Starting bot...")
 
     # Initialize database
-    engine = create_async_engine(
-        settings.DATABASE_URL,
-        echo=settings.DB_ECHO,
-    )
+    engine = create_database_engine()
 
     # Create session factory
-    async_session = async_sessionmaker(engine, expire_on_commit=False)
+    async_session = create_session_factory(engine)
 
     # Initialize bot and dispatcher
     bot = Bot(token=settings.BOT_TOKEN)
     dp = Dispatcher()
 
-    # Initialize services
-    user_service = UserService(async_session)
-    receipt_service = ReceiptService(async_session,
-                                     upload_dir=settings.UPLOAD_DIR)
-    team_service = TeamService(async_session)
+    # Initialize OCR worker pool
+    ocr_pool = OCRWorkerPool(
+        max_workers=settings.OCR_WORKERS,
+        max_queue=settings.OCR_MAX_QUEUE,
+        tesseract_cmd=settings.TESSERACT_CMD
+    )
+
+    ocr_service = OCRService(
+        ocr_pool,
+        lang=settings.OCR_LANG,
+        lang_verify_rate=settings.OCR_LANG_VERIFY_RATE,
+        pdf_dpi=settings.OCR_PDF_DPI,
+        preprocessing=PreprocessingConfig(
+            fix_orientation=settings.OCR_FIX_ORIENTATION,
+            downscale=settings.OCR_DOWNSCALE,
+            target_text_height=settings.OCR_TARGET_TEXT_HEIGHT,
+            grayscale=settings.OCR_GRAYSCALE,
+            binarize=settings.OCR_BINARIZE,
+            deskew=settings.OCR_DESKEW,
+            crop=settings.OCR_CROP
+        )
+    )
+
+    ocr_cache = None
+    if settings.OCR_CACHE_ENABLED:
+        ocr_cache = OCRResultCache(
+            cache_dir=settings.OCR_CACHE_DIR,
+            max_memory_items=settings.OCR_CACHE_MEMORY_ITEMS,
+            max_disk_bytes=settings.OCR_CACHE_MAX_BYTES
+        )
+
+    # Initialize services; they are shared by all updates and use the
+    # unit of work of the update being handled
+    user_service = UserService()
+    file_storage = create_file_storage(settings.FILE_STORAGE_BACKEND,
+                                       settings.UPLOAD_DIR)
+    receipt_batcher = None
+    if settings.RECEIPT_BATCH_ENABLED:
+        receipt_batcher = ReceiptInsertBatcher(
+            async_session,
+            window=settings.RECEIPT_BATCH_WINDOW,
+            max_batch=settings.RECEIPT_BATCH_MAX
+        )
+    receipt_service = ReceiptService(file_storage=file_storage,
+                                     ocr_service=ocr_service,
+                                     ocr_cache=ocr_cache,
+                                     receipt_batcher=receipt_batcher)
+    team_service = TeamService()
+    export_service = ExportService(settings.EXPORT_DIR,
+                                   batch_size=settings.EXPORT_BATCH_SIZE)
+    archive_service = ArchiveService(
+        file_storage,
+        settings.EXPORT_DIR,
+        max_part_bytes=settings.TELEGRAM_UPLOAD_LIMIT,
+        batch_size=settings.EXPORT_BATCH_SIZE
+    )
+    ingestion_service = IngestionService(
+        async_session,
+        receipt_service=receipt_service,
+        open_file=lambda file_id: open_telegram_file(bot, file_id),
+        notify=make_job_notifier(bot),
+        workers=settings.INGESTION_WORKERS,
+        user_concurrency=settings.INGESTION_USER_CONCURRENCY,
+        max_attempts=settings.INGESTION_MAX_ATTEMPTS,
+        retry_base_delay=settings.INGESTION_RETRY_BASE_DELAY,
+        retry_max_delay=settings.INGESTION_RETRY_MAX_DELAY
+    )
 
     # Setup routers
     receipt_router = setup_receipt_handlers(receipt_service, team_service,
-                                            settings)
+                                            ingestion_service, settings)
     team_router = setup_team_handlers(team_service)
+    stats_router = setup_stats_handlers(settings, ocr_service, ocr_cache)
+    export_router = setup_export_handlers(export_service, archive_service,
+                                          settings)
 
     # Include all routers
     dp.include_router(base.router)
     dp.include_router(receipt_router)  # Add receipt router
     dp.include_router(team_router)  # Add team router
+    dp.include_router(stats_router)
+    dp.include_router(export_router)
 
-    # Setup database session middleware
+    # One unit of work per update: the session is opened on first use
+    # and committed once after the handler
     @dp.update.outer_middleware()
     async def database_middleware(handler, event, data):
-        async with async_session() as session:
-            data["session"] = session
+        async with unit_of_work(async_session):
             data["user_service"] = user_service
             data["receipt_service"] = receipt_service
             data["team_service"] = team_service
             return await handler(event, data)
 
-
     # Setup middleware
     dp.update.outer_middleware(AuthMiddleware())
+    dp.message.middleware(HandlerMetricsMiddleware())
+    dp.callback_query.middleware(HandlerMetricsMiddleware())
+
+    OCR_QUEUE.set_function(lambda: {
+        'running': ocr_pool.running,
+        'queued': ocr_pool.queued,
+    })
+    INGESTION_QUEUE.set_function(lambda: ingestion_service.queued)
+    language_stats = ocr_service.language_stats
+    OCR_LANGUAGE_SINGLE_RATE.set_function(
+        lambda: language_stats.stats()['single_language_rate'])
+    OCR_LANGUAGE_MATCH_RATE.set_function(
+        lambda: language_stats.stats()['match_rate'])
+    metrics_runner = None
+    if settings.METRICS_ENABLED:
+        metrics_runner = await start_metrics_server(settings.METRICS_HOST,
+                                                    settings.METRICS_PORT)
 
     try:
+        # Pick up jobs left over from the previous run
+        await ingestion_service.start()
+
         # Start polling
         logger.info("Bot started")
         await dp.start_polling(bot)
     except Exception as e:
         logger.error(f"Error starting bot: {e}")
     finally:
+        await ingestion_service.stop()
+        if receipt_batcher is not None:
+            await receipt_batcher.close()
+        if metrics_runner is not None:
+            await metrics_runner.cleanup()
+        ocr_pool.shutdown()
+        await engine.dispose()
         logger.info("Bot stopped")
 
 
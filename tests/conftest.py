@@ -0,0 +1,31 @@
+import os
+
+# Settings are read on import and the token is required
+os.environ.setdefault('BOT_TOKEN', 'test')
+
+import pytest_asyncio  # noqa: E402
+from sqlalchemy.ext.asyncio import (  # noqa: E402
+    async_sessionmaker, create_async_engine
+)
+
+from app.models import Base, Team, User  # noqa: E402
+
+
+@pytest_asyncio.fixture
+async def session_factory(tmp_path):
+    """Fresh SQLite database with the full schema."""
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield async_sessionmaker(engine, expire_on_commit=False)
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def team(session_factory):
+    async with session_factory() as session:
+        team = Team(name='test')
+        session.add_all([team, User(telegram_id=1, username='alice')])
+        await session.commit()
+    return team
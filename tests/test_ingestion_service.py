@@ -0,0 +1,188 @@
+import asyncio
+import json
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import select
+
+from app.models import IngestionJob
+from app.services.ingestion_service import IngestionService
+
+pytestmark = pytest.mark.asyncio
+
+
+class FakeReceiptService:
+    """Receipt service whose files fail as scripted in ``failures``."""
+    group_commit = False
+
+    def __init__(self, failures=None, uploader_error=None):
+        # file_unique_id -> exceptions raised by successive attempts
+        self.failures = failures or {}
+        self.uploader_error = uploader_error
+        self.extracted = []
+        self.created = []
+
+    async def get_uploader(self, telegram_id):
+        if self.uploader_error is not None:
+            raise self.uploader_error
+        return SimpleNamespace(user_id=1, team_id=1)
+
+    async def extract_telegram_file(self, file_unique_id, download):
+        self.extracted.append(file_unique_id)
+        failures = self.failures.get(file_unique_id)
+        if failures:
+            raise failures.pop(0)
+        return file_unique_id, {}
+
+    async def create_receipts(self, uploader, extracted, on_insert=None):
+        receipts = [
+            SimpleNamespace(id=len(self.created) + number, amount='10.00',
+                            date=datetime(2024, 1, 1), status='pending')
+            for number, _ in enumerate(extracted, start=1)
+        ]
+        self.created.extend(key for key, _ in extracted)
+        if on_insert is not None:
+            await on_insert(receipts)
+        return receipts
+
+
+class Notifications:
+    def __init__(self):
+        self.messages = []
+        self._received = asyncio.Event()
+
+    async def __call__(self, job, text):
+        self.messages.append(text)
+        self._received.set()
+
+    async def wait(self):
+        await asyncio.wait_for(self._received.wait(), 5)
+
+
+async def open_file(file_id):
+    raise AssertionError("the fake receipt service never downloads")
+
+
+def make_files(count):
+    return [{'file_id': str(i), 'file_unique_id': f"u{i}"}
+            for i in range(count)]
+
+
+async def run_job(session_factory, receipt_service, files, **options):
+    notify = Notifications()
+    service = IngestionService(session_factory, receipt_service, open_file,
+                               notify, retry_base_delay=0.01, **options)
+    await service.start()
+    try:
+        await service.submit(1, 1, files)
+        await notify.wait()
+    finally:
+        await service.stop()
+    return await get_job(session_factory), notify.messages
+
+
+async def get_job(session_factory):
+    async with session_factory() as session:
+        return (await session.scalars(select(IngestionJob))).one()
+
+
+async def test_all_files_processed(session_factory):
+    receipts = FakeReceiptService()
+    job, messages = await run_job(session_factory, receipts, make_files(3))
+
+    assert job.status == IngestionJob.DONE
+    assert job.attempts == 1
+    assert [result['receipt_id'] for result in json.loads(job.result)] == [
+        1, 2, 3]
+    assert messages[0].startswith("Processed 3 of 3 receipts")
+
+
+async def test_transient_failure_retries_only_that_file(session_factory):
+    receipts = FakeReceiptService({'u1': [ConnectionError("reset")]})
+    job, _ = await run_job(session_factory, receipts, make_files(3))
+
+    assert job.status == IngestionJob.DONE
+    assert job.attempts == 2
+    assert job.error is None
+    assert receipts.extracted.count('u0') == 1
+    assert receipts.extracted.count('u1') == 2
+    assert sorted(receipts.created) == ['u0', 'u1', 'u2']
+    assert all('receipt_id' in result for result in json.loads(job.result))
+
+
+async def test_permanent_failure_is_not_retried(session_factory):
+    receipts = FakeReceiptService({'u0': [ValueError("No amount found")]})
+    job, messages = await run_job(session_factory, receipts, make_files(2))
+
+    assert job.status == IngestionJob.DONE
+    assert job.attempts == 1
+    results = json.loads(job.result)
+    assert results[0] == {'error': "No amount found"}
+    assert 'receipt_id' in results[1]
+    assert "1. Failed: No amount found" in messages[0]
+
+
+async def test_fails_after_max_attempts(session_factory):
+    receipts = FakeReceiptService(
+        {'u0': [ConnectionError("reset")] * 3})
+    job, messages = await run_job(session_factory, receipts, make_files(1),
+                                  max_attempts=2)
+
+    assert job.status == IngestionJob.FAILED
+    assert job.attempts == 2
+    assert job.error == "reset"
+    assert json.loads(job.result) == [{'error': "reset"}]
+    assert receipts.created == []
+    assert messages == ["Failed to process receipt: reset"]
+
+
+async def test_unknown_uploader_fails_every_file(session_factory):
+    receipts = FakeReceiptService(uploader_error=ValueError("User not found"))
+    job, _ = await run_job(session_factory, receipts, make_files(2))
+
+    assert job.status == IngestionJob.DONE
+    assert json.loads(job.result) == [{'error': "User not found"}] * 2
+    assert receipts.extracted == []
+
+
+async def test_crashed_run_is_retried(session_factory):
+    receipts = FakeReceiptService(uploader_error=RuntimeError("boom"))
+    job, messages = await run_job(session_factory, receipts, make_files(1),
+                                  max_attempts=2)
+
+    assert job.status == IngestionJob.FAILED
+    assert job.attempts == 2
+    assert job.error == "boom"
+    assert messages == ["Failed to process receipt: boom"]
+
+
+async def test_start_recovers_interrupted_jobs(session_factory):
+    # A job that was running when the process stopped, with its first
+    # file already stored
+    async with session_factory() as session:
+        session.add(IngestionJob(
+            telegram_id=1, chat_id=1, status=IngestionJob.RUNNING,
+            attempts=1, files=json.dumps(make_files(2)),
+            result=json.dumps([{'receipt_id': 7, 'amount': '10.00',
+                                'date': '2024-01-01',
+                                'status': 'pending'}, None])
+        ))
+        await session.commit()
+
+    receipts = FakeReceiptService()
+    notify = Notifications()
+    service = IngestionService(session_factory, receipts, open_file,
+                               notify)
+    await service.start()
+    try:
+        await notify.wait()
+    finally:
+        await service.stop()
+
+    job = await get_job(session_factory)
+    assert job.status == IngestionJob.DONE
+    assert job.attempts == 2
+    assert receipts.extracted == ['u1']
+    assert [result['receipt_id'] for result in json.loads(job.result)] == [
+        7, 1]
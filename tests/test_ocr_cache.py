@@ -0,0 +1,78 @@
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+
+from app.services.ocr.cache import OCRResultCache
+
+RESULT = {
+    'amount': Decimal('1250.50'),
+    'date': datetime(2024, 3, 1, 12, 30),
+    'day': date(2024, 3, 1),
+    'sender': 'Иванов',
+}
+
+
+def test_key_depends_on_content_and_params():
+    key = OCRResultCache.make_key('abc', {'lang': 'rus', 'dpi': 300})
+    assert key == OCRResultCache.make_key('abc', {'dpi': 300, 'lang': 'rus'})
+    assert key != OCRResultCache.make_key('abd', {'lang': 'rus', 'dpi': 300})
+    assert key != OCRResultCache.make_key('abc', {'lang': 'eng', 'dpi': 300})
+    assert key != OCRResultCache.make_key(
+        'abc', {'lang': 'rus', 'dpi': 300, 'parser': 'v2'})
+
+
+@pytest.mark.asyncio
+async def test_round_trip_through_memory_and_disk(tmp_path):
+    cache = OCRResultCache(tmp_path)
+    assert await cache.get('k') is None
+    await cache.set('k', RESULT)
+    assert await cache.get('k') == RESULT
+
+    # A new instance only has the disk tier
+    cache = OCRResultCache(tmp_path)
+    assert await cache.get('k') == RESULT
+    assert cache.stats()['disk_hits'] == 1
+    assert await cache.get('k') == RESULT
+    assert cache.stats()['memory_hits'] == 1
+
+
+@pytest.mark.asyncio
+async def test_returns_copies(tmp_path):
+    cache = OCRResultCache(tmp_path)
+    await cache.set('k', RESULT)
+    (await cache.get('k'))['amount'] = Decimal(0)
+    assert (await cache.get('k'))['amount'] == RESULT['amount']
+
+
+@pytest.mark.asyncio
+async def test_memory_keeps_recently_used_items(tmp_path):
+    cache = OCRResultCache(tmp_path, max_memory_items=2)
+    for key in ('a', 'b', 'c'):
+        await cache.set(key, {'key': key})
+    assert cache.stats()['memory_items'] == 2
+    # Evicted from memory but still on disk
+    assert await cache.get('a') == {'key': 'a'}
+    assert cache.stats()['disk_hits'] == 1
+
+
+@pytest.mark.asyncio
+async def test_disk_evicts_least_recently_used(tmp_path):
+    cache = OCRResultCache(tmp_path, max_memory_items=1, max_disk_bytes=50)
+    await cache.set('a', {'text': 'x' * 20})
+    await cache.set('b', {'text': 'y' * 20})
+    await cache.set('c', {'text': 'z' * 20})
+
+    stats = cache.stats()
+    assert stats['disk_bytes'] <= 50
+    assert stats['disk_items'] == 1
+    cache = OCRResultCache(tmp_path)
+    assert await cache.get('a') is None
+    assert await cache.get('c') == {'text': 'z' * 20}
+
+
+@pytest.mark.asyncio
+async def test_failed_write_is_not_raised(tmp_path):
+    cache = OCRResultCache(tmp_path)
+    await cache.set('k', {'value': object()})
+    assert cache.stats()['disk_items'] == 0
@@ -0,0 +1,132 @@
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+import pytest
+
+from app.db.unit_of_work import unit_of_work
+from app.repositories.receipt import ReceiptRepository
+from app.repositories.receipt_rollup import ReceiptRollupRepository
+
+pytestmark = pytest.mark.asyncio
+
+START = datetime(2024, 1, 1)
+END = datetime(2024, 1, 31, 23, 59)
+
+
+async def create_receipts(session_factory, team, dates):
+    rows = [
+        {'team_id': team.id, 'uploaded_by': 1, 'date': receipt_date,
+         'amount': Decimal('10.00'), 'status': 'pending'}
+        for receipt_date in dates
+    ]
+    async with unit_of_work(session_factory):
+        receipts = await ReceiptRepository().create_many(rows)
+    return [(receipt.date, receipt.id) for receipt in receipts]
+
+
+async def get_page(session_factory, team, limit, cursor=None,
+                   backward=False):
+    async with unit_of_work(session_factory):
+        receipts, has_more = await ReceiptRepository().get_team_receipts_page(
+            team.id, START, END, limit, cursor=cursor, backward=backward)
+    return [(receipt.date, receipt.id) for receipt in receipts], has_more
+
+
+async def get_summary(session_factory, team):
+    async with unit_of_work(session_factory):
+        return await ReceiptRollupRepository().get_summary(
+            team.id, date(2024, 1, 1), date(2024, 1, 31))
+
+
+async def test_pages_cover_every_receipt_once(session_factory, team):
+    # Ties on the date are ordered by id
+    dates = [START + timedelta(days=day // 2) for day in range(7)]
+    keys = await create_receipts(session_factory, team, dates)
+
+    seen, cursor, has_more = [], None, True
+    while has_more:
+        page, has_more = await get_page(session_factory, team, 3, cursor)
+        seen.extend(page)
+        cursor = page[-1]
+    assert seen == sorted(keys)
+
+
+async def test_last_full_page_has_no_more(session_factory, team):
+    keys = await create_receipts(
+        session_factory, team, [START + timedelta(days=i) for i in range(4)])
+
+    page, has_more = await get_page(session_factory, team, 2)
+    assert page == keys[:2] and has_more
+    page, has_more = await get_page(session_factory, team, 2, page[-1])
+    assert page == keys[2:] and not has_more
+    page, has_more = await get_page(session_factory, team, 2, page[-1])
+    assert page == [] and not has_more
+
+
+async def test_backward_page_is_in_ascending_order(session_factory, team):
+    keys = await create_receipts(
+        session_factory, team, [START + timedelta(days=i) for i in range(5)])
+
+    page, has_more = await get_page(session_factory, team, 2, keys[3],
+                                    backward=True)
+    assert page == keys[1:3] and has_more
+    page, has_more = await get_page(session_factory, team, 2, keys[1],
+                                    backward=True)
+    assert page == keys[:1] and not has_more
+
+
+async def test_period_bounds_are_inclusive(session_factory, team):
+    keys = await create_receipts(session_factory, team, [
+        START - timedelta(seconds=1), START, END,
+        END + timedelta(seconds=1)
+    ])
+    page, has_more = await get_page(session_factory, team, 10)
+    assert page == keys[1:3] and not has_more
+
+
+async def test_create_counts_receipts_in_rollups(session_factory, team):
+    await create_receipts(session_factory, team, [START, START])
+    assert await get_summary(session_factory, team) == {
+        'pending': (2, Decimal('20.00'))}
+
+
+async def test_update_moves_receipt_between_rollups(session_factory, team):
+    (_, receipt_id), _ = await create_receipts(session_factory, team,
+                                               [START, START])
+    async with unit_of_work(session_factory):
+        await ReceiptRepository().update(receipt_id, status='approved',
+                                         amount=Decimal('25.50'))
+
+    assert await get_summary(session_factory, team) == {
+        'pending': (1, Decimal('10.00')),
+        'approved': (1, Decimal('25.50')),
+    }
+
+
+async def test_update_moves_receipt_to_another_day(session_factory, team):
+    (_, receipt_id), = await create_receipts(session_factory, team, [START])
+    async with unit_of_work(session_factory):
+        await ReceiptRepository().update(receipt_id,
+                                         date=START + timedelta(days=1))
+        rollups = ReceiptRollupRepository()
+        first_day = await rollups.get_summary(team.id, date(2024, 1, 1),
+                                              date(2024, 1, 1))
+        second_day = await rollups.get_summary(team.id, date(2024, 1, 2),
+                                               date(2024, 1, 2))
+    assert first_day == {}
+    assert second_day == {'pending': (1, Decimal('10.00'))}
+
+
+async def test_update_of_other_columns_keeps_rollups(session_factory, team):
+    (_, receipt_id), = await create_receipts(session_factory, team, [START])
+    async with unit_of_work(session_factory):
+        receipt = await ReceiptRepository().update(receipt_id, notes='x')
+    assert receipt.notes == 'x'
+    assert await get_summary(session_factory, team) == {
+        'pending': (1, Decimal('10.00'))}
+
+
+async def test_update_of_missing_receipt(session_factory, team):
+    async with unit_of_work(session_factory):
+        assert await ReceiptRepository().update(1, status='approved') is None
+    assert await get_summary(session_factory, team) == {}
@@ -0,0 +1,72 @@
+import os
+import zipfile
+
+import pytest
+
+from app.services.archive_service import SplitZipWriter
+
+
+def make_file(directory, name, size):
+    path = directory / name
+    # Random bytes, so deflating them saves nothing
+    path.write_bytes(os.urandom(size))
+    return path
+
+
+@pytest.fixture
+def files(tmp_path):
+    source = tmp_path / 'source'
+    source.mkdir()
+    return [make_file(source, f"{i}.bin", 1000) for i in range(10)]
+
+
+@pytest.fixture
+def out_dir(tmp_path):
+    directory = tmp_path / 'out'
+    directory.mkdir()
+    return directory
+
+
+def test_parts_stay_within_the_limit(files, out_dir):
+    writer = SplitZipWriter(out_dir, max_part_bytes=3500)
+    numbers = {path.name: writer.add(path, path.name) for path in files}
+    writer.close()
+
+    assert len(writer.parts) > 1
+    assert max(numbers.values()) == len(writer.parts)
+    names = []
+    for number, part in enumerate(writer.parts, start=1):
+        assert part.stat().st_size <= 3500
+        with zipfile.ZipFile(part) as archive:
+            assert archive.testzip() is None
+            for name in archive.namelist():
+                assert numbers[name] == number
+            names.extend(archive.namelist())
+    assert names == [path.name for path in files]
+
+
+def test_single_part_when_everything_fits(files, out_dir):
+    writer = SplitZipWriter(out_dir, max_part_bytes=1024 * 1024)
+    assert {writer.add(path, path.name) for path in files} == {1}
+    writer.close()
+    assert len(writer.parts) == 1
+
+
+def test_oversized_file_gets_a_part_of_its_own(tmp_path, out_dir):
+    small = make_file(tmp_path, 'small.bin', 100)
+    large = make_file(tmp_path, 'large.bin', 5000)
+    writer = SplitZipWriter(out_dir, max_part_bytes=2000)
+    assert writer.add(small, 'a') == 1
+    assert writer.add(large, 'b') == 2
+    assert writer.add(small, 'c') == 3
+    writer.close()
+    with zipfile.ZipFile(writer.parts[1]) as archive:
+        assert archive.namelist() == ['b']
+
+
+def test_discard_removes_parts(files, out_dir):
+    writer = SplitZipWriter(out_dir, max_part_bytes=3500)
+    for path in files:
+        writer.add(path, path.name)
+    writer.discard()
+    assert list(out_dir.iterdir()) == []
@@ -0,0 +1,81 @@
+import pytest
+from sqlalchemy import func, select
+
+from app.db.unit_of_work import (
+    current_session, current_unit_of_work, on_commit, unit_of_work
+)
+from app.models import Team
+from app.repositories.team import TeamRepository
+
+pytestmark = pytest.mark.asyncio
+
+
+async def count_teams(session_factory) -> int:
+    async with session_factory() as session:
+        return await session.scalar(select(func.count(Team.id)))
+
+
+async def test_commits_once_at_the_end(session_factory):
+    committed = []
+    async with unit_of_work(session_factory) as uow:
+        await TeamRepository().create(name='a')
+        uow.on_commit(lambda: committed.append(True))
+        assert not committed
+        assert uow.has_writes
+    assert committed == [True]
+    assert await count_teams(session_factory) == 1
+
+
+async def test_rolls_back_and_drops_callbacks_on_error(session_factory):
+    committed = []
+    with pytest.raises(RuntimeError):
+        async with unit_of_work(session_factory):
+            await TeamRepository().create(name='a')
+            on_commit(lambda: committed.append(True))
+            raise RuntimeError
+    assert not committed
+    assert await count_teams(session_factory) == 0
+    assert current_unit_of_work() is None
+
+
+async def test_joins_the_active_unit_of_work(session_factory):
+    async with unit_of_work(session_factory) as outer:
+        async with unit_of_work(session_factory) as inner:
+            assert inner is outer
+            await TeamRepository().create(name='a')
+        # Left for the outer unit of work to commit
+        assert await count_teams(session_factory) == 0
+    assert await count_teams(session_factory) == 1
+
+
+async def test_independent_unit_of_work_commits_on_its_own(session_factory):
+    async with unit_of_work(session_factory) as outer:
+        async with unit_of_work(session_factory, join=False) as inner:
+            assert inner is not outer
+            await TeamRepository().create(name='a')
+        assert await count_teams(session_factory) == 1
+        assert current_unit_of_work() is outer
+
+
+async def test_independent_unit_of_work_refuses_pending_writes(
+        session_factory):
+    async with unit_of_work(session_factory) as outer:
+        await TeamRepository().create(name='a')
+        with pytest.raises(RuntimeError):
+            async with unit_of_work(session_factory, join=False):
+                pass
+        await outer.commit()
+        async with unit_of_work(session_factory, join=False):
+            await TeamRepository().create(name='b')
+    assert await count_teams(session_factory) == 2
+
+
+async def test_on_commit_without_unit_of_work_runs_at_once():
+    called = []
+    on_commit(lambda: called.append(True))
+    assert called == [True]
+
+
+async def test_current_session_needs_a_unit_of_work():
+    with pytest.raises(RuntimeError):
+        current_session()